@@ -1,6 +1,6 @@
 import streamlit as st
-from pipeline.pipeline import AnimeRecommendationPipeline
 from dotenv import load_dotenv
+from utils.startup import STARTUP_REPORT
 
 # Set up Streamlit page configuration
 st.set_page_config(page_title="Anime Recommender", layout="wide")
@@ -11,23 +11,34 @@ load_dotenv()
 @st.cache_resource
 def init_pipeline():
     """
-    Initializes and caches the AnimeRecommendationPipeline instance
-    to avoid reloading the model on every interaction.
+    Initializes, warms up and caches the AnimeRecommendationPipeline instance
+    to avoid reloading the model on every interaction. The pipeline and its
+    dependencies are imported here, so the page renders before they load.
     """
-    return AnimeRecommendationPipeline()
-
-# Initialize pipeline once per session
-pipeline = init_pipeline()
+    with STARTUP_REPORT.timed("import pipeline.pipeline"):
+        from pipeline.pipeline import AnimeRecommendationPipeline
+    with STARTUP_REPORT.timed("create pipeline"):
+        pipeline = AnimeRecommendationPipeline()
+    pipeline.warm_up()
+    pipeline.start_index_watcher()
+    return pipeline
 
 # App title
 st.title("Anime Recommender System")
 
+# Initialize pipeline once per session
+with st.spinner("Loading recommender..."):
+    pipeline = init_pipeline()
+
 # Input field for user preferences
 query = st.text_input("Enter your anime preferences (e.g., light-hearted anime with school settings)")
 
-# Generate recommendation if query is submitted
+# Stream the recommendation as it is generated if query is submitted
 if query:
-    with st.spinner("Fetching recommendations for you..."):
-        response = pipeline.recommend(query)
-        st.markdown("### Recommendations")
-        st.write(response)
+    st.markdown("### Recommendations")
+    stream = pipeline.stream_recommend(query)
+    st.write_stream(stream)
+    st.caption(
+        f"Time to first token: {stream.time_to_first_token or 0.0:.2f}s | "
+        f"Total: {stream.total_latency or 0.0:.2f}s"
+    )
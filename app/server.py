@@ -0,0 +1,279 @@
+import argparse
+import json
+import queue
+import threading
+import uuid
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from dotenv import load_dotenv
+
+from config.config import SERVER_WORKERS, SERVER_QUEUE_SIZE, SERVER_REQUEST_TIMEOUT_SECONDS
+from utils.logger import get_logger
+from utils.metrics import METRICS, request_context
+from utils.startup import STARTUP_REPORT
+
+logger = get_logger(__name__)
+
+MAX_BODY_BYTES = 64 * 1024
+
+
+class RecommendationServer:
+    """
+    Lightweight HTTP JSON API around a shared AnimeRecommendationPipeline.
+
+    Requests are handed to a fixed pool of worker threads through a bounded
+    queue. When the queue is full the server answers 503 instead of piling up
+    work, and a request that waits longer than the timeout gets 504.
+
+    Endpoints:
+        POST /recommend  {"query": "..."} -> {"query": "...", "recommendation": "..."}
+        GET  /healthz    -> {"status": "ok", "queue_depth": n}
+        GET  /stats      -> pipeline cache statistics
+        GET  /startup    -> startup report: lazy import, model and index load timings
+        GET  /metrics    -> latency histograms, token and cache counters in Prometheus text format
+
+    Each request runs under a request ID, taken from the X-Request-ID header or
+    generated, which is attached to its log records and echoed in every response,
+    errors included. Request bodies need a valid Content-Length of at most
+    MAX_BODY_BYTES.
+
+    Attributes:
+        pipeline: The shared, preloaded recommendation pipeline.
+        workers (int): Number of worker threads calling the pipeline.
+        request_timeout (float): Seconds a request may wait for its answer.
+    """
+
+    workers: int
+    request_timeout: float
+
+    def __init__(
+        self,
+        pipeline,
+        host: str = "0.0.0.0",
+        port: int = 8000,
+        workers: int = SERVER_WORKERS,
+        queue_size: int = SERVER_QUEUE_SIZE,
+        request_timeout: float = SERVER_REQUEST_TIMEOUT_SECONDS
+    ) -> None:
+        """
+        Args:
+            pipeline: Object exposing ``recommend(query)`` and ``cache_stats()``.
+            host (str, optional): Interface to bind. Defaults to "0.0.0.0".
+            port (int, optional): Port to bind; 0 picks a free port. Defaults to 8000.
+            workers (int, optional): Worker threads calling the pipeline.
+            queue_size (int, optional): Requests allowed to wait for a worker.
+            request_timeout (float, optional): Seconds before a request gets 504.
+        """
+        if workers < 1 or queue_size < 1:
+            raise ValueError("workers and queue_size must be at least 1.")
+
+        self.pipeline = pipeline
+        self.workers = workers
+        self.request_timeout = request_timeout
+        self._jobs: queue.Queue = queue.Queue(maxsize=queue_size)
+        self._threads: list[threading.Thread] = []
+        self._httpd = ThreadingHTTPServer((host, port), self._make_handler())
+        self._httpd.daemon_threads = True
+
+    @property
+    def port(self) -> int:
+        """The port the server is bound to."""
+        return self._httpd.server_address[1]
+
+    def start_workers(self) -> None:
+        """Starts the worker threads that execute queued recommendations."""
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"recommend-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def serve_forever(self) -> None:
+        """Starts the workers and serves HTTP requests until shutdown() is called."""
+        self.start_workers()
+        logger.info(
+            "Recommendation API listening on port %d with %d workers and queue size %d.",
+            self.port, self.workers, self._jobs.maxsize
+        )
+        self._httpd.serve_forever()
+
+    def shutdown(self) -> None:
+        """Stops accepting requests and lets the workers exit."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        for _ in self._threads:
+            self._jobs.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        logger.info("Recommendation API stopped.")
+
+    def submit(self, query: str, request_id: Optional[str] = None) -> Optional[Future]:
+        """
+        Queues a recommendation without blocking.
+
+        Args:
+            query (str): User query.
+            request_id (str, optional): ID the recommendation is instrumented and logged under.
+
+        Returns:
+            Optional[Future]: Future for the answer, or None if the queue is full.
+        """
+        future: Future = Future()
+        try:
+            self._jobs.put_nowait((query, request_id, future))
+        except queue.Full:
+            return None
+        return future
+
+    def _work(self) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                return
+            query, request_id, future = job
+            # Skip requests whose caller already gave up
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                with request_context(request_id):
+                    future.set_result(self.pipeline.recommend(query))
+            except Exception as e:
+                future.set_exception(e)
+
+    def _make_handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            request_id: Optional[str] = None
+
+            def do_GET(self) -> None:
+                self.request_id = self.headers.get("X-Request-ID") or uuid.uuid4().hex[:16]
+                if self.path == "/healthz":
+                    self._send(HTTPStatus.OK, {"status": "ok", "queue_depth": server._jobs.qsize()})
+                elif self.path == "/stats":
+                    self._send(HTTPStatus.OK, server.pipeline.cache_stats())
+                elif self.path == "/startup":
+                    self._send(HTTPStatus.OK, STARTUP_REPORT.as_dict())
+                elif self.path == "/metrics":
+                    self._send_body(HTTPStatus.OK, METRICS.render_prometheus().encode("utf-8"),
+                                    "text/plain; version=0.0.4; charset=utf-8")
+                else:
+                    self._send(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+
+            def do_POST(self) -> None:
+                self.request_id = self.headers.get("X-Request-ID") or uuid.uuid4().hex[:16]
+                if self.path != "/recommend":
+                    self._send(HTTPStatus.NOT_FOUND, {"error": "Not found"})
+                    return
+
+                # A negative length would make rfile.read block until the client disconnects
+                try:
+                    length = int(self.headers.get("Content-Length", ""))
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    self._send(HTTPStatus.BAD_REQUEST, {"error": "Content-Length must be a non-negative integer"})
+                    return
+                if length > MAX_BODY_BYTES:
+                    self._send(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, {"error": "Request body too large"})
+                    return
+                try:
+                    query = json.loads(self.rfile.read(length) or b"{}").get("query")
+                except (ValueError, AttributeError):
+                    self._send(HTTPStatus.BAD_REQUEST, {"error": "Body must be a JSON object"})
+                    return
+                if not isinstance(query, str) or not query.strip():
+                    self._send(HTTPStatus.BAD_REQUEST, {"error": "Field 'query' must be a non-empty string"})
+                    return
+
+                request_id = self.request_id
+                future = server.submit(query, request_id)
+                if future is None:
+                    logger.warning("Request queue full; rejecting query with 503.")
+                    self._send(HTTPStatus.SERVICE_UNAVAILABLE, {"error": "Server busy, retry later"},
+                               headers={"Retry-After": "1"})
+                    return
+
+                try:
+                    recommendation = future.result(timeout=server.request_timeout)
+                except FutureTimeoutError:
+                    future.cancel()
+                    logger.warning("Recommendation timed out after %.1fs.", server.request_timeout)
+                    self._send(HTTPStatus.GATEWAY_TIMEOUT, {"error": "Recommendation timed out"})
+                    return
+                except Exception:
+                    logger.exception("Recommendation failed for request %s.", request_id)
+                    self._send(HTTPStatus.INTERNAL_SERVER_ERROR,
+                               {"error": "Internal server error", "request_id": request_id})
+                    return
+
+                self._send(HTTPStatus.OK, {"query": query, "recommendation": recommendation})
+
+            def _send(self, status: HTTPStatus, payload: dict, headers: Optional[dict] = None) -> None:
+                self._send_body(status, json.dumps(payload).encode("utf-8"), "application/json", headers)
+
+            def _send_body(
+                self, status: HTTPStatus, body: bytes, content_type: str, headers: Optional[dict] = None
+            ) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                if self.request_id is not None:
+                    self.send_header("X-Request-ID", self.request_id)
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args) -> None:
+                logger.info("%s - %s", self.address_string(), format % args)
+
+        return Handler
+
+
+def main() -> None:
+    """
+    Entry point for the HTTP API. Loads and warms up the pipeline (embedding
+    model, vector store and LLM client) before binding the port, so the first
+    request is warm and the port opening signals readiness.
+    """
+    load_dotenv()
+
+    parser = argparse.ArgumentParser(description="Serve anime recommendations over HTTP.")
+    parser.add_argument("--host", default="0.0.0.0", help="Interface to bind.")
+    parser.add_argument("--port", type=int, default=8000, help="Port to bind.")
+    parser.add_argument("--persist-dir", default="chroma_db", help="Vector store directory.")
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS, help="Worker threads.")
+    parser.add_argument("--queue-size", type=int, default=SERVER_QUEUE_SIZE,
+                        help="Requests allowed to wait before answering 503.")
+    parser.add_argument("--timeout", type=float, default=SERVER_REQUEST_TIMEOUT_SECONDS,
+                        help="Seconds before a request is answered with 504.")
+    args = parser.parse_args()
+
+    with STARTUP_REPORT.timed("import pipeline.pipeline"):
+        from pipeline.pipeline import AnimeRecommendationPipeline
+
+    with STARTUP_REPORT.timed("create pipeline"):
+        pipeline = AnimeRecommendationPipeline(persist_dir=args.persist_dir)
+    pipeline.warm_up()
+    pipeline.start_index_watcher()
+
+    server = RecommendationServer(
+        pipeline,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        queue_size=args.queue_size,
+        request_timeout=args.timeout
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
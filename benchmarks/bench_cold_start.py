@@ -0,0 +1,83 @@
+"""
+Benchmarks cold start: importing the pipeline, constructing it and warming it
+up, each run in a fresh interpreter so nothing is cached in-process.
+
+Usage:
+    python -m benchmarks.bench_cold_start --persist-dir chroma_db --runs 5
+    python -m benchmarks.bench_cold_start --output cold_start.json
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+
+def measure(persist_dir: str) -> dict:
+    """Runs inside the child process: times import, construction and warm-up."""
+    start = time.perf_counter()
+    from utils.startup import STARTUP_REPORT
+    from pipeline.pipeline import AnimeRecommendationPipeline
+    result = {"import_seconds": time.perf_counter() - start}
+
+    start = time.perf_counter()
+    pipeline = AnimeRecommendationPipeline(persist_dir=persist_dir)
+    result["init_seconds"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    try:
+        pipeline.warm_up()
+        result["warm_up_seconds"] = time.perf_counter() - start
+    except Exception as e:
+        # e.g. the embedding model cannot be loaded in this environment
+        result["warm_up_seconds"] = None
+        result["warm_up_error"] = str(e).splitlines()[0]
+
+    result["startup_report"] = STARTUP_REPORT.as_dict()
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure pipeline cold-start time.")
+    parser.add_argument("--persist-dir", default="chroma_db")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="Write the summary as JSON to this file.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.persist_dir)))
+        return
+
+    runs = []
+    for _ in range(args.runs):
+        command = [sys.executable, "-m", "benchmarks.bench_cold_start", "--child", "--persist-dir", args.persist_dir]
+        start = time.perf_counter()
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        run = json.loads(output.strip().splitlines()[-1])
+        run["process_seconds"] = time.perf_counter() - start
+        runs.append(run)
+
+    summary = {}
+    for key in ("import_seconds", "init_seconds", "warm_up_seconds", "process_seconds"):
+        values = [run[key] for run in runs if run.get(key) is not None]
+        summary[key] = round(statistics.median(values), 3) if values else None
+    summary["startup_report"] = runs[-1]["startup_report"]
+    if "warm_up_error" in runs[-1]:
+        summary["warm_up_error"] = runs[-1]["warm_up_error"]
+
+    for key in ("import_seconds", "init_seconds", "warm_up_seconds", "process_seconds"):
+        print(f"{key:<18}{summary[key]}")
+    for stage, ms in summary["startup_report"]["stages_ms"].items():
+        print(f"  {stage:<56}{ms:>10} ms")
+    if "warm_up_error" in summary:
+        print(f"warm-up failed: {summary['warm_up_error']}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmarks embedding backends on CPU: single-query throughput (queries/sec),
+batch throughput (docs/sec) and fidelity against the PyTorch reference.
+
+Backends that cannot be loaded in this environment are reported and skipped.
+
+Usage:
+    python -m pipeline.export_onnx            # once, writes models/all-MiniLM-L6-v2
+    python -m benchmarks.bench_embedding_backends --queries 500
+"""
+import argparse
+import time
+
+import pandas as pd
+
+from config.config import EMBEDDING_MODEL_NAME, ONNX_MODEL_DIR
+from src.embedding_engine import embedding_factory
+from src.onnx_embeddings import fidelity_check
+
+
+def throughput(embedding, queries: list[str], documents: list[str]) -> tuple[float, float]:
+    embedding.embed_query("warm up")
+    start = time.perf_counter()
+    for query in queries:
+        embedding.embed_query(query)
+    qps = len(queries) / (time.perf_counter() - start)
+
+    start = time.perf_counter()
+    embedding.embed_documents(documents)
+    return qps, len(documents) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare torch and ONNX embedding backends.")
+    parser.add_argument("--csv", default="data/anime_with_synopsis_processed.csv")
+    parser.add_argument("--onnx-dir", default=ONNX_MODEL_DIR)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--documents", type=int, default=256)
+    args = parser.parse_args()
+
+    texts = pd.read_csv(args.csv)["combined_info"].dropna().astype(str).tolist()
+    documents = texts[:args.documents]
+    queries = [" ".join(text.split()[2:10]) for text in texts[:args.queries]]
+
+    backends = {
+        "torch": ("torch", False),
+        "onnx-fp32": ("onnx", False),
+        "onnx-int8": ("onnx", True),
+    }
+    models = {}
+    for name, (backend, quantized) in backends.items():
+        try:
+            models[name] = embedding_factory(backend, EMBEDDING_MODEL_NAME, args.onnx_dir, quantized)()
+        except Exception as e:
+            print(f"{name}: unavailable ({str(e).splitlines()[0]})")
+
+    print(f"{'backend':<12}{'queries/s':>12}{'docs/s':>12}{'mean cos':>12}{'min cos':>12}")
+    for name, model in models.items():
+        qps, dps = throughput(model, queries, documents)
+        if "torch" in models and name != "torch":
+            fidelity = fidelity_check(model, models["torch"], documents)
+            cosines = f"{fidelity['mean_cosine']:>12.5f}{fidelity['min_cosine']:>12.5f}"
+        else:
+            cosines = f"{'-':>12}{'-':>12}"
+        print(f"{name:<12}{qps:>12.1f}{dps:>12.1f}{cosines}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmarks BM25 lexical scoring latency and index size on the catalogue.
+
+Queries are drawn from titles and synopsis words so that most of them hit
+long posting lists, which is the slow path for scatter-add scoring.
+
+Usage:
+    python -m benchmarks.bench_lexical_index --csv data/anime_with_synopsis_processed.csv
+    python -m benchmarks.bench_lexical_index --scale 10
+"""
+import argparse
+import random
+import tempfile
+import time
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding
+
+from benchmarks.bench_retrieval_backends import scaled_csv
+from src.lexical_index import tokenize
+from src.vector_store import VectorStoreBuilder
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure BM25 query latency.")
+    parser.add_argument("--csv", default="data/anime_with_synopsis_processed.csv")
+    parser.add_argument("--scale", type=int, default=1, help="Repeat the catalogue this many times.")
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--k", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = scaled_csv(args.csv, args.scale, tmp)
+        # Only the chunking is used; the embedding is never called
+        builder = VectorStoreBuilder(csv_path=csv_path, persist_dir=tmp,
+                                     embedding=DeterministicFakeEmbedding(size=8))
+        start = time.perf_counter()
+        index = builder.build_lexical_index()
+        build_seconds = time.perf_counter() - start
+        size_bytes = sum(array.nbytes for array in (index._offsets, index._rows, index._weights))
+
+    rng = random.Random(0)
+    queries = []
+    for _ in range(args.queries):
+        document = rng.choice(index.documents)
+        words = tokenize(document.page_content)
+        if rng.random() < 0.5:
+            queries.append(f"something like {document.metadata.get('Name', '')}")
+        else:
+            start = rng.randrange(max(1, len(words) - 3))
+            queries.append(" ".join(words[start:start + 4]))
+
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        index.search(query, k=args.k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    print(f"documents:     {len(index.documents)}")
+    print(f"terms:         {len(index._term_ids)}")
+    print(f"postings size: {size_bytes / 1024:.1f} KiB")
+    print(f"build:         {build_seconds:.2f}s")
+    print(f"p50 latency:   {np.percentile(latencies, 50):.4f} ms")
+    print(f"p99 latency:   {np.percentile(latencies, 99):.4f} ms")
+
+
+if __name__ == "__main__":
+    main()
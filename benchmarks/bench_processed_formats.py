@@ -0,0 +1,96 @@
+"""
+Compares the processed dataset formats (CSV, Arrow IPC, Parquet) as the handoff
+between data loading and the index builds.
+
+Each format is written once from the same raw catalogue; reading is then
+measured in a fresh subprocess so that peak RSS is not shared. Two reads are
+timed: every document through ``VectorStoreBuilder.iter_documents``, as an
+index build does, and a metadata-only read of MAL_ID and Genres.
+
+Usage:
+    python -m benchmarks.bench_processed_formats --csv data/anime_with_synopsis.csv
+    python -m benchmarks.bench_processed_formats --scale 20
+"""
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from src.data_loader import AnimeDataloader, read_processed
+from src.vector_store import VectorStoreBuilder
+
+FORMATS = (".csv", ".arrow", ".parquet")
+
+
+def scaled_raw_csv(csv_path: str, scale: int, out_dir: str) -> str:
+    """Writes a copy of the raw CSV with every row repeated ``scale`` times under new MAL_IDs."""
+    if scale <= 1:
+        return csv_path
+    df = pd.read_csv(csv_path)
+    copies = []
+    for copy in range(scale):
+        part = df.copy()
+        part["MAL_ID"] = part["MAL_ID"] + copy * (int(df["MAL_ID"].max()) + 1)
+        copies.append(part)
+    path = os.path.join(out_dir, "raw.csv")
+    pd.concat(copies).to_csv(path, index=False)
+    return path
+
+
+def measure(path: str) -> dict:
+    """Runs inside the child process: reads one processed dataset."""
+    start = time.perf_counter()
+    count = sum(1 for _ in VectorStoreBuilder(csv_path=path, persist_dir="").iter_documents())
+    documents_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    read_processed(path, ["MAL_ID", "Genres"])
+    metadata_seconds = time.perf_counter() - start
+
+    return {
+        "format": os.path.splitext(path)[1].lstrip("."),
+        "documents": count,
+        "size_mb": round(os.path.getsize(path) / 2**20, 2),
+        "documents_seconds": round(documents_seconds, 4),
+        "metadata_seconds": round(metadata_seconds, 4),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare processed dataset formats.")
+    parser.add_argument("--csv", default="data/anime_with_synopsis.csv", help="Raw catalogue CSV.")
+    parser.add_argument("--scale", type=int, default=1, help="Repeat the catalogue this many times.")
+    parser.add_argument("--child", metavar="PATH", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.child)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_csv = scaled_raw_csv(args.csv, args.scale, tmp)
+        results = []
+        for extension in FORMATS:
+            start = time.perf_counter()
+            path = AnimeDataloader(raw_csv, os.path.join(tmp, f"processed{extension}")).load_and_process()
+            print(f"Wrote {extension} in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+            command = [sys.executable, "-m", "benchmarks.bench_processed_formats", "--child", path]
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'format':<10}{'docs':>10}{'size MB':>10}{'docs s':>10}{'meta s':>10}{'RSS MB':>10}")
+    for row in results:
+        print(f"{row['format']:<10}{row['documents']:>10}{row['size_mb']:>10}{row['documents_seconds']:>10}"
+              f"{row['metadata_seconds']:>10}{row['peak_rss_mb']:>10}")
+
+
+if __name__ == "__main__":
+    main()
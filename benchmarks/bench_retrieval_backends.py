@@ -0,0 +1,123 @@
+"""
+Benchmarks the Chroma and NumPy retrieval backends on the same catalogue.
+
+Both stores are built from identical embeddings; each backend is then measured
+in a fresh subprocess so that load time and peak RSS are not shared.
+
+Usage:
+    python -m benchmarks.bench_retrieval_backends --csv data/anime_with_synopsis_processed.csv
+    python -m benchmarks.bench_retrieval_backends --fake-embeddings --scale 100
+"""
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from src.vector_store import VectorStoreBuilder
+
+
+def make_embedding(fake: bool) -> Embeddings:
+    if fake:
+        return DeterministicFakeEmbedding(size=384)
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+
+
+def scaled_csv(csv_path: str, scale: int, out_dir: str) -> str:
+    """Writes a copy of the processed CSV with every row repeated ``scale`` times under new IDs."""
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    if scale <= 1:
+        return csv_path
+    copies = []
+    for copy in range(scale):
+        part = df.copy()
+        part["MAL_ID"] = part["MAL_ID"].astype(str) + f"-{copy}"
+        part["combined_info"] = part["combined_info"] + f" (copy {copy})"
+        copies.append(part)
+    path = f"{out_dir}/scaled.csv"
+    pd.concat(copies).to_csv(path, index=False)
+    return path
+
+
+def measure(backend: str, persist_dir: str, fake: bool, dtype: str, queries: int, k: int) -> dict:
+    """Runs inside the child process: loads one backend and times retrieval."""
+    embedding = make_embedding(fake)
+    start = time.perf_counter()
+    store = VectorStoreBuilder(csv_path="", persist_dir=persist_dir, embedding=embedding,
+                               backend=backend, dtype=dtype).load_vector_store()
+    # Chroma opens lazily; force the collection into memory with one query
+    store.similarity_search_by_vector(embedding.embed_query("warm up"), k=k)
+    load_seconds = time.perf_counter() - start
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((queries, len(embedding.embed_query("x")))).astype(np.float32).tolist()
+    latencies = []
+    for vector in vectors:
+        start = time.perf_counter()
+        store.similarity_search_by_vector(vector, k=k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "backend": backend if backend == "chroma" else f"numpy-{dtype}",
+        "load_seconds": round(load_seconds, 4),
+        "p50_ms": round(float(np.percentile(latencies, 50)), 4),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 4),
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare Chroma and NumPy retrieval backends.")
+    parser.add_argument("--csv", default="data/anime_with_synopsis_processed.csv")
+    parser.add_argument("--scale", type=int, default=1, help="Repeat the catalogue this many times.")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--fake-embeddings", action="store_true",
+                        help="Use deterministic fake embeddings instead of MiniLM (no model download).")
+    parser.add_argument("--child", nargs=3, metavar=("BACKEND", "DIR", "DTYPE"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        backend, persist_dir, dtype = args.child
+        print(json.dumps(measure(backend, persist_dir, args.fake_embeddings, dtype, args.queries, args.k)))
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = scaled_csv(args.csv, args.scale, tmp)
+        embedding = make_embedding(args.fake_embeddings)
+
+        runs = [("chroma", f"{tmp}/chroma", "float32"),
+                ("numpy", f"{tmp}/numpy32", "float32"),
+                ("numpy", f"{tmp}/numpy16", "float16")]
+        for backend, persist_dir, dtype in runs:
+            start = time.perf_counter()
+            VectorStoreBuilder(csv_path=csv_path, persist_dir=persist_dir, embedding=embedding,
+                               cache_dir=f"{tmp}/embedding_cache", backend=backend,
+                               dtype=dtype).build_and_save_vectorstore()
+            print(f"Built {backend}/{dtype} in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+
+        results = []
+        for backend, persist_dir, dtype in runs:
+            command = [sys.executable, "-m", "benchmarks.bench_retrieval_backends",
+                       "--queries", str(args.queries), "--k", str(args.k),
+                       "--child", backend, persist_dir, dtype]
+            if args.fake_embeddings:
+                command.append("--fake-embeddings")
+            output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"{'backend':<16}{'load s':>10}{'p50 ms':>10}{'p99 ms':>10}{'RSS MB':>10}")
+    for row in results:
+        print(f"{row['backend']:<16}{row['load_seconds']:>10}{row['p50_ms']:>10}{row['p99_ms']:>10}{row['peak_rss_mb']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,242 @@
+"""
+Offline end-to-end benchmark suite: build, retrieval and concurrent
+``recommend`` latency on the bundled catalogue and scaled copies of it.
+
+Every scale runs in a fresh subprocess so peak RSS is per scale. The real
+VectorStoreBuilder and AnimeRecommendationPipeline are used; only the LLM is
+replaced by the deterministic FakeChatModel with a configurable latency, so no
+Groq key or network is needed. Results are written as JSON keyed by commit,
+and ``--compare`` prints the change against an earlier results file.
+
+Usage:
+    python -m benchmarks.bench_suite --fake-embeddings
+    python -m benchmarks.bench_suite --scales 1 10 100 --concurrency 16 --llm-latency-ms 300
+    python -m benchmarks.bench_suite --fake-embeddings --compare bench_results/abc1234.json
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from benchmarks.bench_processed_formats import scaled_raw_csv
+from benchmarks.bench_retrieval_backends import make_embedding
+
+# Metrics compared by --compare, with True where higher is better
+COMPARED_METRICS = {
+    "build_docs_per_second": True,
+    "retrieval_p50_ms": False,
+    "retrieval_p99_ms": False,
+    "recommend_p50_ms": False,
+    "recommend_p99_ms": False,
+    "recommend_per_second": True,
+    "peak_rss_mb": False,
+}
+
+QUERY_TEMPLATES = (
+    "{genre} anime with a great story",
+    "recommend {genre} and {other} shows",
+    "something about {word} in a {genre} setting",
+    "anime similar to {name}",
+)
+
+
+def make_queries(processed_path: str, count: int, seed: int) -> list[str]:
+    """Builds distinct, deterministic queries from catalogue titles, genres and synopsis words."""
+    from src.data_loader import read_processed
+
+    frame = read_processed(processed_path, ["Name", "Genres", "combined_info"])
+    rng = random.Random(seed)
+    queries = []
+    for index in range(count):
+        row = frame.iloc[rng.randrange(len(frame))]
+        genres = list(row["Genres"]) or ["Action"]
+        words = [word for word in str(row["combined_info"]).split() if len(word) > 5] or ["adventure"]
+        template = QUERY_TEMPLATES[index % len(QUERY_TEMPLATES)]
+        query = template.format(genre=rng.choice(genres), other=rng.choice(genres),
+                                word=rng.choice(words).strip(".,!?\"'").lower(), name=row["Name"])
+        # A distinct suffix keeps every query out of the caches
+        queries.append(f"{query} #{index}")
+    return queries
+
+
+def percentiles(latencies_ms: list[float]) -> tuple[float, float]:
+    return round(float(np.percentile(latencies_ms, 50)), 3), round(float(np.percentile(latencies_ms, 99)), 3)
+
+
+def measure(raw_csv: str, work_dir: str, args: argparse.Namespace) -> dict:
+    """Runs inside the child process: builds, retrieves and serves one scale."""
+    from benchmarks.fake_llm import FakeChatModel
+    from config.config import HYBRID_FETCH_K, HYBRID_RETRIEVAL, NEIGHBOR_TOP_N, RETRIEVER_K, RRF_K, VECTOR_DTYPE
+    from pipeline.pipeline import AnimeRecommendationPipeline
+    from src.data_loader import AnimeDataloader, read_processed
+    from src.query_cache import TTLCache
+    from src.vector_store import VectorStoreBuilder
+
+    embedding = make_embedding(args.fake_embeddings)
+    result: dict = {}
+
+    start = time.perf_counter()
+    processed = AnimeDataloader(raw_csv, os.path.join(work_dir, "processed.arrow")).load_and_process()
+    result["load_seconds"] = round(time.perf_counter() - start, 3)
+    result["documents"] = len(read_processed(processed, ["MAL_ID"]))
+
+    persist_dir = os.path.join(work_dir, "index")
+    builder = VectorStoreBuilder(csv_path=processed, persist_dir=persist_dir, embedding=embedding,
+                                 backend=args.backend, dtype=VECTOR_DTYPE)
+    start = time.perf_counter()
+    builder.build_and_save_vectorstore(incremental=False)
+    build_seconds = time.perf_counter() - start
+    result["build_seconds"] = round(build_seconds, 3)
+    result["build_docs_per_second"] = round(result["documents"] / build_seconds, 1)
+
+    start = time.perf_counter()
+    builder.build_lexical_index()
+    result["lexical_index_seconds"] = round(time.perf_counter() - start, 3)
+    start = time.perf_counter()
+    builder.build_neighbor_table(top_n=NEIGHBOR_TOP_N)
+    result["neighbor_table_seconds"] = round(time.perf_counter() - start, 3)
+
+    queries = make_queries(processed, args.queries, seed=0)
+    retriever = builder.load_retriever(
+        k=RETRIEVER_K,
+        embedding_cache=TTLCache(max_size=len(queries)),
+        retrieval_cache=TTLCache(max_size=len(queries)),
+        hybrid=HYBRID_RETRIEVAL,
+        fetch_k=HYBRID_FETCH_K,
+        rrf_k=RRF_K
+    )
+    retriever.invoke("warm up")
+    latencies = []
+    for query in queries:
+        start = time.perf_counter()
+        retriever.invoke(query)
+        latencies.append((time.perf_counter() - start) * 1000)
+    result["retrieval_p50_ms"], result["retrieval_p99_ms"] = percentiles(latencies)
+
+    pipeline = AnimeRecommendationPipeline(
+        persist_dir=persist_dir,
+        llm=FakeChatModel(latency_seconds=args.llm_latency_ms / 1000),
+        embedding=embedding
+    )
+    pipeline.warm_up()
+
+    def timed_recommend(query: str) -> float:
+        start = time.perf_counter()
+        pipeline.recommend(query)
+        return (time.perf_counter() - start) * 1000
+
+    requests = make_queries(processed, args.requests, seed=1)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        latencies = list(executor.map(timed_recommend, requests))
+    wall_seconds = time.perf_counter() - start
+    result["recommend_p50_ms"], result["recommend_p99_ms"] = percentiles(latencies)
+    result["recommend_per_second"] = round(len(requests) / wall_seconds, 2)
+
+    result["peak_rss_mb"] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(results: list[dict], baseline_path: str) -> None:
+    """Prints the relative change of each compared metric against a baseline results file."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    previous = {row["scale"]: row for row in baseline["results"]}
+    print(f"\nChange against {baseline_path} (commit {baseline.get('commit')}); + is better:")
+    for row in results:
+        base = previous.get(row["scale"])
+        if base is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = base.get(metric), row.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * (1 if higher_is_better else -1) * 100
+            print(f"  {row['scale']:>4}x {metric:<24}{old:>12} -> {new:<12}{change:+.1f}%")
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Offline build, retrieval and load benchmarks.")
+    parser.add_argument("--csv", default="data/anime_with_synopsis.csv", help="Raw catalogue CSV.")
+    parser.add_argument("--scales", type=int, nargs="+", default=[1, 10, 100],
+                        help="Catalogue copies per run.")
+    parser.add_argument("--backend", choices=("chroma", "numpy"), default=os.getenv("VECTOR_BACKEND", "chroma"))
+    parser.add_argument("--queries", type=int, default=200, help="Retrieval queries per scale.")
+    parser.add_argument("--requests", type=int, default=200, help="recommend() calls per scale.")
+    parser.add_argument("--concurrency", type=int, default=8, help="Threads calling recommend().")
+    parser.add_argument("--llm-latency-ms", type=float, default=200.0, help="Latency of the fake chat model.")
+    parser.add_argument("--fake-embeddings", action="store_true",
+                        help="Use deterministic fake embeddings instead of MiniLM (no model download).")
+    parser.add_argument("--output", help="Results file. Defaults to bench_results/<commit>.json.")
+    parser.add_argument("--compare", metavar="BASELINE", help="Earlier results file to compare against.")
+    parser.add_argument("--child", nargs=2, metavar=("RAW_CSV", "WORK_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        print(json.dumps(measure(args.child[0], args.child[1], args)))
+        return
+
+    commit = git_commit()
+    # Caches that would hide the measured paths are disabled in the children
+    env = dict(os.environ, VECTOR_BACKEND=args.backend, RESPONSE_CACHE_PATH="", SEMANTIC_CACHE_ENABLED="false")
+    child_flags = ["--backend", args.backend, "--queries", str(args.queries), "--requests", str(args.requests),
+                   "--concurrency", str(args.concurrency), "--llm-latency-ms", str(args.llm_latency_ms)]
+    if args.fake_embeddings:
+        child_flags.append("--fake-embeddings")
+
+    results = []
+    for scale in args.scales:
+        with tempfile.TemporaryDirectory() as tmp:
+            raw_csv = scaled_raw_csv(args.csv, scale, tmp)
+            command = [sys.executable, "-m", "benchmarks.bench_suite", *child_flags, "--child", raw_csv, tmp]
+            start = time.perf_counter()
+            output = subprocess.run(command, check=True, capture_output=True, text=True, env=env).stdout
+            row = {"scale": scale, **json.loads(output.strip().splitlines()[-1])}
+            print(f"Scale {scale}x finished in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+            results.append(row)
+
+    columns = ["scale", "documents", "build_docs_per_second", "retrieval_p50_ms", "retrieval_p99_ms",
+               "recommend_p50_ms", "recommend_p99_ms", "recommend_per_second", "peak_rss_mb"]
+    print(" ".join(f"{column:>{len(column)}}" for column in columns))
+    for row in results:
+        print(" ".join(f"{row[column]:>{len(column)}}" for column in columns))
+
+    output_path = args.output or os.path.join("bench_results", f"{commit}.json")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": commit,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "settings": {key: value for key, value in vars(args).items() if key not in ("child", "output", "compare")},
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {output_path}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+"""
+Offline retrieval evaluation: recall@k against exact ground truth next to query
+latency and index size, swept over index and retriever settings.
+
+Queries are generated from the titles and genres of the raw catalogue. The
+ground truth for each query is the exact top-k titles by cosine similarity of
+whole, unchunked documents under the reference embedding model, found by brute
+force. Every configuration is then built with the real VectorStoreBuilder and
+queried through the vector store directly (no caches or inferred filters), so
+recall only reflects what chunking, the storage backend, HNSW parameters, the
+embedding backend and ``k`` lose. Retrieved chunks count once per title.
+
+Swept settings:
+    chunking          "whole" keeps each row in one chunk (the default blank-line
+                      separator); a number splits rows at spaces into chunks of
+                      at most that many characters.
+    backend           chroma (HNSW), numpy (exact, float32) or numpy-float16.
+    HNSW              M, construction_ef and search_ef, chroma only.
+    embedding backend torch, onnx-fp32, onnx-int8; the first one is the reference.
+    k                 results per query.
+
+A configuration is marked Pareto-optimal when no other configuration at the
+same k is at least as good on recall, p50 query latency and index size and
+better on one of them.
+
+With --fake-embeddings every text gets a random vector, so only the backend and
+HNSW comparisons are meaningful; chunked configurations score near zero.
+
+Usage:
+    python -m benchmarks.eval_retrieval --fake-embeddings
+    python -m benchmarks.eval_retrieval --chunkings whole 500 --ks 4 10 --hnsw-search-ef 10 50 100
+    python -m benchmarks.eval_retrieval --embedding-backends torch onnx-int8 --backends chroma numpy
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+from langchain_core.embeddings import DeterministicFakeEmbedding, Embeddings
+
+from benchmarks.bench_suite import git_commit, percentiles
+from config.config import CHUNK_OVERLAP, EMBEDDING_MODEL_NAME, ONNX_MODEL_DIR
+from src.data_loader import AnimeDataloader, read_processed
+from src.embedding_cache import CachedEmbeddings, EmbeddingCache
+from src.embedding_engine import embedding_factory
+from src.retrieval_eval import exact_neighbors, pareto_front, recall_at_k
+from src.vector_store import VectorStoreBuilder, hnsw_metadata
+
+EMBEDDING_BACKENDS = {
+    "torch": ("torch", False),
+    "onnx-fp32": ("onnx", False),
+    "onnx-int8": ("onnx", True),
+}
+
+QUERY_TEMPLATES = (
+    "anime like {name}",
+    "{genre} anime",
+    "{genre} and {other} anime",
+    "{name} but more {genre}",
+)
+
+COLUMNS = ("config", "k", "recall", "query_p50_ms", "query_p99_ms", "index_mb", "build_seconds")
+
+
+class UnitFakeEmbedding(DeterministicFakeEmbedding):
+    """Fake embeddings scaled to unit length like MiniLM's, so Chroma's L2 ranking matches cosine."""
+
+    def _get_embedding(self, seed: int) -> list[float]:
+        vector = np.asarray(super()._get_embedding(seed))
+        return (vector / np.linalg.norm(vector)).tolist()
+
+
+def make_eval_queries(frame, count: int, seed: int) -> list[str]:
+    """Builds distinct, deterministic queries from catalogue titles and genres."""
+    rng = random.Random(seed)
+    queries: dict[str, None] = {}
+    for attempt in range(count * 20):
+        if len(queries) == count:
+            break
+        row = frame.iloc[rng.randrange(len(frame))]
+        genres = list(row["Genres"]) or ["Action"]
+        template = QUERY_TEMPLATES[attempt % len(QUERY_TEMPLATES)]
+        queries[template.format(name=row["Name"], genre=rng.choice(genres), other=rng.choice(genres))] = None
+    return list(queries)
+
+
+def load_embeddings(names: list[str], fake: bool, onnx_dir: str, cache_dir: str) -> dict[str, Embeddings]:
+    """Creates each embedding backend behind its own embedding cache, skipping unavailable ones."""
+    if fake:
+        return {"fake": UnitFakeEmbedding(size=384)}
+    models = {}
+    for name in names:
+        backend, quantized = EMBEDDING_BACKENDS[name]
+        try:
+            model = embedding_factory(backend, EMBEDDING_MODEL_NAME, onnx_dir, quantized)()
+        except Exception as e:
+            print(f"{name}: unavailable ({str(e).splitlines()[0]})", file=sys.stderr)
+            continue
+        # Configurations sharing a chunking embed each chunk only once
+        models[name] = CachedEmbeddings(model, EmbeddingCache(os.path.join(cache_dir, name)), model_name=name)
+    return models
+
+
+def directory_size_mb(path: str) -> float:
+    total = sum(
+        os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+    )
+    return round(total / 2**20, 3)
+
+
+def configurations(args: argparse.Namespace) -> list[dict]:
+    """Expands the swept index settings; HNSW settings only multiply the chroma backend."""
+    hnsw_grid = list(itertools.product(args.hnsw_m, args.hnsw_construction_ef, args.hnsw_search_ef))
+    configs = []
+    for chunking, backend in itertools.product(args.chunkings, args.backends):
+        for m, construction_ef, search_ef in (hnsw_grid if backend == "chroma" else [(None, None, None)]):
+            name = f"chunk={chunking} {backend}"
+            if backend == "chroma":
+                name += f" M={m} cef={construction_ef} ef={search_ef}"
+            configs.append({
+                "name": name,
+                "chunking": chunking,
+                "backend": backend,
+                "hnsw": hnsw_metadata(m, construction_ef, search_ef),
+            })
+    return configs
+
+
+def evaluate(
+    processed: str,
+    config: dict,
+    embedding_name: str,
+    embedding: Embeddings,
+    queries: list[str],
+    query_vectors: list[list[float]],
+    embed_ms: list[float],
+    truth: list[list[int]],
+    args: argparse.Namespace,
+    work_dir: str
+) -> list[dict]:
+    """Builds one configuration and measures it at every k."""
+    whole = config["chunking"] == "whole"
+    persist_dir = tempfile.mkdtemp(dir=work_dir)
+    builder = VectorStoreBuilder(
+        csv_path=processed,
+        persist_dir=persist_dir,
+        embedding=embedding,
+        backend="chroma" if config["backend"] == "chroma" else "numpy",
+        dtype="float16" if config["backend"] == "numpy-float16" else "float32",
+        chunk_size=1000 if whole else int(config["chunking"]),
+        chunk_overlap=CHUNK_OVERLAP,
+        chunk_separator="\n\n" if whole else " ",
+        collection_metadata=config["hnsw"]
+    )
+    start = time.perf_counter()
+    builder.build_and_save_vectorstore(incremental=False)
+    build_seconds = round(time.perf_counter() - start, 3)
+    store = builder.load_vector_store()
+    store.similarity_search_by_vector(query_vectors[0], k=max(args.ks))
+
+    rows = []
+    for k in args.ks:
+        recalls, latencies = [], []
+        for vector, embed_latency, expected in zip(query_vectors, embed_ms, truth):
+            start = time.perf_counter()
+            documents = store.similarity_search_by_vector(vector, k=k)
+            latencies.append(embed_latency + (time.perf_counter() - start) * 1000)
+            titles = list(dict.fromkeys(document.metadata["MAL_ID"] for document in documents))
+            recalls.append(recall_at_k(titles, expected, k))
+        p50, p99 = percentiles(latencies)
+        rows.append({
+            "config": f"{config['name']} emb={embedding_name}",
+            "chunking": config["chunking"],
+            "backend": config["backend"],
+            "hnsw": config["hnsw"],
+            "embedding": embedding_name,
+            "k": k,
+            "recall": round(float(np.mean(recalls)), 4),
+            "query_p50_ms": p50,
+            "query_p99_ms": p99,
+            "index_mb": directory_size_mb(persist_dir),
+            "build_seconds": build_seconds,
+        })
+    print(f"Evaluated {rows[0]['config']} over {len(queries)} queries", file=sys.stderr)
+    return rows
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Trade retrieval recall against latency and index size.")
+    parser.add_argument("--csv", default="data/anime_with_synopsis.csv", help="Raw catalogue CSV.")
+    parser.add_argument("--queries", type=int, default=200, help="Generated evaluation queries.")
+    parser.add_argument("--ks", type=int, nargs="+", default=[4, 10], help="Results per query.")
+    parser.add_argument("--chunkings", nargs="+", default=["whole", "500", "250"],
+                        help='"whole" rows, or a maximum chunk size in characters.')
+    parser.add_argument("--backends", nargs="+", choices=("chroma", "numpy", "numpy-float16"),
+                        default=["chroma", "numpy", "numpy-float16"])
+    parser.add_argument("--hnsw-m", type=int, nargs="+", default=[16])
+    parser.add_argument("--hnsw-construction-ef", type=int, nargs="+", default=[100])
+    parser.add_argument("--hnsw-search-ef", type=int, nargs="+", default=[10, 100])
+    parser.add_argument("--embedding-backends", nargs="+", choices=tuple(EMBEDDING_BACKENDS), default=["torch"],
+                        help="Embedding backends to compare; the first is the ground-truth reference.")
+    parser.add_argument("--onnx-dir", default=ONNX_MODEL_DIR)
+    parser.add_argument("--fake-embeddings", action="store_true",
+                        help="Use deterministic fake embeddings instead of MiniLM (no model download).")
+    parser.add_argument("--output", help="Results file. Defaults to bench_results/retrieval_<commit>.json.")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        processed = AnimeDataloader(args.csv, os.path.join(tmp, "processed.arrow")).load_and_process()
+        queries = make_eval_queries(read_processed(processed, ["Name", "Genres"]), args.queries, seed=0)
+        models = load_embeddings(args.embedding_backends, args.fake_embeddings, args.onnx_dir,
+                                 os.path.join(tmp, "embedding_cache"))
+        if not models:
+            parser.error("No embedding backend could be loaded.")
+
+        # Ground truth: exact neighbors of whole documents under the reference model
+        titles = {}
+        for document in VectorStoreBuilder(csv_path=processed, persist_dir=tmp).iter_documents():
+            titles.setdefault(document.metadata["MAL_ID"], document.page_content)
+        reference_name, reference = next(iter(models.items()))
+        neighbors = exact_neighbors(
+            np.asarray(reference.embed_documents(queries)),
+            np.asarray(reference.embed_documents(list(titles.values()))),
+            k=max(args.ks)
+        )
+        ids = list(titles)
+        truth = [[ids[row] for row in query_neighbors] for query_neighbors in neighbors]
+        print(f"Ground truth for {len(queries)} queries over {len(ids)} titles ({reference_name})", file=sys.stderr)
+
+        results = []
+        for name, embedding in models.items():
+            query_vectors, embed_ms = [], []
+            embedding.embed_query("warm up")
+            for query in queries:
+                start = time.perf_counter()
+                query_vectors.append(embedding.embed_query(query))
+                embed_ms.append((time.perf_counter() - start) * 1000)
+            for config in configurations(args):
+                results.extend(evaluate(processed, config, name, embedding, queries, query_vectors,
+                                        embed_ms, truth, args, tmp))
+
+    for k in args.ks:
+        rows = [row for row in results if row["k"] == k]
+        for row, optimal in zip(rows, pareto_front(rows, maximize=["recall"], minimize=["query_p50_ms", "index_mb"])):
+            row["pareto"] = optimal
+
+    width = max(len(row["config"]) for row in results)
+    print(f"{'':2}{'config':<{width}}" + "".join(f"{column:>15}" for column in COLUMNS[1:]))
+    for row in sorted(results, key=lambda row: (row["k"], -row["recall"], row["query_p50_ms"])):
+        print(f"{'*' if row['pareto'] else '':2}{row['config']:<{width}}"
+              + "".join(f"{row[column]:>15}" for column in COLUMNS[1:]))
+    print("* Pareto-optimal at its k: no other configuration matches it on recall, p50 latency and index size and beats it on one.")
+
+    commit = git_commit()
+    output_path = args.output or os.path.join("bench_results", f"retrieval_{commit}.json")
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "commit": commit,
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "queries": len(queries),
+            "reference": reference_name,
+            "settings": {key: value for key, value in vars(args).items() if key != "output"},
+            "results": results,
+        }, f, indent=2)
+    print(f"Results written to {output_path}")
+
+
+if __name__ == "__main__":
+    main()
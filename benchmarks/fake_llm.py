@@ -0,0 +1,72 @@
+"""
+Deterministic local stand-in for ChatGroq, used by the offline benchmarks.
+
+The model waits a configurable latency, then answers with the first titles
+found in the prompt's context. Token usage is reported like Groq's, estimated
+at four characters per token, so token metrics stay populated.
+"""
+import asyncio
+import re
+import time
+from typing import Any, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+
+from src.context_builder import approximate_token_count
+
+TITLE_PATTERN = re.compile(r"Title: (.+?) \.\.")
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Chat model answering instantly-computed recommendations after a fixed delay.
+
+    Attributes:
+        latency_seconds (float): Simulated time to the full answer.
+        max_titles (int): Titles listed in the answer.
+    """
+
+    latency_seconds: float = 0.2
+    max_titles: int = 3
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def _answer(self, messages: list[BaseMessage]) -> ChatResult:
+        prompt = "\n".join(str(message.content) for message in messages)
+        titles = list(dict.fromkeys(TITLE_PATTERN.findall(prompt)))[:self.max_titles]
+        text = "\n".join(
+            f"{rank}. {title}: matches the requested themes." for rank, title in enumerate(titles, start=1)
+        ) or "I could not find a matching anime."
+        usage = {
+            "prompt_tokens": approximate_token_count(prompt),
+            "completion_tokens": approximate_token_count(text),
+        }
+        return ChatResult(
+            generations=[ChatGeneration(message=AIMessage(content=text))],
+            llm_output={"token_usage": usage, "model_name": self._llm_type}
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        time.sleep(self.latency_seconds)
+        return self._answer(messages)
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: Optional[list[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any
+    ) -> ChatResult:
+        await asyncio.sleep(self.latency_seconds)
+        return self._answer(messages)
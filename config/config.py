@@ -3,4 +3,96 @@ from dotenv import load_dotenv
 
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-MODEL_NAME = "llama-3.1-8b-instant"
\ No newline at end of file
+MODEL_NAME = "llama-3.1-8b-instant"
+
+# Embedding model and build-time embedding engine settings
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+# Embedding runtime for build and query: "torch" (sentence-transformers) or "onnx"
+# (export with `python -m pipeline.export_onnx`); the int8 model is used if ONNX_QUANTIZED
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+ONNX_MODEL_DIR = os.getenv("ONNX_MODEL_DIR", "models/all-MiniLM-L6-v2")
+ONNX_QUANTIZED = os.getenv("ONNX_QUANTIZED", "true").lower() == "true"
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", "64"))
+EMBED_NUM_WORKERS = int(os.getenv("EMBED_NUM_WORKERS", str(os.cpu_count() or 1)))
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", ".embedding_cache")
+EMBEDDING_CACHE_MAX_ENTRIES = int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "200000"))
+# Handoff between data loading and index builds; .arrow/.feather and .parquet are columnar and memory-mapped
+PROCESSED_DATA_PATH = os.getenv("PROCESSED_DATA_PATH", "data/anime_with_synopsis_processed.arrow")
+# Streaming build: read the raw CSV in chunks and index them without writing the processed CSV.
+# Bounds memory for the vector store step only; the lexical index and neighbor table hold all rows
+STREAMING_BUILD = os.getenv("STREAMING_BUILD", "false").lower() == "true"
+DATA_CHUNK_SIZE = int(os.getenv("DATA_CHUNK_SIZE", "5000"))
+
+# Vector store backend: "chroma" or "numpy" (brute-force, memory-mapped), and numpy storage dtype
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+VECTOR_DTYPE = os.getenv("VECTOR_DTYPE", "float32")
+
+# Chunking and Chroma HNSW parameters; compare settings with `python -m benchmarks.eval_retrieval`
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", "1000"))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", "40"))
+# The default splits at blank lines only, so catalogue rows stay whole; " " splits them by CHUNK_SIZE
+CHUNK_SEPARATOR = os.getenv("CHUNK_SEPARATOR", "\n\n")
+# Unset HNSW parameters keep Chroma's defaults; they apply when a collection is created
+CHROMA_HNSW_M = int(os.getenv("CHROMA_HNSW_M", "0")) or None
+CHROMA_HNSW_CONSTRUCTION_EF = int(os.getenv("CHROMA_HNSW_CONSTRUCTION_EF", "0")) or None
+CHROMA_HNSW_SEARCH_EF = int(os.getenv("CHROMA_HNSW_SEARCH_EF", "0")) or None
+
+# Query-time caches in AnimeRecommendationPipeline
+RETRIEVER_K = int(os.getenv("RETRIEVER_K", "4"))
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))
+# Infer genre and score pre-filters from query text ("highly rated sci-fi"); one-word genres
+# need genre context ("music anime", not "great music"); negated and either/or queries are
+# never filtered
+INFER_QUERY_FILTERS = os.getenv("INFER_QUERY_FILTERS", "true").lower() == "true"
+
+# Hybrid retrieval: fuse BM25 and embedding rankings with reciprocal-rank fusion
+HYBRID_RETRIEVAL = os.getenv("HYBRID_RETRIEVAL", "true").lower() == "true"
+HYBRID_FETCH_K = int(os.getenv("HYBRID_FETCH_K", "20"))
+RRF_K = int(os.getenv("RRF_K", "60"))
+
+# Optional cross-encoder re-ranking of RERANK_CANDIDATES retrieved documents down to RETRIEVER_K
+RERANK_ENABLED = os.getenv("RERANK_ENABLED", "false").lower() == "true"
+RERANKER_MODEL_NAME = os.getenv("RERANKER_MODEL_NAME", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_CANDIDATES = int(os.getenv("RERANK_CANDIDATES", "20"))
+RERANK_BATCH_SIZE = int(os.getenv("RERANK_BATCH_SIZE", "16"))
+RERANK_MAX_LATENCY_MS = float(os.getenv("RERANK_MAX_LATENCY_MS", "250"))
+
+# Prompt context budget; tokens are estimated at four characters per token
+CONTEXT_MAX_TOKENS = int(os.getenv("CONTEXT_MAX_TOKENS", "1500"))
+CONTEXT_MAX_TOKENS_PER_TITLE = int(os.getenv("CONTEXT_MAX_TOKENS_PER_TITLE", "350"))
+
+# "More like this" fast path: precomputed neighbors per title and fuzzy title matching
+NEIGHBOR_TOP_N = int(os.getenv("NEIGHBOR_TOP_N", "20"))
+TITLE_MATCH_THRESHOLD = float(os.getenv("TITLE_MATCH_THRESHOLD", "0.6"))
+
+# Versioned index directories: seconds between checks for a newly published index, versions kept on disk
+INDEX_POLL_SECONDS = float(os.getenv("INDEX_POLL_SECONDS", "5"))
+INDEX_KEEP_VERSIONS = int(os.getenv("INDEX_KEEP_VERSIONS", "3"))
+
+# Full-response cache in front of the LLM (empty path keeps it in memory only)
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", ".cache/responses.sqlite3")
+RESPONSE_CACHE_MEMORY_SIZE = int(os.getenv("RESPONSE_CACHE_MEMORY_SIZE", "256"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "10000"))
+
+# Semantic answer cache matching paraphrased queries by embedding similarity. Off by
+# default: it answers a different query with a cached answer, and queries differing
+# only in a negation or a genre can clear the threshold; evaluate before enabling
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "false").lower() == "true"
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "1000"))
+
+# Maximum number of concurrent LLM calls made by the async pipeline API
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", "8"))
+
+# Offline batch recommendations (pipeline/batch_pipeline.py): queries retrieved together per wave
+# (capped at QUERY_CACHE_SIZE), concurrent LLM calls, LLM calls per second (0 disables the limit), retries
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", "256"))
+BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "4"))
+BATCH_REQUESTS_PER_SECOND = float(os.getenv("BATCH_REQUESTS_PER_SECOND", "1"))
+BATCH_MAX_RETRIES = int(os.getenv("BATCH_MAX_RETRIES", "3"))
+
+# HTTP API server (app/server.py)
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "8"))
+SERVER_QUEUE_SIZE = int(os.getenv("SERVER_QUEUE_SIZE", "64"))
+SERVER_REQUEST_TIMEOUT_SECONDS = float(os.getenv("SERVER_REQUEST_TIMEOUT_SECONDS", "60"))
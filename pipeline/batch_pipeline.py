@@ -0,0 +1,212 @@
+import argparse
+import json
+import os
+from typing import Iterator
+
+from dotenv import load_dotenv
+
+from pipeline.pipeline import AnimeRecommendationPipeline
+from config.config import (
+    BATCH_SIZE,
+    BATCH_MAX_WORKERS,
+    BATCH_REQUESTS_PER_SECOND,
+    BATCH_MAX_RETRIES,
+)
+from utils.logger import get_logger
+from utils.custom_exception import CustomException
+
+load_dotenv()
+logger = get_logger(__name__)
+
+
+def read_queries(path: str) -> Iterator[tuple[str, str]]:
+    """
+    Lazily reads queries from a text file (one query per line) or a JSONL file
+    of ``{"id": ..., "query": ...}`` objects. Blank lines are skipped.
+
+    Args:
+        path (str): Input file; ``.jsonl`` files are parsed as JSON lines.
+
+    Yields:
+        tuple[str, str]: Query ID and query. IDs default to the 1-based line number.
+    """
+    is_jsonl = path.endswith(".jsonl")
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            if is_jsonl:
+                record = json.loads(line)
+                yield str(record.get("id", line_number)), str(record.get("query", ""))
+            else:
+                yield str(line_number), line.strip()
+
+
+def completed_ids(output_path: str) -> set[str]:
+    """
+    Returns the IDs already answered in an output file, so a restarted job can
+    resume.
+
+    The file is compacted to its answered records first: error lines, which
+    are retried, and a trailing line cut off by a crash are dropped, so every
+    ID appears at most once once the job finishes. The compacted file replaces
+    the old one atomically.
+
+    Args:
+        output_path (str): JSONL output of an earlier run.
+
+    Returns:
+        set[str]: IDs with a recommendation.
+    """
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, encoding="utf-8") as f:
+        lines = f.read().split("\n")
+
+    # The part after the last newline is empty, or a line the crash cut off
+    done, kept = set(), []
+    for line in lines[:-1]:
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        query_id = str(record.get("id"))
+        if "recommendation" in record and query_id not in done:
+            done.add(query_id)
+            kept.append(line)
+
+    dropped = len(lines) - len(kept) - (0 if lines[-1] else 1)
+    if dropped:
+        logger.warning("Dropping %d failed or incomplete lines from %s before resuming.", dropped, output_path)
+        with open(output_path + ".tmp", "w", encoding="utf-8") as f:
+            f.writelines(line + "\n" for line in kept)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(output_path + ".tmp", output_path)
+    return done
+
+
+def main(
+    input_path: str,
+    output_path: str,
+    persist_dir: str = "chroma_db",
+    batch_size: int = BATCH_SIZE,
+    max_workers: int = BATCH_MAX_WORKERS,
+    requests_per_second: float = BATCH_REQUESTS_PER_SECOND,
+    max_retries: int = BATCH_MAX_RETRIES,
+    overwrite: bool = False
+) -> dict:
+    """
+    Entry point for offline batch recommendations, e.g. for newsletter or
+    home-page shelves.
+
+    Queries are read from ``input_path`` and answered with
+    ``AnimeRecommendationPipeline.recommend_batch``. Every result is appended
+    to ``output_path`` as one JSON line as soon as it is ready, so the output
+    doubles as the checkpoint: a rerun skips IDs that already have a
+    recommendation and retries the ones that failed, replacing their error
+    lines, so each ID appears once in the output.
+
+    Args:
+        input_path (str): Text file with one query per line, or JSONL with id and query.
+        output_path (str): JSONL output and checkpoint file.
+        persist_dir (str, optional): Root of the versioned indexes.
+        batch_size (int, optional): Queries retrieved together.
+        max_workers (int, optional): Concurrent LLM calls.
+        requests_per_second (float, optional): LLM calls started per second; 0 disables the limit.
+        max_retries (int, optional): Retries of a failed LLM call.
+        overwrite (bool, optional): Start over instead of resuming. Defaults to False.
+
+    Returns:
+        dict: Counts of skipped, answered and failed queries.
+
+    Raises:
+        CustomException: If the job cannot run.
+    """
+    try:
+        if overwrite and os.path.exists(output_path):
+            os.remove(output_path)
+        done = completed_ids(output_path)
+        if done:
+            logger.info("Resuming: %d queries already answered in %s.", len(done), output_path)
+
+        pipeline = AnimeRecommendationPipeline(persist_dir=persist_dir)
+        pending = ((query_id, query) for query_id, query in read_queries(input_path) if query_id not in done)
+
+        counts = {"skipped": len(done), "answered": 0, "failed": 0}
+        os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+        with open(output_path, "a", encoding="utf-8") as out:
+            for record in pipeline.recommend_batch(
+                pending,
+                batch_size=batch_size,
+                max_workers=max_workers,
+                requests_per_second=requests_per_second,
+                max_retries=max_retries
+            ):
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                out.flush()
+                counts["failed" if "error" in record else "answered"] += 1
+                if (counts["answered"] + counts["failed"]) % 100 == 0:
+                    logger.info("Batch progress: %s", counts)
+
+        logger.info("Batch recommendations finished: %s. Results in %s.", counts, output_path)
+        return counts
+
+    except Exception as e:
+        logger.exception("Batch recommendation job failed.")
+        raise CustomException("Error occurred during batch recommendations.", e)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate anime recommendations for a file of queries.")
+    parser.add_argument("input", help="Text file with one query per line, or JSONL with id and query fields.")
+    parser.add_argument(
+        "--output",
+        default="recommendations.jsonl",
+        help="JSONL output; also the checkpoint a rerun resumes from."
+    )
+    parser.add_argument(
+        "--persist-dir",
+        default="chroma_db",
+        help="Root directory of the versioned indexes."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=BATCH_SIZE,
+        help="Queries embedded and searched together."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=BATCH_MAX_WORKERS,
+        help="Concurrent LLM calls."
+    )
+    parser.add_argument(
+        "--requests-per-second",
+        type=float,
+        default=BATCH_REQUESTS_PER_SECOND,
+        help="LLM calls started per second; 0 disables the limit."
+    )
+    parser.add_argument(
+        "--max-retries",
+        type=int,
+        default=BATCH_MAX_RETRIES,
+        help="Retries of a failed LLM call."
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="Discard the existing output instead of resuming from it."
+    )
+    args = parser.parse_args()
+    main(
+        input_path=args.input,
+        output_path=args.output,
+        persist_dir=args.persist_dir,
+        batch_size=args.batch_size,
+        max_workers=args.workers,
+        requests_per_second=args.requests_per_second,
+        max_retries=args.max_retries,
+        overwrite=args.overwrite
+    )
@@ -1,7 +1,37 @@
+import argparse
+import os
+import time
+from functools import partial
+
 from dotenv import load_dotenv
 
 from src.data_loader import AnimeDataloader
-from src.vector_store import VectorStoreBuilder
+from src.vector_store import VectorStoreBuilder, hnsw_metadata
+from src.index_registry import IndexRegistry
+from src.embedding_engine import ParallelEmbeddingEngine, embedding_factory, embedding_model_name
+from config.config import (
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_BACKEND,
+    ONNX_MODEL_DIR,
+    ONNX_QUANTIZED,
+    EMBED_BATCH_SIZE,
+    EMBED_NUM_WORKERS,
+    EMBEDDING_CACHE_DIR,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    PROCESSED_DATA_PATH,
+    STREAMING_BUILD,
+    DATA_CHUNK_SIZE,
+    VECTOR_BACKEND,
+    VECTOR_DTYPE,
+    CHUNK_SIZE,
+    CHUNK_OVERLAP,
+    CHUNK_SEPARATOR,
+    CHROMA_HNSW_M,
+    CHROMA_HNSW_CONSTRUCTION_EF,
+    CHROMA_HNSW_SEARCH_EF,
+    NEIGHBOR_TOP_N,
+    INDEX_KEEP_VERSIONS,
+)
 from utils.logger import get_logger
 from utils.custom_exception import CustomException
 
@@ -9,38 +39,178 @@ load_dotenv()
 logger = get_logger(__name__)
 
 
-def main() -> None:
+def main(
+    incremental: bool = True,
+    batch_size: int = EMBED_BATCH_SIZE,
+    num_workers: int = EMBED_NUM_WORKERS,
+    backend: str = VECTOR_BACKEND,
+    persist_dir: str = "chroma_db",
+    streaming: bool = STREAMING_BUILD,
+    chunk_size: int = DATA_CHUNK_SIZE
+) -> None:
     """
     Entry point for building the anime recommendation pipeline.
     
     This script loads and processes raw anime data,
-    builds the vector store, and persists it for retrieval.
+    builds the vector store, the BM25 lexical index and the title neighbor
+    table, and persists them for retrieval.
+
+    Each build writes a new version directory of the index registry under
+    ``persist_dir`` (an incremental build starts from a copy of the current
+    one) and publishes it only once complete, so running servers never read a
+    partial index and pick the new one up without a restart.
+
+    Args:
+        incremental (bool, optional): Only embed new or changed rows and drop
+            removed ones instead of rebuilding the whole store. Defaults to True.
+        batch_size (int, optional): Documents per embedding batch.
+        num_workers (int, optional): Embedding worker processes.
+        backend (str, optional): Vector store backend, "chroma" or "numpy".
+        persist_dir (str, optional): Root of the versioned index directories.
+        streaming (bool, optional): Stream the raw CSV in chunks straight into the
+            indexes instead of writing the processed dataset first. This bounds
+            memory for the vector store step only; the lexical index, neighbor
+            table and metadata index still hold the whole catalogue.
+        chunk_size (int, optional): Rows per streamed chunk and documents per build batch.
     
     Raises:
         CustomException: If any step in the pipeline fails.
     """
+    registry = IndexRegistry(persist_dir)
+    version = None
     try:
         logger.info("Starting anime recommendation pipeline build...")
 
         # Step 1: Load and process the data
         loader = AnimeDataloader(
             original_csv="data/anime_with_synopsis.csv",
-            processed_csv="data/anime_with_synopsis_processed.csv"
+            processed_csv=PROCESSED_DATA_PATH
         )
-        processed_csv_path = loader.load_and_process()
-        logger.info("Data loaded and processed successfully: %s", processed_csv_path)
+        if streaming:
+            # Rows are validated and transformed chunk by chunk while the indexes are built
+            csv_path = loader.original_csv
+            document_source = partial(loader.iter_documents, chunksize=chunk_size)
+            logger.info("Streaming data from %s in chunks of %d rows.", csv_path, chunk_size)
+        else:
+            csv_path = loader.load_and_process()
+            document_source = None
+            logger.info("Data loaded and processed successfully: %s", csv_path)
 
         # Step 2: Build and save vector store
-        vector_builder = VectorStoreBuilder(csv_path=processed_csv_path)
-        vector_builder.build_and_save_vectorstore()
-        logger.info("Vector store built and saved successfully.")
+        # Embedding backend (torch or onnx) comes from config; each worker gets its CPU share
+        embedding_engine = ParallelEmbeddingEngine(
+            model_name=embedding_model_name(EMBEDDING_BACKEND, EMBEDDING_MODEL_NAME, ONNX_MODEL_DIR, ONNX_QUANTIZED),
+            batch_size=batch_size,
+            num_workers=num_workers,
+            embedding_factory=embedding_factory(
+                EMBEDDING_BACKEND,
+                EMBEDDING_MODEL_NAME,
+                ONNX_MODEL_DIR,
+                ONNX_QUANTIZED,
+                num_threads=max(1, (os.cpu_count() or 1) // max(1, num_workers))
+            )
+        )
+        logger.info("Embedding backend: %s (%s)", EMBEDDING_BACKEND, embedding_engine.model_name)
+        # The worker pool is started once and shared by every embedding batch of the build
+        with embedding_engine:
+            version, version_dir = registry.create_version(seed_from_current=incremental)
+            vector_builder = VectorStoreBuilder(
+                csv_path=csv_path,
+                embedding=embedding_engine,
+                cache_dir=EMBEDDING_CACHE_DIR,
+                cache_max_entries=EMBEDDING_CACHE_MAX_ENTRIES,
+                persist_dir=version_dir,
+                backend=backend,
+                dtype=VECTOR_DTYPE,
+                document_source=document_source,
+                stream_batch_size=chunk_size,
+                chunk_size=CHUNK_SIZE,
+                chunk_overlap=CHUNK_OVERLAP,
+                chunk_separator=CHUNK_SEPARATOR,
+                collection_metadata=hnsw_metadata(CHROMA_HNSW_M, CHROMA_HNSW_CONSTRUCTION_EF, CHROMA_HNSW_SEARCH_EF)
+            )
+
+            start = time.perf_counter()
+            vector_builder.build_and_save_vectorstore(incremental=incremental)
+            elapsed = time.perf_counter() - start
+            logger.info(
+                "Vector store built and saved successfully in %.2fs (embedding throughput: %.1f docs/sec).",
+                elapsed, embedding_engine.throughput
+            )
+
+            # Step 3: Build the BM25 index used by hybrid retrieval
+            start = time.perf_counter()
+            vector_builder.build_lexical_index()
+            logger.info("Lexical index built and saved in %.2fs.", time.perf_counter() - start)
+
+            # Step 4: Precompute "more like this" neighbors per title
+            start = time.perf_counter()
+            vector_builder.build_neighbor_table(top_n=NEIGHBOR_TOP_N)
+            logger.info("Neighbor table built and saved in %.2fs.", time.perf_counter() - start)
+
+        # Step 5: Atomically switch readers to the new version
+        registry.publish(version)
+        registry.prune(keep=INDEX_KEEP_VERSIONS)
 
-        logger.info("Anime recommendation pipeline built successfully.")
+        logger.info("Anime recommendation pipeline built successfully: index version %s.", version)
 
     except Exception as e:
+        if version is not None and registry.current() != version:
+            registry.discard(version)
         logger.exception("Pipeline execution failed.")
         raise CustomException("Error occurred during pipeline execution.", e)
 
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Build the anime recommendation vector store.")
+    parser.add_argument(
+        "--full-rebuild",
+        action="store_true",
+        help="Re-embed the whole catalogue instead of applying an incremental update."
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=EMBED_BATCH_SIZE,
+        help="Documents per embedding batch."
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=EMBED_NUM_WORKERS,
+        help="Number of embedding worker processes."
+    )
+    parser.add_argument(
+        "--backend",
+        choices=VectorStoreBuilder.BACKENDS,
+        default=VECTOR_BACKEND,
+        help="Vector store backend to build."
+    )
+    parser.add_argument(
+        "--persist-dir",
+        default="chroma_db",
+        help="Root directory of the versioned indexes."
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        default=STREAMING_BUILD,
+        help="Stream the raw CSV in chunks into the indexes without writing the processed dataset. "
+             "Bounds memory for the vector store step only."
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=DATA_CHUNK_SIZE,
+        help="Rows per streamed chunk and documents per build batch."
+    )
+    args = parser.parse_args()
+    main(
+        incremental=not args.full_rebuild,
+        batch_size=args.batch_size,
+        num_workers=args.workers,
+        backend=args.backend,
+        persist_dir=args.persist_dir,
+        streaming=args.streaming,
+        chunk_size=args.chunk_size
+    )
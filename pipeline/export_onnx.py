@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+
+from dotenv import load_dotenv
+
+from src.data_loader import read_processed
+from src.onnx_embeddings import OnnxEmbeddings, fidelity_check
+from config.config import EMBEDDING_MODEL_NAME, ONNX_MODEL_DIR, PROCESSED_DATA_PATH
+from utils.logger import get_logger
+from utils.custom_exception import CustomException
+
+load_dotenv()
+logger = get_logger(__name__)
+
+FIDELITY_FILE = "fidelity.json"
+
+
+def export(model_name: str, output_dir: str, quantize: bool = True) -> None:
+    """
+    Exports the transformer of a sentence-transformer model to ONNX and
+    optionally writes an int8 dynamically quantized copy next to it.
+
+    Args:
+        model_name (str): sentence-transformers model name.
+        output_dir (str): Target directory for the ONNX files and tokenizer.
+        quantize (bool, optional): Also write the int8 model. Defaults to True.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    os.makedirs(output_dir, exist_ok=True)
+    model = SentenceTransformer(model_name, device="cpu")
+    transformer = model[0].auto_model.eval()
+    tokenizer = model.tokenizer
+    tokenizer.save_pretrained(output_dir)
+
+    sample = tokenizer(["An exported sentence."], return_tensors="pt")
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids") if name in sample]
+    model_path = os.path.join(output_dir, OnnxEmbeddings.MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[name] for name in input_names),
+            model_path,
+            input_names=input_names,
+            output_names=["last_hidden_state"],
+            dynamic_axes={name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]},
+            opset_version=14
+        )
+    logger.info("Exported %s to %s", model_name, model_path)
+
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+        quantized_path = os.path.join(output_dir, OnnxEmbeddings.QUANTIZED_MODEL_FILE)
+        quantize_dynamic(model_path, quantized_path, weight_type=QuantType.QInt8)
+        logger.info("Wrote int8 quantized model to %s", quantized_path)
+
+
+def main(
+    model_name: str = EMBEDDING_MODEL_NAME,
+    output_dir: str = ONNX_MODEL_DIR,
+    quantize: bool = True,
+    csv_path: str = PROCESSED_DATA_PATH,
+    sample_size: int = 500,
+    min_cosine: float = 0.98
+) -> None:
+    """
+    Exports the embedding model to ONNX and checks it against the PyTorch
+    reference on catalogue texts. Results are written to ``fidelity.json``.
+
+    Args:
+        model_name (str, optional): sentence-transformers model name.
+        output_dir (str, optional): Target directory.
+        quantize (bool, optional): Also export and check the int8 model. Defaults to True.
+        csv_path (str, optional): Processed dataset used for the fidelity sample.
+        sample_size (int, optional): Number of catalogue texts compared. Defaults to 500.
+        min_cosine (float, optional): Lowest acceptable 1st-percentile cosine similarity. Defaults to 0.98.
+
+    Raises:
+        CustomException: If export fails or a model falls below ``min_cosine``.
+    """
+    try:
+        export(model_name, output_dir, quantize)
+
+        from langchain_huggingface import HuggingFaceEmbeddings
+        reference = HuggingFaceEmbeddings(model_name=model_name)
+        texts = read_processed(csv_path, ["combined_info"])["combined_info"].dropna().astype(str).tolist()[:sample_size]
+
+        results = {}
+        for quantized in ([False, True] if quantize else [False]):
+            candidate = OnnxEmbeddings(output_dir, quantized=quantized)
+            results[candidate.model_name] = fidelity_check(candidate, reference, texts)
+            logger.info("Fidelity of %s: %s", candidate.model_name, results[candidate.model_name])
+
+        with open(os.path.join(output_dir, FIDELITY_FILE), "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+        failing = [name for name, result in results.items() if result["p01_cosine"] < min_cosine]
+        if failing:
+            raise ValueError(f"Models below the fidelity threshold {min_cosine}: {failing}")
+        logger.info("ONNX export of %s passed the fidelity check.", model_name)
+
+    except Exception as e:
+        logger.exception("ONNX export failed.")
+        raise CustomException("Error occurred during ONNX export.", e)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the embedding model to ONNX and check its fidelity.")
+    parser.add_argument("--model", default=EMBEDDING_MODEL_NAME, help="sentence-transformers model name.")
+    parser.add_argument("--output-dir", default=ONNX_MODEL_DIR, help="Directory for the exported model.")
+    parser.add_argument("--no-quantize", action="store_true", help="Skip the int8 quantized model.")
+    parser.add_argument("--sample-size", type=int, default=500, help="Catalogue texts used for the fidelity check.")
+    parser.add_argument("--min-cosine", type=float, default=0.98,
+                        help="Lowest acceptable 1st-percentile cosine similarity to the reference model.")
+    args = parser.parse_args()
+    main(
+        model_name=args.model,
+        output_dir=args.output_dir,
+        quantize=not args.no_quantize,
+        sample_size=args.sample_size,
+        min_cosine=args.min_cosine
+    )
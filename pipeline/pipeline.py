@@ -1,27 +1,196 @@
-from src.vector_store import VectorStoreBuilder
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from itertools import islice
+
+from typing import TYPE_CHECKING, Iterable, Iterator, NamedTuple, Optional
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+from src.vector_store import VectorStoreBuilder, content_hash
+from src.index_registry import IndexRegistry
+from src.embedding_engine import create_embeddings
+from src.context_builder import ContextBuilder
+from src.reranker import CrossEncoderReranker, RerankingRetriever
+from src.neighbor_table import NeighborTable
+from src.title_resolver import TitleResolver, extract_title_anchor
 from src.recommender import AnimeRecommender
-from config.config import GROQ_API_KEY, MODEL_NAME
+from src.query_cache import TTLCache, normalize_query
+from src.response_cache import ResponseCache
+from src.semantic_cache import SemanticCache
+from src.concurrency import ConcurrencyLimiter, RateLimiter, SingleFlight, retry_call
+from src.streaming import TimedTokenStream, run_in_context
+from config.config import (
+    GROQ_API_KEY,
+    MODEL_NAME,
+    RETRIEVER_K,
+    EMBEDDING_MODEL_NAME,
+    EMBEDDING_BACKEND,
+    ONNX_MODEL_DIR,
+    ONNX_QUANTIZED,
+    HYBRID_RETRIEVAL,
+    HYBRID_FETCH_K,
+    RRF_K,
+    TITLE_MATCH_THRESHOLD,
+    RERANK_ENABLED,
+    RERANKER_MODEL_NAME,
+    RERANK_CANDIDATES,
+    RERANK_BATCH_SIZE,
+    RERANK_MAX_LATENCY_MS,
+    CONTEXT_MAX_TOKENS,
+    CONTEXT_MAX_TOKENS_PER_TITLE,
+    VECTOR_BACKEND,
+    VECTOR_DTYPE,
+    QUERY_CACHE_SIZE,
+    QUERY_CACHE_TTL_SECONDS,
+    INFER_QUERY_FILTERS,
+    RESPONSE_CACHE_PATH,
+    RESPONSE_CACHE_MEMORY_SIZE,
+    RESPONSE_CACHE_MAX_ENTRIES,
+    SEMANTIC_CACHE_ENABLED,
+    SEMANTIC_CACHE_THRESHOLD,
+    SEMANTIC_CACHE_MAX_ENTRIES,
+    MAX_CONCURRENT_REQUESTS,
+    INDEX_POLL_SECONDS,
+    BATCH_SIZE,
+    BATCH_MAX_WORKERS,
+    BATCH_REQUESTS_PER_SECOND,
+    BATCH_MAX_RETRIES,
+)
 from utils.logger import get_logger
+from utils.metrics import record_stream, request_context, stage
+from utils.startup import STARTUP_REPORT
 from utils.custom_exception import CustomException
 
+if TYPE_CHECKING:
+    from langchain_core.language_models import BaseChatModel
+
 logger = get_logger(__name__)
 
 
+class ServingIndex(NamedTuple):
+    """Everything that depends on one index version, swapped as a unit."""
+
+    index_dir: str
+    index_version: str
+    retriever: object
+    recommender: AnimeRecommender
+    retrieval_cache: TTLCache
+    neighbor_table: Optional[NeighborTable] = None
+    title_resolver: Optional[TitleResolver] = None
+
+    def close(self) -> None:
+        """Releases the index's vector store client, so its directory can be pruned."""
+        if hasattr(self.retriever, "close"):
+            self.retriever.close()
+
+
+class ServingSlot:
+    """
+    Holds the index serving requests and counts the requests using each index.
+
+    A replaced index stays open until the last request that started on it
+    finishes, and is closed then; one nobody uses is closed right away.
+
+    Attributes:
+        current (Optional[ServingIndex]): The index new requests start on.
+    """
+
+    def __init__(self, index: Optional[ServingIndex] = None) -> None:
+        self.current = index
+        self._lock = threading.Lock()
+        # Keyed on id(): indexes hold unhashable retrievers
+        self._in_use: dict[int, int] = {}
+        self._retired: dict[int, ServingIndex] = {}
+
+    @contextmanager
+    def acquire(self) -> Iterator[ServingIndex]:
+        """
+        Leases the current index for the duration of one request.
+
+        Yields:
+            ServingIndex: The index the request runs on, even if a swap happens meanwhile.
+        """
+        with self._lock:
+            index = self.current
+            self._in_use[id(index)] = self._in_use.get(id(index), 0) + 1
+        try:
+            yield index
+        finally:
+            with self._lock:
+                self._in_use[id(index)] -= 1
+                retired = None
+                if not self._in_use[id(index)]:
+                    del self._in_use[id(index)]
+                    retired = self._retired.pop(id(index), None)
+            if retired is not None:
+                logger.info("Closing index %s after its last request.", retired.index_dir)
+                retired.close()
+
+    def swap(self, index: ServingIndex) -> None:
+        """
+        Makes ``index`` current and closes the replaced one once no request uses it.
+
+        Args:
+            index (ServingIndex): The index to serve.
+        """
+        with self._lock:
+            previous, self.current = self.current, index
+            if previous is not None and id(previous) in self._in_use:
+                self._retired[id(previous)] = previous
+                previous = None
+        if previous is not None:
+            logger.info("Closing index %s.", previous.index_dir)
+            previous.close()
+
+
 class AnimeRecommendationPipeline:
     """
     A pipeline class to generate anime recommendations.
 
     This class initializes the vector store, loads the retriever,
     and delegates recommendation generation to AnimeRecommender.
+
+    Indexes are read from the versioned directories of an IndexRegistry. With
+    the index watcher running, a newly published version is loaded and warmed
+    in the background and swapped in between requests, keeping the caches.
+
+    Attributes:
+        embedding_cache (TTLCache): Cache of query embeddings, keyed on normalized query text.
+        retrieval_cache (TTLCache): Cache of retrieved top-k documents of the served index,
+            keyed on normalized query text.
+        response_cache (ResponseCache): Cache of full LLM answers, invalidated by new index versions.
+        semantic_cache (Optional[SemanticCache]): Cache of answers matched by query similarity,
+            invalidated by new index versions.
+        single_flight (SingleFlight): Coalesces identical in-flight async queries.
+        concurrency_limiter (ConcurrencyLimiter): Caps concurrent async LLM calls.
+        neighbor_table (Optional[NeighborTable]): Precomputed similar titles per MAL_ID, if built.
+        title_resolver (Optional[TitleResolver]): Fuzzy lookup of titles in the neighbor table.
+        retriever: Retriever feeding the recommender.
+        recommender (AnimeRecommender): The recommendation engine.
+        registry (IndexRegistry): Versioned index directories under ``persist_dir``.
+        index_dir (str): Directory of the index being served.
     """
 
-    def __init__(self, persist_dir: str = "chroma_db") -> None:
+    def __init__(
+        self,
+        persist_dir: str = "chroma_db",
+        llm: Optional["BaseChatModel"] = None,
+        embedding: Optional[Embeddings] = None
+    ) -> None:
         """
         Initializes the AnimeRecommendationPipeline by setting up the vector store
         and the anime recommendation engine.
 
         Args:
-            persist_dir (str): Directory where the vector store is persisted.
+            persist_dir (str): Index registry root; a flat legacy index directory also works.
+            llm (BaseChatModel, optional): Chat model replacing ChatGroq, e.g. for
+                offline benchmarks.
+            embedding (Embeddings, optional): Query encoder replacing the configured
+                embedding backend; must match the one the index was built with.
 
         Raises:
             CustomException: If initialization fails.
@@ -29,20 +198,32 @@ class AnimeRecommendationPipeline:
         try:
             logger.info("Initializing AnimeRecommendationPipeline with persist_dir='%s'", persist_dir)
 
-            vector_builder = VectorStoreBuilder(
-                csv_path="",  # Assuming CSV path empty means loading from persist_dir
-                persist_dir=persist_dir
+            self.registry = IndexRegistry(persist_dir)
+            self.embedding = embedding or create_embeddings(
+                EMBEDDING_BACKEND, EMBEDDING_MODEL_NAME, ONNX_MODEL_DIR, ONNX_QUANTIZED
             )
-            logger.info("VectorStoreBuilder initialized with persist_dir='%s'.", persist_dir)
-
-            retriever = vector_builder.load_vector_store().as_retriever()
-            logger.info("Vector store loaded and retriever created.")
+            self.llm = llm
 
-            self.recommender = AnimeRecommender(
-                retriever=retriever,
-                api_key=str(GROQ_API_KEY),
-                model_name=MODEL_NAME
+            # Caches outlive index swaps; each index gets its own retrieval cache
+            self.embedding_cache = TTLCache(max_size=QUERY_CACHE_SIZE, ttl_seconds=QUERY_CACHE_TTL_SECONDS)
+            self.response_cache = ResponseCache(
+                db_path=RESPONSE_CACHE_PATH or None,
+                memory_size=RESPONSE_CACHE_MEMORY_SIZE,
+                max_entries=RESPONSE_CACHE_MAX_ENTRIES
             )
+            self.semantic_cache = SemanticCache(
+                threshold=SEMANTIC_CACHE_THRESHOLD,
+                max_entries=SEMANTIC_CACHE_MAX_ENTRIES
+            ) if SEMANTIC_CACHE_ENABLED else None
+
+            self._slot = ServingSlot()
+            self._activate(self._load_index(self.registry.current_dir()))
+
+            self.single_flight = SingleFlight()
+            self.concurrency_limiter = ConcurrencyLimiter(MAX_CONCURRENT_REQUESTS)
+            self._swap_lock = threading.Lock()
+            self._watcher: Optional[threading.Thread] = None
+            self._stop_watching = threading.Event()
             logger.info("AnimeRecommender initialized successfully. Pipeline is ready.")
 
         except Exception as e:
@@ -54,6 +235,218 @@ class AnimeRecommendationPipeline:
             logger.exception(error_msg)
             raise CustomException(error_msg, e)
 
+    def _load_index(self, index_dir: str) -> ServingIndex:
+        """
+        Loads everything that depends on one index directory: the retriever and
+        its retrieval cache, the recommender bound to it and the neighbor table.
+
+        Args:
+            index_dir (str): Directory of a complete index.
+
+        Returns:
+            ServingIndex: The loaded, not yet active, index.
+        """
+        vector_builder = VectorStoreBuilder(
+            csv_path="",  # Assuming CSV path empty means loading from persist_dir
+            persist_dir=index_dir,
+            embedding=self.embedding,
+            backend=VECTOR_BACKEND,
+            dtype=VECTOR_DTYPE
+        )
+        logger.info("VectorStoreBuilder initialized with persist_dir='%s'.", index_dir)
+
+        index_version = vector_builder.index_version()
+        retrieval_cache = TTLCache(max_size=QUERY_CACHE_SIZE, ttl_seconds=QUERY_CACHE_TTL_SECONDS)
+        with STARTUP_REPORT.timed("load retriever"):
+            retriever = vector_builder.load_retriever(
+                k=max(RERANK_CANDIDATES, RETRIEVER_K) if RERANK_ENABLED else RETRIEVER_K,
+                embedding_cache=self.embedding_cache,
+                retrieval_cache=retrieval_cache,
+                infer_filters=INFER_QUERY_FILTERS,
+                hybrid=HYBRID_RETRIEVAL,
+                fetch_k=HYBRID_FETCH_K,
+                rrf_k=RRF_K
+            )
+        logger.info("Vector store loaded and %s created.", type(retriever).__name__)
+
+        if RERANK_ENABLED:
+            retriever = RerankingRetriever(
+                retriever=retriever,
+                reranker=CrossEncoderReranker(
+                    model_name=RERANKER_MODEL_NAME,
+                    batch_size=RERANK_BATCH_SIZE,
+                    max_latency_seconds=RERANK_MAX_LATENCY_MS / 1000
+                ),
+                k=RETRIEVER_K
+            )
+            logger.info("Re-ranking %d candidates down to %d with %s.",
+                        RERANK_CANDIDATES, RETRIEVER_K, RERANKER_MODEL_NAME)
+
+        with STARTUP_REPORT.timed("create recommender"):
+            recommender = AnimeRecommender(
+                retriever=retriever,
+                api_key=str(GROQ_API_KEY),
+                model_name=MODEL_NAME,
+                response_cache=self.response_cache,
+                index_version=index_version,
+                semantic_cache=self.semantic_cache,
+                embed_query=retriever.embed_query,
+                context_builder=ContextBuilder(
+                    max_tokens=CONTEXT_MAX_TOKENS,
+                    max_tokens_per_title=CONTEXT_MAX_TOKENS_PER_TITLE
+                ),
+                llm=self.llm
+            )
+        with STARTUP_REPORT.timed("load neighbor table"):
+            neighbor_table = NeighborTable.load(index_dir)
+        title_resolver = TitleResolver(
+            neighbor_table.titles, threshold=TITLE_MATCH_THRESHOLD
+        ) if neighbor_table is not None else None
+        logger.info("Neighbor table %s.", "loaded" if neighbor_table is not None else "not found")
+
+        return ServingIndex(
+            index_dir, index_version, retriever, recommender, retrieval_cache, neighbor_table, title_resolver
+        )
+
+    def _activate(self, index: ServingIndex) -> None:
+        """
+        Makes a loaded index the one serving requests with a single reference
+        assignment. Requests lease the current index from the serving slot and
+        keep it, so requests already running finish on the index they started
+        with; the replaced index is closed when the last of them finishes, before
+        the registry can prune its directory.
+
+        Answers cached for other index versions are dropped right after the swap.
+        Answers that requests still running on the old index store later carry
+        the old version and are never served for the new one.
+
+        Args:
+            index (ServingIndex): The index to serve.
+        """
+        self._slot.swap(index)
+        self.response_cache.invalidate_other_versions(index.index_version)
+        if self.semantic_cache is not None:
+            self.semantic_cache.invalidate_other_versions(index.index_version)
+
+    @property
+    def _serving(self) -> ServingIndex:
+        return self._slot.current
+
+    @property
+    def index_dir(self) -> str:
+        """Directory of the index being served."""
+        return self._serving.index_dir
+
+    @property
+    def retriever(self):
+        """Retriever of the index being served."""
+        return self._serving.retriever
+
+    @property
+    def recommender(self) -> AnimeRecommender:
+        """Recommender bound to the index being served."""
+        return self._serving.recommender
+
+    @property
+    def retrieval_cache(self) -> TTLCache:
+        """Retrieval cache of the index being served."""
+        return self._serving.retrieval_cache
+
+    @property
+    def neighbor_table(self) -> Optional[NeighborTable]:
+        """Neighbor table of the index being served, if built."""
+        return self._serving.neighbor_table
+
+    @property
+    def title_resolver(self) -> Optional[TitleResolver]:
+        """Title resolver of the index being served, if a neighbor table is built."""
+        return self._serving.title_resolver
+
+    def reload_index(self) -> bool:
+        """
+        Serves the registry's current index if it differs from the active one.
+
+        The new index is loaded and warmed up while the old one keeps serving;
+        the switch itself only replaces one reference. The new index starts with
+        an empty retrieval cache of its own, so requests still running on the old
+        index cannot fill it with old results; query embeddings stay cached.
+
+        Returns:
+            bool: True if a new index was activated.
+
+        Raises:
+            CustomException: If the new index cannot be loaded; the old one keeps serving.
+        """
+        with self._swap_lock:
+            index_dir = self.registry.current_dir()
+            if index_dir == self.index_dir:
+                return False
+            try:
+                start = time.perf_counter()
+                index = self._load_index(index_dir)
+                self._warm_up_index(index)
+                load_seconds = time.perf_counter() - start
+
+                self._activate(index)
+                logger.info("Swapped to index %s after %.2fs of background loading.", index_dir, load_seconds)
+                return True
+            except Exception as e:
+                logger.exception("Failed to load index %s; keeping %s.", index_dir, self.index_dir)
+                raise CustomException(f"Failed to load index {index_dir}", e)
+
+    def start_index_watcher(self, interval_seconds: float = INDEX_POLL_SECONDS) -> None:
+        """
+        Starts a daemon thread that polls the registry's CURRENT pointer and
+        hot-swaps to newly published indexes.
+
+        Args:
+            interval_seconds (float, optional): Seconds between polls.
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._stop_watching.clear()
+
+        def watch() -> None:
+            while not self._stop_watching.wait(interval_seconds):
+                try:
+                    self.reload_index()
+                except CustomException:
+                    pass  # Logged in reload_index; retried on the next poll
+
+        self._watcher = threading.Thread(target=watch, name="index-watcher", daemon=True)
+        self._watcher.start()
+        logger.info("Watching %s for new index versions every %.1fs.", self.registry.root, interval_seconds)
+
+    def stop_index_watcher(self) -> None:
+        """Stops the index watcher thread, if running."""
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+    def warm_up(self) -> dict:
+        """
+        Preloads everything that is otherwise loaded on the first query: the
+        embedding model, the vector store and lexical index, and the re-ranker if
+        enabled. Call before reporting readiness.
+
+        Returns:
+            dict: The startup report with per-stage timings in milliseconds,
+                including lazy imports and model load times.
+        """
+        with STARTUP_REPORT.timed("warm up retrieval"):
+            self._warm_up_index(self._serving)
+        report = STARTUP_REPORT.as_dict()
+        logger.info("Pipeline warmed up. Startup report: %s", report)
+        return report
+
+    @staticmethod
+    def _warm_up_index(index: ServingIndex) -> None:
+        # The lookup must reach the store, so it must not be served from or left in the cache
+        index.retrieval_cache.clear()
+        index.retriever.invoke("warm up")
+        index.retrieval_cache.clear()
+
     def recommend(self, query: str) -> str:
         """
         Generates an anime recommendation for the given query.
@@ -71,9 +464,16 @@ class AnimeRecommendationPipeline:
             if not query or not query.strip():
                 raise ValueError("Query cannot be empty or whitespace.")
 
-            logger.info("Received query for recommendation: '%s'", query)
+            with request_context():
+                logger.info("Received query for recommendation: '%s'", query)
 
-            recommendation = self.recommender.get_recommendation(query=query)
+                with self._slot.acquire() as serving:
+                    with stage("title_match"):
+                        candidates = self.more_like_this(query, index=serving)
+                    if candidates is not None:
+                        recommendation = serving.recommender.get_recommendation_from_documents(query, candidates)
+                    else:
+                        recommendation = serving.recommender.get_recommendation(query=query)
 
             logger.info("Anime recommendation generated successfully.")
             return recommendation
@@ -92,3 +492,280 @@ class AnimeRecommendationPipeline:
             )
             logger.exception(error_msg)
             raise CustomException(error_msg, e)
+
+    def stream_recommend(self, query: str) -> TimedTokenStream:
+        """
+        Generates an anime recommendation as a stream of tokens.
+
+        Args:
+            query (str): A user-provided query, e.g., "I liked Attack on Titan".
+
+        The request, including title matching, is instrumented while the stream
+        is consumed; time-to-first-token and total latency are recorded in the
+        metrics registry when it is exhausted.
+
+        Returns:
+            TimedTokenStream: Tokens of the answer; exposes time_to_first_token and
+                total_latency once consumed.
+
+        Raises:
+            CustomException: If the query is invalid.
+        """
+        if not query or not query.strip():
+            error_msg = f"Invalid query provided: '{query}'. Query must be a non-empty string."
+            logger.error(error_msg)
+            raise CustomException(error_msg, ValueError("Query cannot be empty or whitespace."))
+
+        def tokens() -> Iterator[str]:
+            with request_context(), self._slot.acquire() as serving:
+                logger.info("Received query for streaming recommendation: '%s'", query)
+
+                with stage("title_match"):
+                    candidates = self.more_like_this(query, index=serving)
+                yield from serving.recommender.stream_recommendation(query=query, documents=candidates)
+
+        # The request spans the whole stream; latencies are exported once it is exhausted
+        stream = TimedTokenStream(
+            run_in_context(tokens()),
+            on_complete=lambda text: record_stream(stream.time_to_first_token, stream.total_latency)
+        )
+        return stream
+
+    async def arecommend(self, query: str) -> str:
+        """
+        Asynchronously generates an anime recommendation for the given query.
+
+        Identical queries (after normalization) that are already in flight share a
+        single LLM call, and the number of concurrent calls is capped.
+
+        Args:
+            query (str): A user-provided query, e.g., "I liked Attack on Titan".
+
+        Returns:
+            str: A recommendation string from the model.
+
+        Raises:
+            CustomException: If recommendation generation fails.
+        """
+        try:
+            if not query or not query.strip():
+                raise ValueError("Query cannot be empty or whitespace.")
+
+            with request_context():
+                logger.info("Received async query for recommendation: '%s'", query)
+
+                recommendation = await self.single_flight.do(
+                    normalize_query(query),
+                    lambda: self._limited_recommend(query)
+                )
+
+            logger.info("Anime recommendation generated successfully.")
+            return recommendation
+
+        except ValueError as ve:
+            error_msg = f"Invalid query provided: '{query}'. Query must be a non-empty string."
+            logger.error(error_msg)
+            raise CustomException(error_msg, ve)
+
+        except Exception as e:
+            error_msg = (
+                f"Failed to generate recommendation for query: '{query}'. "
+                f"Check if the retriever and LLM are properly initialized. "
+                f"Original error: {str(e)}"
+            )
+            logger.exception(error_msg)
+            raise CustomException(error_msg, e)
+
+    async def recommend_many(self, queries: list[str]) -> list[str]:
+        """
+        Generates recommendations for several queries concurrently.
+
+        Args:
+            queries (list[str]): User-provided queries.
+
+        Returns:
+            list[str]: Recommendations in the same order as ``queries``.
+
+        Raises:
+            CustomException: If any recommendation fails.
+        """
+        logger.info("Received batch of %d queries for recommendation.", len(queries))
+        return list(await asyncio.gather(*(self.arecommend(query) for query in queries)))
+
+    def recommend_batch(
+        self,
+        queries: Iterable[tuple[str, str]],
+        batch_size: int = BATCH_SIZE,
+        max_workers: int = BATCH_MAX_WORKERS,
+        requests_per_second: float = BATCH_REQUESTS_PER_SECOND,
+        max_retries: int = BATCH_MAX_RETRIES
+    ) -> Iterator[dict]:
+        """
+        Generates recommendations for a large stream of queries, e.g. for offline jobs.
+
+        Queries are processed in waves of ``batch_size``. Each wave is embedded in
+        one batch and searched together through the retriever's ``prefetch``;
+        title-anchored queries use the neighbor table instead. Queries with the
+        same normalized text and the same context share one LLM call. LLM calls
+        run on a thread pool, spaced by a rate limiter and retried with backoff.
+        As for neighbor-table answers, the semantic cache is skipped; the response
+        cache still answers queries seen before.
+
+        Results are yielded as soon as they are ready, so the caller can write
+        them incrementally; their order follows completion, not input.
+
+        Args:
+            queries (Iterable[tuple[str, str]]): Query IDs and queries.
+            batch_size (int, optional): Queries retrieved together; capped at the
+                retrieval cache size so prefetched results are not evicted.
+            max_workers (int, optional): Concurrent LLM calls.
+            requests_per_second (float, optional): LLM calls started per second; 0 disables the limit.
+            max_retries (int, optional): Retries of a failed LLM call.
+
+        Yields:
+            dict: ``{"id", "query", "recommendation"}``, or ``{"id", "query", "error"}``
+                when the query is invalid, its retrieval failed or every LLM
+                attempt failed. A failed query does not stop the job.
+        """
+        batch_size = max(1, min(batch_size, self.retrieval_cache.max_size))
+        limiter = RateLimiter(requests_per_second) if requests_per_second > 0 else None
+        items = iter(queries)
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="batch-llm") as executor:
+            while wave := list(islice(items, batch_size)):
+                yield from self._recommend_wave(wave, executor, limiter, max_retries)
+
+    def _recommend_wave(
+        self,
+        wave: list[tuple[str, str]],
+        executor: ThreadPoolExecutor,
+        limiter: Optional[RateLimiter],
+        max_retries: int
+    ) -> Iterator[dict]:
+        # One index version serves the whole wave, even if a swap happens meanwhile
+        with self._slot.acquire() as serving:
+            yield from self._recommend_wave_on(serving, wave, executor, limiter, max_retries)
+
+    def _recommend_wave_on(
+        self,
+        serving: ServingIndex,
+        wave: list[tuple[str, str]],
+        executor: ThreadPoolExecutor,
+        limiter: Optional[RateLimiter],
+        max_retries: int
+    ) -> Iterator[dict]:
+        retriever, recommender = serving.retriever, serving.recommender
+        valid = []
+        anchored: dict[str, Optional[list[Document]]] = {}
+        for query_id, query in wave:
+            if not query or not query.strip():
+                yield {"id": query_id, "query": query, "error": "Query cannot be empty or whitespace."}
+                continue
+            try:
+                anchored[query_id] = self.more_like_this(query, index=serving)
+            except Exception as e:
+                logger.error("Title matching failed for batch query %s: %s", query_id, e)
+                yield {"id": query_id, "query": query, "error": str(e)}
+                continue
+            valid.append((query_id, query))
+
+        retrieve = [query for query_id, query in valid if anchored[query_id] is None]
+        if retrieve and hasattr(retriever, "prefetch"):
+            try:
+                retriever.prefetch(retrieve)
+            except Exception as e:
+                # Only a cache fill; each query is still retrieved on its own below
+                logger.warning("Batch prefetch of %d queries failed: %s", len(retrieve), e)
+
+        groups: dict[tuple[str, str], list[tuple[str, str]]] = {}
+        contexts: dict[tuple[str, str], list[Document]] = {}
+        for query_id, query in valid:
+            documents = anchored[query_id]
+            if documents is None:
+                try:
+                    documents = retriever.invoke(query)
+                except Exception as e:
+                    logger.error("Retrieval failed for batch query %s: %s", query_id, e)
+                    yield {"id": query_id, "query": query, "error": str(e)}
+                    continue
+            key = (normalize_query(query), content_hash("\x00".join(d.page_content for d in documents)))
+            groups.setdefault(key, []).append((query_id, query))
+            contexts.setdefault(key, documents)
+        logger.info("Batch wave of %d queries needs %d LLM calls.", len(wave), len(groups))
+
+        def generate(query: str, documents: list[Document]) -> str:
+            def attempt() -> str:
+                if limiter is not None:
+                    limiter.acquire()
+                with request_context():
+                    return recommender.get_recommendation_from_documents(query, documents)
+            return retry_call(attempt, attempts=max_retries + 1)
+
+        futures = {
+            executor.submit(generate, members[0][1], contexts[key]): members
+            for key, members in groups.items()
+        }
+        for future in as_completed(futures):
+            try:
+                result = {"recommendation": future.result()}
+            except Exception as e:
+                logger.error("Batch recommendation failed after %d attempts: %s", max_retries + 1, e)
+                result = {"error": str(e)}
+            for query_id, query in futures[future]:
+                yield {"id": query_id, "query": query, **result}
+
+    async def _limited_recommend(self, query: str) -> str:
+        async with self.concurrency_limiter():
+            with self._slot.acquire() as serving:
+                candidates = self.more_like_this(query, index=serving)
+                if candidates is not None:
+                    return await asyncio.to_thread(
+                        serving.recommender.get_recommendation_from_documents, query, candidates
+                    )
+                return await serving.recommender.aget_recommendation(query=query)
+
+    def more_like_this(
+        self, query: str, n: int = RETRIEVER_K, index: Optional[ServingIndex] = None
+    ) -> Optional[list[Document]]:
+        """
+        Returns precomputed "more like this" candidates for title-anchored queries.
+
+        Queries such as "I liked Cowboy Bebop" are resolved to a catalogue title
+        with the trigram resolver and answered from the neighbor table, skipping
+        the query encoder and the vector store.
+
+        Args:
+            query (str): A user-provided query, e.g., "anime similar to Trigun".
+            n (int, optional): Number of candidates. Defaults to RETRIEVER_K.
+            index (ServingIndex, optional): Snapshot of the index the calling request
+                uses. Defaults to the index being served.
+
+        Returns:
+            Optional[list[Document]]: Similar titles, best first, or None if the
+                query is not anchored on a known title.
+        """
+        index = index or self._serving
+        if index.neighbor_table is None or index.title_resolver is None:
+            return None
+        title = extract_title_anchor(query)
+        match = index.title_resolver.resolve(title) if title else None
+        if match is None:
+            return None
+
+        row, similarity = match
+        logger.info("Resolved '%s' to '%s' (similarity %.2f); using neighbor table.",
+                    title, index.title_resolver.titles[row], similarity)
+        return [document for document, _ in index.neighbor_table.more_like_this(row, n)]
+
+    def cache_stats(self) -> dict:
+        """
+        Returns hit and miss counters of the pipeline's caches.
+
+        Returns:
+            dict: Stats of the query embedding, retrieval, response and semantic caches.
+        """
+        return {
+            "query_embedding": self.embedding_cache.stats(),
+            "retrieval": self.retrieval_cache.stats(),
+            "response": self.response_cache.stats(),
+            "semantic": self.semantic_cache.stats() if self.semantic_cache is not None else {},
+        }
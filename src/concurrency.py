@@ -0,0 +1,184 @@
+import asyncio
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Hashable, TypeVar
+from weakref import WeakKeyDictionary
+
+from utils.logger import logging
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key starts the work; callers arriving while it is in
+    flight await the same result (or exception) instead of starting their own.
+    Completed results are not retained. In-flight work is tracked per event
+    loop, since a future cannot be awaited from another loop; calls on
+    different loops are not coalesced.
+
+    Attributes:
+        coalesced (int): Number of calls that joined an in-flight execution.
+    """
+
+    coalesced: int
+
+    def __init__(self) -> None:
+        self.coalesced = 0
+        self._inflight_by_loop: WeakKeyDictionary = WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def _inflight(self) -> dict[Hashable, asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            inflight = self._inflight_by_loop.get(loop)
+            if inflight is None:
+                inflight = {}
+                self._inflight_by_loop[loop] = inflight
+            return inflight
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs ``func`` once per in-flight ``key``.
+
+        Args:
+            key (Hashable): Key identifying identical work.
+            func (Callable): Zero-argument coroutine function producing the result.
+
+        Returns:
+            T: The shared result.
+        """
+        inflight = self._inflight()
+        future = inflight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            logging.info("Joining in-flight request instead of starting a new one.")
+            return await asyncio.shield(future)
+
+        future = asyncio.ensure_future(func())
+        inflight[key] = future
+        try:
+            return await asyncio.shield(future)
+        finally:
+            if future.done():
+                inflight.pop(key, None)
+            else:
+                # The leader was cancelled; let the shared work finish for the followers
+                future.add_done_callback(lambda _: inflight.pop(key, None))
+
+
+class ConcurrencyLimiter:
+    """
+    Per-event-loop semaphore, so one limiter can be shared by code that runs
+    under several ``asyncio.run`` calls.
+
+    Attributes:
+        limit (int): Maximum number of concurrent holders per event loop.
+    """
+
+    limit: int
+
+    def __init__(self, limit: int) -> None:
+        """
+        Args:
+            limit (int): Maximum number of concurrent holders per event loop.
+        """
+        if limit < 1:
+            raise ValueError("limit must be at least 1.")
+        self.limit = limit
+        self._semaphores: WeakKeyDictionary = WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+    def __call__(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.limit)
+                self._semaphores[loop] = semaphore
+            return semaphore
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket spacing calls to at most ``rate`` per second,
+    allowing bursts of up to ``burst`` calls.
+
+    Attributes:
+        rate (float): Calls allowed per second.
+        burst (int): Calls allowed back to back after an idle period.
+    """
+
+    rate: float
+    burst: int
+
+    def __init__(self, rate: float, burst: int = 1) -> None:
+        """
+        Args:
+            rate (float): Calls allowed per second.
+            burst (int, optional): Bucket size. Defaults to 1.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        if burst < 1:
+            raise ValueError("burst must be at least 1.")
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Blocks until the caller may proceed.
+
+        Returns:
+            float: Seconds waited.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # A negative balance reserves a slot for this caller in the future
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            time.sleep(wait)
+        return wait
+
+
+def retry_call(
+    func: Callable[[], T],
+    attempts: int = 3,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0
+) -> T:
+    """
+    Calls ``func`` until it succeeds, sleeping with exponential backoff and
+    jitter between attempts.
+
+    Args:
+        func (Callable): Zero-argument function to call.
+        attempts (int, optional): Maximum number of calls. Defaults to 3.
+        base_delay (float, optional): Delay before the second call in seconds. Defaults to 1.0.
+        max_delay (float, optional): Upper bound of a single delay. Defaults to 30.0.
+
+    Returns:
+        T: The first successful result.
+
+    Raises:
+        Exception: The error of the last attempt.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            return func()
+        except Exception as e:
+            if attempt >= attempts:
+                raise
+            delay = min(max_delay, base_delay * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+            logging.warning(f"Attempt {attempt} of {attempts} failed ({e}); retrying in {delay:.1f}s.")
+            time.sleep(delay)
+    raise ValueError("attempts must be at least 1.")
@@ -0,0 +1,177 @@
+import math
+import re
+from typing import Callable, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from utils.logger import logging
+from utils.metrics import record_tokens, stage
+
+# Documents loaded from the processed dataset carry CSVLoader's "combined_info: " column prefix
+_TITLE_HEADER = re.compile(r"^(?:combined_info: )?Title: ")
+_COMBINED_INFO = re.compile(
+    r"^(?P<prefix>(?:combined_info: )?)Title: (?P<title>.*?) \.\. Overview: (?P<overview>.*?)"
+    r"(?: Genres: (?P<genres>[^\n]*))?$",
+    re.DOTALL
+)
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def approximate_token_count(text: str) -> int:
+    """
+    Estimates the token count of English text at roughly four characters per token.
+
+    Args:
+        text (str): Text to measure.
+
+    Returns:
+        int: Estimated number of tokens.
+    """
+    return math.ceil(len(text) / 4)
+
+
+class ContextBuilder:
+    """
+    Assembles the prompt context from retrieved chunks under a token budget.
+
+    Chunks are grouped per title (MAL_ID) in rank order, so a synopsis split
+    into several chunks appears once. Each title is then fitted to the remaining
+    budget, capped per title: the title and genres are kept and the overview is
+    cut at a sentence boundary. Titles that no longer fit are dropped.
+
+    Attributes:
+        max_tokens (int): Token budget for the whole context.
+        max_tokens_per_title (int): Token cap for a single title.
+        count_tokens (Callable[[str], int]): Token counter.
+    """
+
+    # Do not start a title with less room than this; it would be a bare heading
+    MIN_TITLE_TOKENS = 40
+
+    def __init__(
+        self,
+        max_tokens: int = 1500,
+        max_tokens_per_title: int = 350,
+        count_tokens: Optional[Callable[[str], int]] = None
+    ) -> None:
+        """
+        Args:
+            max_tokens (int, optional): Token budget for the whole context. Defaults to 1500.
+            max_tokens_per_title (int, optional): Token cap per title. Defaults to 350.
+            count_tokens (Callable, optional): Token counter, e.g. the LLM's tokenizer.
+                Defaults to a four-characters-per-token estimate.
+        """
+        self.max_tokens = max_tokens
+        self.max_tokens_per_title = max_tokens_per_title
+        self.count_tokens = count_tokens or approximate_token_count
+
+    def build(self, documents: list[Document]) -> list[Document]:
+        """
+        Deduplicates, truncates and budgets retrieved documents.
+
+        Args:
+            documents (list[Document]): Retrieved chunks, best first.
+
+        Returns:
+            list[Document]: One document per title, best first, within the budget.
+        """
+        with stage("context"):
+            context, used, title_count = self._select(documents)
+
+        record_tokens("context", used)
+        raw_tokens = sum(self.count_tokens(document.page_content) for document in documents)
+        logging.info(
+            f"Context built: {len(documents)} chunks -> {len(context)} of {title_count} titles, "
+            f"{raw_tokens} -> {used} tokens (budget {self.max_tokens})."
+        )
+        return context
+
+    def _select(self, documents: list[Document]) -> tuple[list[Document], int, int]:
+        # Groups chunks by title and fills the budget; returns the context, its tokens and the title count
+        titles: dict[object, list[Document]] = {}
+        for document in documents:
+            key = document.metadata.get("MAL_ID") or document.metadata.get("Name") or document.page_content
+            titles.setdefault(key, []).append(document)
+
+        context: list[Document] = []
+        used = 0
+        for chunks in titles.values():
+            remaining = self.max_tokens - used
+            if remaining < self.MIN_TITLE_TOKENS:
+                break
+            text = self.truncate(self._merge(chunks), min(remaining, self.max_tokens_per_title))
+            used += self.count_tokens(text)
+            context.append(Document(page_content=text, metadata=chunks[0].metadata))
+        return context, used, len(titles)
+
+    @staticmethod
+    def _merge(chunks: list[Document]) -> str:
+        # The chunk carrying the title header goes first; duplicates are dropped
+        texts = list(dict.fromkeys(chunk.page_content for chunk in chunks))
+        texts.sort(key=lambda text: not _TITLE_HEADER.match(text))
+        return " ".join(texts)
+
+    def truncate(self, text: str, budget: int) -> str:
+        """
+        Shortens a synopsis to a token budget, keeping title and genres and
+        cutting the overview after the last sentence that fits.
+
+        Args:
+            text (str): Combined title, overview and genres text.
+            budget (int): Maximum number of tokens.
+
+        Returns:
+            str: The text, unchanged if it already fits.
+        """
+        if self.count_tokens(text) <= budget:
+            return text
+
+        match = _COMBINED_INFO.match(text)
+        if match:
+            head = f"{match.group('prefix')}Title: {match.group('title')} .. Overview: "
+            tail = f" Genres: {match.group('genres')}" if match.group("genres") else ""
+            overview = match.group("overview")
+        else:
+            head, tail, overview = "", "", text
+
+        room = budget - self.count_tokens(head + tail)
+        kept = ""
+        for sentence in _SENTENCE_END.split(overview):
+            candidate = f"{kept} {sentence}".strip()
+            if self.count_tokens(candidate) > room:
+                break
+            kept = candidate
+
+        if not kept:
+            # Not even one sentence fits; fall back to whole words
+            for word in overview.split():
+                candidate = f"{kept} {word}".strip()
+                if self.count_tokens(candidate + " ...") > room:
+                    break
+                kept = candidate
+            kept = f"{kept} ...".lstrip()
+        return head + kept + tail
+
+
+class ContextBudgetRetriever(BaseRetriever):
+    """
+    Retriever wrapper that passes results through a ContextBuilder, so chains
+    that stuff documents into the prompt receive a deduplicated, budgeted context.
+
+    Attributes:
+        retriever (BaseRetriever): Underlying retriever.
+        builder (ContextBuilder): Context assembly and budgeting.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    retriever: BaseRetriever
+    builder: ContextBuilder
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        return self.builder.build(self.retriever.invoke(query))
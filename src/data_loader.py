@@ -1,6 +1,69 @@
+import os
+from typing import Iterator, Optional
+
 import pandas as pd
+from langchain_core.documents import Document
+
 from utils.logger import logging
 from utils.custom_exception import CustomException
+from utils.startup import lazy_import
+
+# Processed dataset formats by file extension; the columnar ones keep typed columns
+PROCESSED_FORMATS = {".csv": "csv", ".arrow": "arrow", ".feather": "arrow", ".parquet": "parquet"}
+
+
+def processed_format(path: str) -> str:
+    """
+    Returns the format of a processed dataset from its file extension.
+
+    Args:
+        path (str): Dataset path ending in .csv, .arrow, .feather or .parquet.
+
+    Returns:
+        str: "csv", "arrow" (Arrow IPC file) or "parquet".
+
+    Raises:
+        ValueError: If the extension is not supported.
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in PROCESSED_FORMATS:
+        raise ValueError(f"Unsupported processed dataset format '{extension}', expected one of {list(PROCESSED_FORMATS)}.")
+    return PROCESSED_FORMATS[extension]
+
+
+def split_genres(genres: str) -> list[str]:
+    """
+    Splits a comma-separated genre string into genre names.
+
+    Args:
+        genres (str): Genres as in the source CSV, e.g. "Action, Sci-Fi".
+
+    Returns:
+        list[str]: Genre names without surrounding whitespace.
+    """
+    return [genre.strip() for genre in genres.split(",") if genre.strip()]
+
+
+def read_processed(path: str, columns: Optional[list[str]] = None) -> pd.DataFrame:
+    """
+    Reads a processed dataset of any supported format into a DataFrame.
+
+    Columnar files are memory-mapped and only the requested columns are read.
+
+    Args:
+        path (str): Processed dataset path.
+        columns (list[str], optional): Columns to read. Defaults to all columns.
+
+    Returns:
+        pd.DataFrame: The requested columns.
+    """
+    fmt = processed_format(path)
+    if fmt == "csv":
+        return pd.read_csv(path, usecols=columns, encoding='utf-8')
+    if fmt == "arrow":
+        return lazy_import("pyarrow.feather").read_table(path, columns=columns, memory_map=True).to_pandas()
+    return lazy_import("pyarrow.parquet").read_table(path, columns=columns, memory_map=True).to_pandas()
+
 
 class AnimeDataloader:
 
@@ -9,16 +72,29 @@ class AnimeDataloader:
 
     This class reads an input CSV file containing anime metadata,
     checks for required columns, combines selected fields into a 
-    new 'combined_info' column, and saves the result to a new CSV.
+    new 'combined_info' column, and saves it together with the MAL_ID key and
+    the Name, Score and Genres fields used as typed metadata.
+
+    The output format follows the extension of ``processed_csv``: CSV, or the
+    columnar Arrow IPC (.arrow/.feather) and Parquet formats, which keep MAL_ID
+    as an integer, Score as a nullable float and Genres as a list of strings
+    and can be memory-mapped by the reader.
+
+    For large catalogues, ``iter_documents`` streams the same rows as documents
+    chunk by chunk without writing the processed CSV.
 
     Attributes:
         original_csv (str): Path to the input CSV file.
-        processed_csv (str): Path where the processed CSV will be saved.
+        processed_csv (str): Path where the processed dataset will be saved.
     """
 
     original_csv: str
     processed_csv: str
 
+    REQUIRED_COLUMNS = {'MAL_ID', 'Name', 'Genres', 'sypnopsis'}
+    # Processed columns: MAL_ID as the stable document key, metadata fields and content
+    OUTPUT_COLUMNS = ['MAL_ID', 'Name', 'Score', 'Genres', 'combined_info']
+
     def __init__(self, original_csv: str, processed_csv: str) -> None:
 
         """
@@ -26,7 +102,8 @@ class AnimeDataloader:
 
         Args:
             original_csv (str): Path to the raw anime dataset CSV file.
-            processed_csv (str): Path where the cleaned and processed CSV will be saved.
+            processed_csv (str): Path where the cleaned and processed dataset will be
+                saved; .csv, .arrow, .feather or .parquet.
         """
 
         self.original_csv = original_csv
@@ -38,7 +115,7 @@ class AnimeDataloader:
         Loads a CSV file, cleans missing data, and creates a 'combined_info' column.
 
         Returns:
-            str: The path to the saved processed CSV file.
+            str: The path to the saved processed dataset.
 
         Raises:
             CustomException: If loading, processing, or saving fails.
@@ -56,29 +133,10 @@ class AnimeDataloader:
 
             logging.info("Successfully loaded and cleaned CSV data.")
 
-            # Check required columns
-            required_cols = {'Name', 'Genres', 'sypnopsis'}
-            missing = required_cols - set(df.columns)
-
-            if missing:
-                logging.error(f"Missing columns in CSV: {missing}")
-                raise ValueError(f"Missing required columns: {missing}")
-
-            logging.info("All required columns are present.")
-
-            # Combine info
-            try:
-                df['combined_info'] = (
-                    "Title: " + df['Name'].astype(str) +
-                    " .. Overview: " + df['sypnopsis'].astype(str) +
-                    " Genres: " + df['Genres'].astype(str)
-                )
-            except KeyError as key_err:
-                logging.exception("Key error while creating 'combined_info' column.")
-                raise CustomException("Error during combined_info generation", key_err)
-
-            # Save processed data
-            df[['combined_info']].to_csv(self.processed_csv, index=False, encoding='utf-8')
+            df = self._process(df)
+
+            # Save processed data, keeping MAL_ID as the stable document key and metadata fields
+            self._save(df)
             logging.info(f"Processed data saved to: {self.processed_csv}")
 
             return self.processed_csv
@@ -90,7 +148,111 @@ class AnimeDataloader:
         except Exception as e:
             logging.exception("An error occurred during data loading or processing.")
             raise CustomException("Failed to load and process anime data", e)
-        
+
+    def iter_documents(self, chunksize: int = 5000) -> Iterator[Document]:
+        """
+        Streams the processed rows as documents, reading the input CSV in chunks.
+
+        Each chunk is cleaned, validated and transformed like ``load_and_process``
+        and then released, so memory stays bounded by the chunk size whatever the
+        size of the input. No processed CSV is written. Documents carry
+        combined_info as content and MAL_ID, Name, Score and Genres as metadata,
+        exactly as CSVLoader reads them back from the processed CSV.
+
+        Args:
+            chunksize (int, optional): Rows read per chunk. Defaults to 5000.
+
+        Yields:
+            Document: One document per valid row.
+
+        Raises:
+            CustomException: If reading or processing a chunk fails.
+        """
+        logging.info(f"Streaming data from: {self.original_csv} in chunks of {chunksize} rows")
+
+        try:
+            row = 0
+            reader = pd.read_csv(self.original_csv, encoding='utf-8', on_bad_lines='skip', chunksize=chunksize)
+            with reader:
+                for chunk in reader:
+                    df = self._process(chunk.dropna())
+                    for record in df.to_dict('records'):
+                        metadata = {column: record[column] for column in self.OUTPUT_COLUMNS[:-1]}
+                        metadata.update(source=self.original_csv, row=row)
+                        row += 1
+                        # Same content format as CSVLoader, so chunk IDs match a build from the processed CSV
+                        content = f"combined_info: {str(record['combined_info']).strip()}"
+                        yield Document(page_content=content, metadata=metadata)
+
+            logging.info(f"Streamed {row} documents from: {self.original_csv}")
+
+        except FileNotFoundError as fnf_err:
+            logging.error(f"File not found: {fnf_err}")
+            raise CustomException("Input CSV file not found", fnf_err)
+
+        except Exception as e:
+            logging.exception("An error occurred while streaming anime data.")
+            raise CustomException("Failed to stream anime data", e)
+
+    def _save(self, df: pd.DataFrame) -> None:
+        """
+        Writes processed rows in the format given by the output path's extension.
+
+        Arrow IPC files are written uncompressed, so readers can memory-map
+        them without decoding.
+
+        Args:
+            df (pd.DataFrame): Processed rows.
+        """
+        fmt = processed_format(self.processed_csv)
+        if fmt == "csv":
+            df.to_csv(self.processed_csv, index=False, encoding='utf-8')
+            return
+
+        df = df.assign(Genres=df['Genres'].astype(str).map(split_genres))
+        table = lazy_import("pyarrow").Table.from_pandas(df, preserve_index=False)
+        if fmt == "arrow":
+            lazy_import("pyarrow.feather").write_feather(table, self.processed_csv, compression="uncompressed")
+        else:
+            lazy_import("pyarrow.parquet").write_table(table, self.processed_csv)
+
+    def _process(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Validates cleaned rows and builds the processed columns.
+
+        Args:
+            df (pd.DataFrame): Raw rows without missing values.
+
+        Returns:
+            pd.DataFrame: The MAL_ID, Name, Score, Genres and combined_info columns.
+
+        Raises:
+            ValueError: If required columns are missing.
+            CustomException: If combined_info cannot be built.
+        """
+        # Check required columns
+        missing = self.REQUIRED_COLUMNS - set(df.columns)
+
+        if missing:
+            logging.error(f"Missing columns in CSV: {missing}")
+            raise ValueError(f"Missing required columns: {missing}")
+
+        # Combine info
+        try:
+            df = df.assign(combined_info=(
+                "Title: " + df['Name'].astype(str) +
+                " .. Overview: " + df['sypnopsis'].astype(str) +
+                " Genres: " + df['Genres'].astype(str)
+            ))
+        except KeyError as key_err:
+            logging.exception("Key error while creating 'combined_info' column.")
+            raise CustomException("Error during combined_info generation", key_err)
+
+        # Non-numeric scores (e.g. "Unknown") become missing values
+        df['Score'] = pd.to_numeric(df['Score'], errors='coerce') if 'Score' in df else float('nan')
+
+        return df[self.OUTPUT_COLUMNS]
+
 
 if __name__ == "__main__":
     from utils.logger import get_logger
@@ -0,0 +1,277 @@
+import hashlib
+import json
+import os
+import unicodedata
+from typing import Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from utils.logger import logging
+from utils.custom_exception import CustomException
+
+
+def normalize_text(text: str) -> str:
+    """
+    Normalizes text before hashing so that trivially different strings share a key.
+
+    Args:
+        text (str): Raw text.
+
+    Returns:
+        str: NFC-normalized text with whitespace collapsed.
+    """
+    return " ".join(unicodedata.normalize("NFC", text).split())
+
+
+class EmbeddingCache:
+    """
+    Persistent embedding cache keyed by (model name, normalized text hash).
+
+    Vectors live in a float32 memory-mapped matrix (``embeddings.f32``) and the
+    key-to-row mapping plus LRU bookkeeping in ``index.json``. When the cache
+    reaches ``max_entries`` the least recently used rows are evicted and reused.
+
+    Attributes:
+        cache_dir (str): Directory holding the cache files.
+        max_entries (int): Maximum number of cached vectors.
+    """
+
+    cache_dir: str
+    max_entries: int
+
+    INDEX_FILE = "index.json"
+    DATA_FILE = "embeddings.f32"
+
+    def __init__(self, cache_dir: str, max_entries: int = 200_000) -> None:
+        """
+        Opens (or creates) the cache in ``cache_dir``.
+
+        Args:
+            cache_dir (str): Directory for the cache files.
+            max_entries (int, optional): Size bound of the cache. Defaults to 200000.
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+
+        self.cache_dir = cache_dir
+        self.max_entries = max_entries
+        self._dim: Optional[int] = None
+        self._capacity = 0
+        self._tick = 0
+        self._entries: dict[str, list[int]] = {}  # key -> [row, last_used_tick]
+        self._free_rows: list[int] = []
+        self._matrix: Optional[np.memmap] = None
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._load()
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        """
+        Builds the cache key for a text embedded by a given model.
+
+        Args:
+            model_name (str): Embedding model name.
+            text (str): Raw text.
+
+        Returns:
+            str: Cache key.
+        """
+        digest = hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+        return f"{model_name}:{digest}"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """
+        Looks up a vector and marks it as recently used.
+
+        Args:
+            key (str): Cache key from ``make_key``.
+
+        Returns:
+            Optional[np.ndarray]: A copy of the cached vector, or None on a miss.
+        """
+        entry = self._entries.get(key)
+        if entry is None or self._matrix is None:
+            return None
+        self._tick += 1
+        entry[1] = self._tick
+        return np.array(self._matrix[entry[0]])
+
+    def put(self, key: str, vector: list[float]) -> None:
+        """
+        Stores a vector, evicting least recently used entries if the cache is full.
+
+        Args:
+            key (str): Cache key from ``make_key``.
+            vector (list[float]): Embedding to store.
+        """
+        array = np.asarray(vector, dtype=np.float32)
+        if self._dim is None:
+            self._dim = int(array.shape[0])
+        elif array.shape[0] != self._dim:
+            raise ValueError(f"Expected embedding of size {self._dim}, got {array.shape[0]}.")
+
+        self._tick += 1
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = [self._allocate_row(), self._tick]
+            self._entries[key] = entry
+        else:
+            entry[1] = self._tick
+
+        assert self._matrix is not None
+        self._matrix[entry[0]] = array
+
+    def flush(self) -> None:
+        """
+        Persists the vectors and the index. The index is replaced atomically.
+        """
+        if self._matrix is not None:
+            self._matrix.flush()
+
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        tmp_path = index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({
+                "dim": self._dim,
+                "capacity": self._capacity,
+                "tick": self._tick,
+                "entries": self._entries,
+                "free_rows": self._free_rows,
+            }, f)
+        os.replace(tmp_path, index_path)
+
+    def _load(self) -> None:
+        index_path = os.path.join(self.cache_dir, self.INDEX_FILE)
+        if not os.path.exists(index_path):
+            return
+
+        try:
+            with open(index_path, encoding="utf-8") as f:
+                index = json.load(f)
+            self._dim = index["dim"]
+            self._capacity = index["capacity"]
+            self._tick = index["tick"]
+            self._entries = index["entries"]
+            self._free_rows = index["free_rows"]
+            if self._dim and self._capacity:
+                self._matrix = self._open_matrix(self._capacity)
+            logging.info(f"Loaded embedding cache with {len(self._entries)} entries from: {self.cache_dir}")
+        except Exception as e:
+            logging.exception("Failed to load embedding cache.")
+            raise CustomException(f"Embedding cache at {self.cache_dir} is corrupted", e)
+
+    def _open_matrix(self, capacity: int) -> np.memmap:
+        assert self._dim is not None
+        data_path = os.path.join(self.cache_dir, self.DATA_FILE)
+        mode = "r+" if os.path.exists(data_path) else "w+"
+        if mode == "r+" and os.path.getsize(data_path) < capacity * self._dim * 4:
+            with open(data_path, "r+b") as f:
+                f.truncate(capacity * self._dim * 4)
+        return np.memmap(data_path, dtype=np.float32, mode=mode, shape=(capacity, self._dim))
+
+    def _allocate_row(self) -> int:
+        if self._free_rows:
+            return self._free_rows.pop()
+
+        used = len(self._entries)
+        if used < self._capacity:
+            return used
+
+        if self._capacity < self.max_entries:
+            # Grow the backing file geometrically up to the size bound
+            new_capacity = min(self.max_entries, max(1024, self._capacity * 2))
+            if self._matrix is not None:
+                self._matrix.flush()
+            self._matrix = self._open_matrix(new_capacity)
+            self._capacity = new_capacity
+            return used
+
+        self._evict(max(1, self.max_entries // 10))
+        return self._free_rows.pop()
+
+    def _evict(self, count: int) -> None:
+        victims = sorted(self._entries.items(), key=lambda item: item[1][1])[:count]
+        for key, (row, _) in victims:
+            del self._entries[key]
+            self._free_rows.append(row)
+        logging.info(f"Evicted {len(victims)} least recently used entries from embedding cache.")
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper that serves vectors from an EmbeddingCache and only calls
+    the wrapped model for texts it has not seen before.
+
+    Attributes:
+        embedding (Embeddings): The wrapped embedding model.
+        cache (EmbeddingCache): The persistent cache.
+        model_name (str): Model name used in cache keys.
+        hits (int): Number of texts served from the cache.
+        misses (int): Number of texts sent to the model.
+    """
+
+    def __init__(self, embedding: Embeddings, cache: EmbeddingCache, model_name: Optional[str] = None) -> None:
+        """
+        Args:
+            embedding (Embeddings): Embedding model to wrap.
+            cache (EmbeddingCache): Cache to read from and write to.
+            model_name (str, optional): Name used in cache keys. Defaults to the
+                wrapped model's ``model_name`` attribute or its class name.
+        """
+        self.embedding = embedding
+        self.cache = cache
+        self.model_name = model_name or getattr(embedding, "model_name", type(embedding).__name__)
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embeds documents, computing only cache misses with the wrapped model.
+
+        Args:
+            texts (list[str]): Texts to embed.
+
+        Returns:
+            list[list[float]]: One embedding per input text, in input order.
+        """
+        keys = [EmbeddingCache.make_key(self.model_name, text) for text in texts]
+        vectors: list[Optional[list[float]]] = []
+        missing: dict[str, str] = {}
+
+        for key, text in zip(keys, texts):
+            cached = self.cache.get(key)
+            if cached is None:
+                missing.setdefault(key, text)
+                vectors.append(None)
+            else:
+                vectors.append(cached.tolist())
+
+        self.hits += len(texts) - sum(vector is None for vector in vectors)
+        self.misses += len(missing)
+        logging.info(f"Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} texts to embed.")
+
+        if missing:
+            computed = dict(zip(missing.keys(), self.embedding.embed_documents(list(missing.values()))))
+            for key, vector in computed.items():
+                self.cache.put(key, vector)
+            vectors = [vector if vector is not None else computed[key] for key, vector in zip(keys, vectors)]
+        self.cache.flush()
+
+        return vectors  # type: ignore[return-value]
+
+    def embed_query(self, text: str) -> list[float]:
+        """
+        Embeds a query with the wrapped model; queries are not persisted.
+
+        Args:
+            text (str): Query text.
+
+        Returns:
+            list[float]: The query embedding.
+        """
+        return self.embedding.embed_query(text)
@@ -0,0 +1,337 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import partial
+from multiprocessing import get_context
+from typing import Callable, Optional
+
+from langchain_core.embeddings import Embeddings
+
+from utils.logger import logging
+from utils.startup import STARTUP_REPORT
+from utils.custom_exception import CustomException
+
+# Model instance owned by each worker process, created once by _init_worker
+_worker_model: Optional[Embeddings] = None
+
+
+def _default_factory(model_name: str) -> Embeddings:
+    """Creates the HuggingFace embedding model in the calling process."""
+    from langchain_huggingface import HuggingFaceEmbeddings
+    return HuggingFaceEmbeddings(model_name=model_name)
+
+
+def _init_worker(embedding_factory: Callable[[], Embeddings], torch_threads: int) -> None:
+    """
+    Loads the embedding model once per worker process and pins its thread count
+    so that the workers together do not oversubscribe the CPU.
+    """
+    global _worker_model
+    try:
+        import torch
+        torch.set_num_threads(torch_threads)
+    except ImportError:
+        pass
+    _worker_model = embedding_factory()
+
+
+def _embed_shard(shard_index: int, texts: list[str]) -> tuple[int, list[list[float]]]:
+    """Embeds one shard in a worker and returns it tagged with its position."""
+    assert _worker_model is not None, "Worker process was not initialized."
+    return shard_index, _worker_model.embed_documents(texts)
+
+
+def embedding_model_name(
+    backend: str = "torch",
+    model_name: str = "all-MiniLM-L6-v2",
+    onnx_model_dir: Optional[str] = None,
+    onnx_quantized: bool = True
+) -> str:
+    """
+    Returns the name identifying the configured embedding model in cache keys.
+
+    Args:
+        backend (str, optional): "torch" or "onnx". Defaults to "torch".
+        model_name (str, optional): HuggingFace model name for the torch backend.
+        onnx_model_dir (str, optional): Exported model directory for the onnx backend.
+        onnx_quantized (bool, optional): Use the int8 ONNX model. Defaults to True.
+
+    Returns:
+        str: ``model_name`` for torch, a distinct name per ONNX variant otherwise.
+    """
+    if backend == "onnx":
+        from src.onnx_embeddings import onnx_model_name
+        return onnx_model_name(str(onnx_model_dir), onnx_quantized)
+    return model_name
+
+
+def embedding_factory(
+    backend: str = "torch",
+    model_name: str = "all-MiniLM-L6-v2",
+    onnx_model_dir: Optional[str] = None,
+    onnx_quantized: bool = True,
+    num_threads: Optional[int] = None
+) -> Callable[[], Embeddings]:
+    """
+    Returns a picklable factory for the configured embedding backend, usable
+    in worker processes and by LazyEmbeddings.
+
+    Args:
+        backend (str, optional): "torch" (sentence-transformers) or "onnx". Defaults to "torch".
+        model_name (str, optional): HuggingFace model name for the torch backend.
+        onnx_model_dir (str, optional): Exported model directory for the onnx backend.
+        onnx_quantized (bool, optional): Use the int8 ONNX model. Defaults to True.
+        num_threads (int, optional): onnxruntime threads per model, e.g. to share
+            the CPU between build workers.
+
+    Returns:
+        Callable[[], Embeddings]: Factory creating the model.
+
+    Raises:
+        ValueError: If the backend is unknown or the ONNX directory is missing.
+    """
+    if backend == "torch":
+        return partial(_default_factory, model_name)
+    if backend == "onnx":
+        if not onnx_model_dir:
+            raise ValueError("The onnx embedding backend requires onnx_model_dir.")
+        from src.onnx_embeddings import OnnxEmbeddings
+        return partial(OnnxEmbeddings, onnx_model_dir, onnx_quantized, num_threads=num_threads)
+    raise ValueError(f"Unknown embedding backend: {backend}. Expected 'torch' or 'onnx'.")
+
+
+def create_embeddings(
+    backend: str = "torch",
+    model_name: str = "all-MiniLM-L6-v2",
+    onnx_model_dir: Optional[str] = None,
+    onnx_quantized: bool = True
+) -> "LazyEmbeddings":
+    """
+    Creates the query-time embedding model for the configured backend; the
+    model itself loads on first use.
+
+    Args:
+        backend (str, optional): "torch" or "onnx". Defaults to "torch".
+        model_name (str, optional): HuggingFace model name for the torch backend.
+        onnx_model_dir (str, optional): Exported model directory for the onnx backend.
+        onnx_quantized (bool, optional): Use the int8 ONNX model. Defaults to True.
+
+    Returns:
+        LazyEmbeddings: The lazily loaded model.
+    """
+    return LazyEmbeddings(
+        model_name=embedding_model_name(backend, model_name, onnx_model_dir, onnx_quantized),
+        factory=embedding_factory(backend, model_name, onnx_model_dir, onnx_quantized)
+    )
+
+
+class LazyEmbeddings(Embeddings):
+    """
+    Embedding model that is created on first use instead of at construction,
+    so importing and wiring the pipeline does not load sentence-transformers
+    and torch. The load time is recorded in the startup report.
+
+    Attributes:
+        model_name (str): Model name, also used in embedding cache keys.
+    """
+
+    model_name: str
+
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", factory: Optional[Callable[[], Embeddings]] = None) -> None:
+        """
+        Args:
+            model_name (str, optional): Model name, also used in embedding cache keys.
+            factory (Callable, optional): Creates the model; defaults to
+                HuggingFaceEmbeddings for ``model_name``.
+        """
+        self.model_name = model_name
+        self._factory = factory or partial(_default_factory, model_name)
+        self._model: Optional[Embeddings] = None
+
+    def load(self) -> Embeddings:
+        """
+        Returns the underlying model, loading it on the first call.
+
+        Returns:
+            Embeddings: The loaded HuggingFace embedding model.
+        """
+        if self._model is None:
+            with STARTUP_REPORT.timed(f"load embedding model {self.model_name}"):
+                self._model = self._factory()
+            logging.info(f"Loaded embedding model: {self.model_name}")
+        return self._model
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.load().embed_documents(texts)
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.load().embed_query(text)
+
+
+class ParallelEmbeddingEngine(Embeddings):
+    """
+    Build-time embedding engine that shards documents into batches and embeds
+    them on a pool of worker processes, each holding its own model copy.
+
+    Attributes:
+        batch_size (int): Number of texts per shard sent to a worker.
+        num_workers (int): Number of worker processes; 1 embeds in-process.
+        last_throughput (float): Documents per second of the last embed_documents call.
+        total_documents (int): Documents embedded since the engine was opened.
+        total_seconds (float): Time spent embedding them.
+
+    Used as a context manager, the engine starts its worker pool once and
+    reuses it for every batch until the block exits; outside a ``with`` block
+    each multi-shard call starts and stops its own pool.
+    """
+
+    batch_size: int
+    num_workers: int
+    last_throughput: float
+    total_documents: int
+    total_seconds: float
+
+    def __init__(
+        self,
+        model_name: str = "all-MiniLM-L6-v2",
+        batch_size: int = 64,
+        num_workers: Optional[int] = None,
+        embedding_factory: Optional[Callable[[], Embeddings]] = None
+    ) -> None:
+        """
+        Initializes the engine. Models are loaded lazily, inside the workers.
+
+        Args:
+            model_name (str, optional): HuggingFace sentence-transformer model name.
+            batch_size (int, optional): Texts per shard. Defaults to 64.
+            num_workers (int, optional): Worker processes. Defaults to the CPU count.
+            embedding_factory (Callable, optional): Picklable zero-argument callable
+                returning the Embeddings used inside each worker. Defaults to
+                HuggingFaceEmbeddings for ``model_name``.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1.")
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.num_workers = max(1, num_workers or os.cpu_count() or 1)
+        self.embedding_factory = embedding_factory or partial(_default_factory, model_name)
+        self.last_throughput = 0.0
+        self.total_documents = 0
+        self.total_seconds = 0.0
+        self._local_model: Optional[Embeddings] = None
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._keep_pool = False
+        logging.info(
+            f"ParallelEmbeddingEngine initialized with model: {model_name}, "
+            f"batch_size: {self.batch_size}, num_workers: {self.num_workers}"
+        )
+
+    def __enter__(self) -> "ParallelEmbeddingEngine":
+        """Keeps the worker pool alive across calls and resets the totals."""
+        self._keep_pool = True
+        self.total_documents = 0
+        self.total_seconds = 0.0
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @property
+    def throughput(self) -> float:
+        """Documents per second over every call since the engine was opened."""
+        if self.total_seconds <= 0:
+            return 0.0
+        return self.total_documents / self.total_seconds
+
+    def close(self) -> None:
+        """Shuts down the worker pool, if one is running."""
+        self._keep_pool = False
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embeds documents in batches across the worker pool, preserving input order.
+
+        Args:
+            texts (list[str]): Texts to embed.
+
+        Returns:
+            list[list[float]]: One embedding per input text, in input order.
+
+        Raises:
+            CustomException: If any shard fails to embed.
+        """
+        if not texts:
+            return []
+
+        try:
+            start = time.perf_counter()
+            shards = [texts[i:i + self.batch_size] for i in range(0, len(texts), self.batch_size)]
+            # A running pool serves small batches too; only a cold start is avoided for them
+            workers = self.num_workers if self._keep_pool else min(self.num_workers, len(shards))
+
+            if workers == 1:
+                model = self._get_local_model()
+                results = [model.embed_documents(shard) for shard in shards]
+            else:
+                results = self._embed_in_pool(shards, workers)
+
+            embeddings = [vector for shard_result in results for vector in shard_result]
+
+            elapsed = time.perf_counter() - start
+            self.last_throughput = len(texts) / elapsed if elapsed > 0 else float("inf")
+            self.total_documents += len(texts)
+            self.total_seconds += elapsed
+            logging.info(
+                f"Embedded {len(texts)} documents in {elapsed:.2f}s using {workers} worker(s) "
+                f"({self.last_throughput:.1f} docs/sec)."
+            )
+            return embeddings
+
+        except Exception as e:
+            logging.exception("Parallel embedding failed.")
+            raise CustomException("Failed to embed documents", e)
+
+    def embed_query(self, text: str) -> list[float]:
+        """
+        Embeds a single query in the current process.
+
+        Args:
+            text (str): Query text.
+
+        Returns:
+            list[float]: The query embedding.
+        """
+        return self._get_local_model().embed_query(text)
+
+    def _embed_in_pool(self, shards: list[list[str]], workers: int) -> list[list[list[float]]]:
+        results: list[list[list[float]]] = [[] for _ in shards]
+        pool = self._get_pool(workers)
+        try:
+            futures = [pool.submit(_embed_shard, index, shard) for index, shard in enumerate(shards)]
+            for future in as_completed(futures):
+                shard_index, vectors = future.result()
+                results[shard_index] = vectors
+        finally:
+            if not self._keep_pool:
+                self.close()
+
+        return results
+
+    def _get_pool(self, workers: int) -> ProcessPoolExecutor:
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.embedding_factory, max(1, (os.cpu_count() or 1) // workers))
+            )
+        return self._pool
+
+    def _get_local_model(self) -> Embeddings:
+        if self._local_model is None:
+            self._local_model = self.embedding_factory()
+        return self._local_model
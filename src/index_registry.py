@@ -0,0 +1,150 @@
+import os
+import shutil
+import time
+import uuid
+from typing import Optional
+
+from utils.logger import logging
+
+
+class IndexRegistry:
+    """
+    Versioned index directories under one root with an atomic "current" pointer.
+
+    Every build writes a complete index (vector store, lexical index, neighbor
+    table) into its own directory ``<root>/versions/<version>`` and then
+    publishes it by atomically replacing the ``<root>/CURRENT`` file. Readers
+    resolve the pointer once per load and never see a half-written index, and
+    the previous versions stay on disk for in-flight readers until pruned.
+
+    A root without a CURRENT file is treated as a legacy flat index and served
+    from the root directory itself.
+
+    Attributes:
+        root (str): Root directory of the registry.
+    """
+
+    CURRENT_FILE = "CURRENT"
+    VERSIONS_DIR = "versions"
+
+    def __init__(self, root: str) -> None:
+        """
+        Args:
+            root (str): Root directory, e.g. "chroma_db".
+        """
+        self.root = root
+
+    def version_dir(self, version: str) -> str:
+        """
+        Args:
+            version (str): Version name.
+
+        Returns:
+            str: Directory of the version.
+        """
+        return os.path.join(self.root, self.VERSIONS_DIR, version)
+
+    def current(self) -> Optional[str]:
+        """
+        Returns:
+            Optional[str]: The published version, or None if nothing was published.
+        """
+        try:
+            with open(os.path.join(self.root, self.CURRENT_FILE), encoding="utf-8") as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def current_dir(self) -> str:
+        """
+        Returns:
+            str: Directory of the published version, or the root for a legacy flat index.
+        """
+        version = self.current()
+        return self.version_dir(version) if version else self.root
+
+    def versions(self) -> list[str]:
+        """
+        Returns:
+            list[str]: Existing version names, oldest first.
+        """
+        try:
+            return sorted(os.listdir(os.path.join(self.root, self.VERSIONS_DIR)))
+        except FileNotFoundError:
+            return []
+
+    def create_version(self, seed_from_current: bool = False) -> tuple[str, str]:
+        """
+        Creates the directory for a new, unpublished version.
+
+        Args:
+            seed_from_current (bool, optional): Start from a copy of the current index,
+                so an incremental build only applies the diff. Defaults to False.
+
+        Returns:
+            tuple[str, str]: The version name and its directory.
+        """
+        version = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        path = self.version_dir(version)
+        source = self.current_dir()
+        if seed_from_current and os.path.isdir(source):
+            shutil.copytree(source, path, ignore=shutil.ignore_patterns(self.VERSIONS_DIR, self.CURRENT_FILE))
+            logging.info(f"Created index version {version} from a copy of {source}")
+        else:
+            os.makedirs(path)
+            logging.info(f"Created empty index version {version}")
+        return version, path
+
+    def publish(self, version: str) -> None:
+        """
+        Atomically points CURRENT at a fully built version.
+
+        Args:
+            version (str): Version to serve.
+
+        Raises:
+            FileNotFoundError: If the version directory does not exist.
+        """
+        if not os.path.isdir(self.version_dir(version)):
+            raise FileNotFoundError(f"Index version {version} does not exist in {self.root}")
+        path = os.path.join(self.root, self.CURRENT_FILE)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(version)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(path + ".tmp", path)
+        logging.info(f"Published index version {version}")
+
+    def discard(self, version: str) -> None:
+        """
+        Deletes an unpublished version, e.g. after a failed build.
+
+        Args:
+            version (str): Version to delete.
+
+        Raises:
+            ValueError: If the version is the current one.
+        """
+        if version == self.current():
+            raise ValueError(f"Cannot discard the current index version {version}")
+        shutil.rmtree(self.version_dir(version), ignore_errors=True)
+
+    def prune(self, keep: int = 3) -> list[str]:
+        """
+        Deletes old versions, keeping the current one and the ``keep`` newest.
+
+        Args:
+            keep (int, optional): Newest versions kept, so readers that have not
+                swapped yet keep a valid directory. Serving pipelines close a
+                replaced index once its last request finishes. Defaults to 3.
+
+        Returns:
+            list[str]: The deleted versions.
+        """
+        current = self.current()
+        stale = [version for version in self.versions()[:-keep or None] if version != current]
+        for version in stale:
+            shutil.rmtree(self.version_dir(version), ignore_errors=True)
+        if stale:
+            logging.info(f"Pruned index versions: {stale}")
+        return stale
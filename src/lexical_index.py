@@ -0,0 +1,293 @@
+import json
+import math
+import os
+import re
+from typing import Optional
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from src.metadata_index import MetadataIndex, SearchFilter
+from src.query_cache import CachingRetriever
+from utils.logger import logging
+from utils.custom_exception import CustomException
+from utils.metrics import stage
+
+_TOKEN = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its like me of on or "
+    "something that the this to was with".split()
+)
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Splits text into lowercase word tokens, dropping common stopwords.
+
+    Args:
+        text (str): Text to tokenize.
+
+    Returns:
+        list[str]: Tokens in order of appearance.
+    """
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS]
+
+
+class LexicalIndex:
+    """
+    Compact BM25 inverted index over document titles and synopses.
+
+    Postings are stored CSR-style: one int32 row array and one float32 weight
+    array for all terms, with per-term offsets. Each weight is the complete BM25
+    contribution of the term to that row (IDF and length normalization are
+    applied at build time), so scoring a query is a handful of scatter-adds
+    followed by a partial sort. Titles are indexed with extra weight so exact
+    title and character-name queries rank their anime first.
+
+    Attributes:
+        documents (list[Document]): Indexed documents in row order.
+        metadata_index (MetadataIndex): Genre and score index over the same rows.
+    """
+
+    INDEX_FILE = "lexical_index.npz"
+    DOCUMENTS_FILE = "lexical_documents.json"
+
+    # Standard BM25 parameters and the term-frequency multiplier for title tokens
+    K1 = 1.2
+    B = 0.75
+    TITLE_WEIGHT = 3
+
+    def __init__(
+        self,
+        terms: list[str],
+        offsets: np.ndarray,
+        rows: np.ndarray,
+        weights: np.ndarray,
+        documents: list[Document]
+    ) -> None:
+        self.documents = documents
+        self.metadata_index = MetadataIndex.build(documents)
+        self._term_ids = {term: index for index, term in enumerate(terms)}
+        self._offsets = offsets
+        self._rows = rows
+        self._weights = weights
+
+    @classmethod
+    def build(cls, documents: list[Document]) -> "LexicalIndex":
+        """
+        Tokenizes the documents and precomputes BM25 weights for every posting.
+
+        Args:
+            documents (list[Document]): Documents with "Name" metadata and the synopsis as content.
+
+        Returns:
+            LexicalIndex: The built index.
+        """
+        postings: dict[str, dict[int, int]] = {}
+        lengths = np.zeros(len(documents), dtype=np.float32)
+        for row, document in enumerate(documents):
+            tokens = tokenize(document.page_content)
+            tokens += tokenize(str(document.metadata.get("Name") or "")) * cls.TITLE_WEIGHT
+            lengths[row] = len(tokens)
+            for token in tokens:
+                counts = postings.setdefault(token, {})
+                counts[row] = counts.get(row, 0) + 1
+
+        num_docs = len(documents)
+        average_length = float(lengths.mean()) if num_docs else 0.0
+        norms = cls.K1 * (1 - cls.B + cls.B * lengths / (average_length or 1.0))
+
+        terms = sorted(postings)
+        offsets = np.zeros(len(terms) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[term]) for term in terms])
+        rows = np.empty(offsets[-1], dtype=np.int32)
+        weights = np.empty(offsets[-1], dtype=np.float32)
+        for index, term in enumerate(terms):
+            term_rows = np.fromiter(postings[term].keys(), dtype=np.int32)
+            tf = np.fromiter(postings[term].values(), dtype=np.float32)
+            idf = math.log(1 + (num_docs - len(term_rows) + 0.5) / (len(term_rows) + 0.5))
+            rows[offsets[index]:offsets[index + 1]] = term_rows
+            weights[offsets[index]:offsets[index + 1]] = idf * tf * (cls.K1 + 1) / (tf + norms[term_rows])
+
+        logging.info(f"Built lexical index with {len(terms)} terms and {len(rows)} postings.")
+        return cls(terms=terms, offsets=offsets, rows=rows, weights=weights, documents=documents)
+
+    def search(
+        self, query: str, k: int = 4, search_filter: Optional[SearchFilter] = None
+    ) -> list[tuple[Document, float]]:
+        """
+        Returns the k best BM25 matches for a query.
+
+        Args:
+            query (str): Free-text query.
+            k (int, optional): Number of results. Defaults to 4.
+            search_filter (SearchFilter, optional): Genre and score constraints.
+
+        Returns:
+            list[tuple[Document, float]]: Documents and BM25 scores, best first;
+                documents sharing no term with the query are omitted.
+        """
+        scores = np.zeros(len(self.documents), dtype=np.float32)
+        for token in set(tokenize(query)):
+            index = self._term_ids.get(token)
+            if index is not None:
+                start, end = self._offsets[index], self._offsets[index + 1]
+                scores[self._rows[start:end]] += self._weights[start:end]
+
+        candidates = self.metadata_index.candidates(search_filter)
+        if candidates is not None:
+            masked = np.zeros_like(scores)
+            masked[candidates] = scores[candidates]
+            scores = masked
+
+        k = min(k, int(np.count_nonzero(scores)))
+        if k < 1:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self.documents[row], float(scores[row])) for row in top]
+
+    def save(self, directory: str) -> None:
+        """
+        Persists the index next to the vector store.
+
+        Args:
+            directory (str): Target directory.
+        """
+        os.makedirs(directory, exist_ok=True)
+        index_path = os.path.join(directory, self.INDEX_FILE)
+        documents_path = os.path.join(directory, self.DOCUMENTS_FILE)
+        terms = sorted(self._term_ids, key=self._term_ids.__getitem__)
+        with open(index_path + ".tmp", "wb") as f:
+            np.savez(f, terms=np.array(terms, dtype=str), offsets=self._offsets,
+                     rows=self._rows, weights=self._weights)
+        with open(documents_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump([{"page_content": d.page_content, "metadata": d.metadata} for d in self.documents], f)
+        os.replace(index_path + ".tmp", index_path)
+        os.replace(documents_path + ".tmp", documents_path)
+        logging.info(f"Saved lexical index to: {directory}")
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["LexicalIndex"]:
+        """
+        Loads a persisted index.
+
+        Args:
+            directory (str): Directory written by ``save``.
+
+        Returns:
+            Optional[LexicalIndex]: The index, or None if the directory has none.
+
+        Raises:
+            CustomException: If the index files are corrupted.
+        """
+        index_path = os.path.join(directory, cls.INDEX_FILE)
+        if not os.path.exists(index_path):
+            return None
+        try:
+            with open(os.path.join(directory, cls.DOCUMENTS_FILE), encoding="utf-8") as f:
+                documents = [Document(**record) for record in json.load(f)]
+            with np.load(index_path) as data:
+                return cls(
+                    terms=data["terms"].tolist(),
+                    offsets=data["offsets"],
+                    rows=data["rows"],
+                    weights=data["weights"],
+                    documents=documents
+                )
+        except Exception as e:
+            logging.exception("Failed to load lexical index.")
+            raise CustomException(f"Failed to load lexical index from {directory}", e)
+
+
+def reciprocal_rank_fusion(rankings: list[list[Document]], k: int, rrf_k: int = 60) -> list[Document]:
+    """
+    Fuses ranked lists by summing 1 / (rrf_k + rank) per document.
+
+    Documents are matched across lists by their content; the first list a
+    document appears in supplies the returned instance.
+
+    Args:
+        rankings (list[list[Document]]): Ranked lists, best first.
+        k (int): Number of documents to return.
+        rrf_k (int, optional): Rank smoothing constant. Defaults to 60.
+
+    Returns:
+        list[Document]: The k best documents by fused score.
+    """
+    scores: dict[str, float] = {}
+    documents: dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, document in enumerate(ranking, start=1):
+            key = document.page_content
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank)
+            documents.setdefault(key, document)
+    best = sorted(scores, key=scores.__getitem__, reverse=True)[:k]
+    return [documents[key] for key in best]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Retriever fusing dense (embedding) and lexical (BM25) rankings with
+    reciprocal-rank fusion.
+
+    The dense retriever keeps its own embedding and result caches and should
+    fetch more than k candidates; both rankings share the genre and score filter
+    the dense retriever resolves for the query.
+
+    Attributes:
+        dense (CachingRetriever): Embedding retriever, fetching ``k`` or more candidates.
+        lexical_index (LexicalIndex): BM25 index over the same catalogue.
+        k (int): Number of documents returned.
+        fetch_k (int): Candidates taken from the lexical ranking.
+        rrf_k (int): Reciprocal-rank fusion smoothing constant.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    dense: CachingRetriever
+    lexical_index: LexicalIndex
+    k: int = 4
+    fetch_k: int = 20
+    rrf_k: int = 60
+
+    def embed_query(self, query: str) -> list[float]:
+        """
+        Embeds a query through the dense retriever's embedding cache.
+
+        Args:
+            query (str): User query.
+
+        Returns:
+            list[float]: The query embedding.
+        """
+        return self.dense.embed_query(query)
+
+    def prefetch(self, queries: list[str]) -> int:
+        """
+        Fills the dense retriever's caches for many queries in one batch.
+
+        Args:
+            queries (list[str]): User queries.
+
+        Returns:
+            int: Number of distinct queries that were retrieved.
+        """
+        return self.dense.prefetch(queries)
+
+    def close(self) -> None:
+        """Releases the dense retriever's vector store client."""
+        self.dense.close()
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        dense_documents = self.dense.invoke(query)
+        with stage("lexical_search"):
+            lexical = self.lexical_index.search(query, k=self.fetch_k, search_filter=self.dense.resolve_filter(query))
+        return reciprocal_rank_fusion(
+            [dense_documents, [document for document, _ in lexical]], k=self.k, rrf_k=self.rrf_k
+        )
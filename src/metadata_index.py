@@ -0,0 +1,296 @@
+import math
+import os
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from utils.logger import logging
+from utils.custom_exception import CustomException
+
+# Score threshold implied by phrases such as "highly rated" or "top rated"
+HIGHLY_RATED_SCORE = 8.0
+
+_HIGHLY_RATED = re.compile(r"\b(highly|top|best|well|critically)[\s-]+rated\b|\bacclaimed\b|\bmasterpiece")
+_SCORE_AT_LEAST = re.compile(
+    r"\b(?:score[sd]?|rated|rating)\s*(?:of\s*|above\s*|over\s*|at\s+least\s*|>=?\s*)?(\d+(?:\.\d+)?)\s*\+?"
+)
+# Negated or either/or phrasing cannot be expressed as an AND filter, so no filter is inferred
+_NEGATION = re.compile(
+    r"\b(?:not|no|non|without|except|excluding|avoid|never|hate|dislike|don'?t|doesn'?t|isn'?t)\b"
+    r"|\banything\s+but\b|\b(?:other|rather)\s+than\b|\binstead\s+of\b"
+)
+_DISJUNCTION = re.compile(r"\b(?:or|either)\b")
+_GENRE_ALIASES = {"scifi": "sci fi", "science fiction": "sci fi", "slice-of-life": "slice of life"}
+# Many one-word genres are everyday words ("great music", "space", "a game of wits"), so they
+# only count right before one of these nouns ("music anime") or after "genre" ("genre: music")
+_GENRE_NOUNS = r"(?:anime|animes|show|shows|series|movie|movies|film|films|title|titles|genre|genres)"
+
+
+def genre_key(text: str) -> str:
+    """
+    Normalizes a genre or query fragment for matching, e.g. "Sci-Fi" -> "sci fi".
+
+    Args:
+        text (str): Genre name or text.
+
+    Returns:
+        str: Lowercased text with punctuation replaced by single spaces.
+    """
+    return " ".join(re.sub(r"[^\w\s]", " ", text.lower()).split())
+
+
+@lru_cache(maxsize=8)
+def _genre_context(keys: tuple[str, ...]) -> re.Pattern:
+    """
+    Compiles the pattern matching genre lists in genre context, e.g. "action and
+    comedy anime" or "genre music", over text normalized with ``genre_key``.
+    """
+    genre = "|".join(re.escape(key) for key in sorted(keys, key=len, reverse=True))
+    genres = rf"(?:{genre})(?: (?:and |n )?(?:{genre}))*"
+    return re.compile(rf"(?<= )(?:({genres}) {_GENRE_NOUNS}|genres? ({genres}))(?= )")
+
+
+def chroma_genre_flag(genre: str) -> str:
+    """
+    Returns the boolean metadata key used to filter a genre in Chroma.
+
+    Args:
+        genre (str): Genre name.
+
+    Returns:
+        str: Metadata key, e.g. "genre_Sci-Fi".
+    """
+    return f"genre_{genre}"
+
+
+@dataclass(frozen=True)
+class SearchFilter:
+    """
+    Structured constraints applied before ranking.
+
+    Attributes:
+        genres (tuple[str, ...]): Genres a title must all have.
+        min_score (Optional[float]): Minimum MAL score, inclusive.
+    """
+
+    genres: tuple[str, ...] = ()
+    min_score: Optional[float] = None
+
+    def is_empty(self) -> bool:
+        """Returns True if the filter does not constrain anything."""
+        return not self.genres and self.min_score is None
+
+    def to_chroma_where(self) -> Optional[dict]:
+        """
+        Translates the filter into a Chroma ``where`` clause.
+
+        Returns:
+            Optional[dict]: The clause, or None for an empty filter.
+        """
+        clauses: list[dict[str, Any]] = [{chroma_genre_flag(genre): True} for genre in self.genres]
+        if self.min_score is not None:
+            clauses.append({"Score": {"$gte": self.min_score}})
+        if not clauses:
+            return None
+        return clauses[0] if len(clauses) == 1 else {"$and": clauses}
+
+
+def parse_query_filter(query: str, known_genres: list[str]) -> Optional[SearchFilter]:
+    """
+    Infers structured constraints from free text, e.g. "highly rated sci-fi" ->
+    genres=("Sci-Fi",), min_score=8.0.
+
+    Genres become an AND filter, so they are only inferred where the query
+    clearly names a genre: multi-word genres such as "slice of life" anywhere,
+    one-word genres only before a noun such as "anime" or "series" ("music
+    anime") or after "genre". Nothing is inferred from negated queries
+    ("anything but romance"), and no genres from either/or queries ("comedy or
+    drama"); those are left to the embedding ranking.
+
+    Args:
+        query (str): User query.
+        known_genres (list[str]): Genre vocabulary of the catalogue.
+
+    Returns:
+        Optional[SearchFilter]: The inferred filter, or None if nothing was recognized.
+    """
+    text = query.lower()
+    if _NEGATION.search(text):
+        return None
+    normalized = f" {genre_key(text)} "
+    for alias, target in _GENRE_ALIASES.items():
+        normalized = normalized.replace(f" {genre_key(alias)} ", f" {target} ")
+
+    genres: tuple[str, ...] = ()
+    keys = {genre_key(genre): genre for genre in known_genres if genre_key(genre)}
+    if keys and not _DISJUNCTION.search(text):
+        named = " ".join(
+            span for match in _genre_context(tuple(keys)).finditer(normalized) for span in match.groups() if span
+        )
+        genres = tuple(
+            genre for key, genre in keys.items()
+            if f" {key} " in (normalized if " " in key else f" {named} ")
+        )
+
+    min_score = None
+    match = _SCORE_AT_LEAST.search(text)
+    if match and 0 < float(match.group(1)) <= 10:
+        min_score = float(match.group(1))
+    elif _HIGHLY_RATED.search(text):
+        min_score = HIGHLY_RATED_SCORE
+
+    search_filter = SearchFilter(genres=genres, min_score=min_score)
+    return None if search_filter.is_empty() else search_filter
+
+
+class MetadataIndex:
+    """
+    Build-time indexes over typed document metadata for pre-filtered search.
+
+    Holds an inverted genre index (genre -> sorted row ids, stored CSR-style) and
+    a score index (row ids sorted by score), so a filter resolves to a candidate
+    row set with array intersections before any vector is scored.
+
+    Attributes:
+        genres (list[str]): Sorted genre vocabulary.
+        num_rows (int): Number of indexed rows.
+    """
+
+    INDEX_FILE = "metadata_index.npz"
+
+    def __init__(
+        self,
+        genres: list[str],
+        genre_offsets: np.ndarray,
+        genre_rows: np.ndarray,
+        score_rows: np.ndarray,
+        sorted_scores: np.ndarray,
+        num_rows: int
+    ) -> None:
+        self.genres = genres
+        self.num_rows = num_rows
+        self._genre_ids = {genre_key(genre): index for index, genre in enumerate(genres)}
+        self._genre_offsets = genre_offsets
+        self._genre_rows = genre_rows
+        self._score_rows = score_rows
+        self._sorted_scores = sorted_scores
+
+    @classmethod
+    def build(cls, documents: list[Document]) -> "MetadataIndex":
+        """
+        Builds the indexes from documents carrying "Genres" (list) and "Score" metadata.
+
+        Args:
+            documents (list[Document]): Documents in row order.
+
+        Returns:
+            MetadataIndex: The built index.
+        """
+        postings: dict[str, list[int]] = {}
+        scored_rows, scores = [], []
+        for row, document in enumerate(documents):
+            for genre in document.metadata.get("Genres") or []:
+                postings.setdefault(genre, []).append(row)
+            score = document.metadata.get("Score")
+            if isinstance(score, (int, float)) and not math.isnan(score):
+                scored_rows.append(row)
+                scores.append(score)
+
+        genres = sorted(postings)
+        offsets = np.zeros(len(genres) + 1, dtype=np.int64)
+        offsets[1:] = np.cumsum([len(postings[genre]) for genre in genres])
+        rows = np.array([row for genre in genres for row in postings[genre]], dtype=np.int32)
+
+        order = np.argsort(np.asarray(scores, dtype=np.float32), kind="stable")
+        return cls(
+            genres=genres,
+            genre_offsets=offsets,
+            genre_rows=rows,
+            score_rows=np.asarray(scored_rows, dtype=np.int32)[order],
+            sorted_scores=np.asarray(scores, dtype=np.float32)[order],
+            num_rows=len(documents)
+        )
+
+    def candidates(self, search_filter: Optional[SearchFilter]) -> Optional[np.ndarray]:
+        """
+        Resolves a filter to the sorted rows that satisfy it.
+
+        Args:
+            search_filter (Optional[SearchFilter]): Constraints to apply.
+
+        Returns:
+            Optional[np.ndarray]: Matching row ids, or None if the filter is empty.
+        """
+        if search_filter is None or search_filter.is_empty():
+            return None
+
+        result: Optional[np.ndarray] = None
+        for genre in search_filter.genres:
+            index = self._genre_ids.get(genre_key(genre))
+            if index is None:
+                return np.empty(0, dtype=np.int32)
+            rows = self._genre_rows[self._genre_offsets[index]:self._genre_offsets[index + 1]]
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+
+        if search_filter.min_score is not None:
+            start = int(np.searchsorted(self._sorted_scores, search_filter.min_score, side="left"))
+            rows = np.sort(self._score_rows[start:])
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+
+        return result
+
+    def save(self, directory: str) -> None:
+        """
+        Persists the index next to the vector store.
+
+        Args:
+            directory (str): Target directory.
+        """
+        path = os.path.join(directory, self.INDEX_FILE)
+        with open(path + ".tmp", "wb") as f:
+            np.savez(
+                f,
+                genres=np.array(self.genres, dtype=str),
+                genre_offsets=self._genre_offsets,
+                genre_rows=self._genre_rows,
+                score_rows=self._score_rows,
+                sorted_scores=self._sorted_scores,
+                num_rows=np.array(self.num_rows)
+            )
+        os.replace(path + ".tmp", path)
+        logging.info(f"Saved metadata index with {len(self.genres)} genres to: {directory}")
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["MetadataIndex"]:
+        """
+        Loads a persisted index.
+
+        Args:
+            directory (str): Directory written by ``save``.
+
+        Returns:
+            Optional[MetadataIndex]: The index, or None if the directory has none.
+
+        Raises:
+            CustomException: If the index file is corrupted.
+        """
+        path = os.path.join(directory, cls.INDEX_FILE)
+        if not os.path.exists(path):
+            return None
+        try:
+            with np.load(path) as data:
+                return cls(
+                    genres=data["genres"].tolist(),
+                    genre_offsets=data["genre_offsets"],
+                    genre_rows=data["genre_rows"],
+                    score_rows=data["score_rows"],
+                    sorted_scores=data["sorted_scores"],
+                    num_rows=int(data["num_rows"])
+                )
+        except Exception as e:
+            logging.exception("Failed to load metadata index.")
+            raise CustomException(f"Failed to load metadata index from {directory}", e)
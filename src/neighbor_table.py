@@ -0,0 +1,150 @@
+import json
+import os
+from typing import Optional
+
+import numpy as np
+from langchain_core.documents import Document
+
+from utils.logger import logging
+from utils.custom_exception import CustomException
+
+
+class NeighborTable:
+    """
+    Precomputed item-to-item table of the top-N most similar titles per MAL_ID.
+
+    Built once from the title embeddings with blocked matrix multiplications, so
+    a "more like this" lookup at query time is a dictionary access and an array
+    slice. Neighbors are stored as int32 rows and float16 similarities.
+
+    Attributes:
+        documents (list[Document]): One document per title, in row order.
+        neighbors (np.ndarray): Neighbor rows of shape (titles, top_n), best first.
+        scores (np.ndarray): Cosine similarities parallel to ``neighbors``.
+    """
+
+    TABLE_FILE = "neighbors.npz"
+    DOCUMENTS_FILE = "neighbor_documents.json"
+
+    # Rows of the similarity matrix computed per matmul
+    BLOCK_SIZE = 1024
+
+    def __init__(self, documents: list[Document], neighbors: np.ndarray, scores: np.ndarray) -> None:
+        self.documents = documents
+        self.neighbors = neighbors
+        self.scores = scores
+        self._rows = {document.metadata.get("MAL_ID"): row for row, document in enumerate(documents)}
+
+    @property
+    def titles(self) -> list[str]:
+        """Titles in row order."""
+        return [str(document.metadata.get("Name", "")) for document in self.documents]
+
+    @classmethod
+    def build(cls, documents: list[Document], vectors: np.ndarray, top_n: int = 20) -> "NeighborTable":
+        """
+        Computes the top-N neighbors of every title.
+
+        Args:
+            documents (list[Document]): One document per title with "MAL_ID" and "Name" metadata.
+            vectors (np.ndarray): Title embeddings parallel to ``documents``.
+            top_n (int, optional): Neighbors kept per title. Defaults to 20.
+
+        Returns:
+            NeighborTable: The built table.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1.0, norms)
+
+        count = len(documents)
+        top_n = max(0, min(top_n, count - 1))
+        neighbors = np.zeros((count, top_n), dtype=np.int32)
+        scores = np.zeros((count, top_n), dtype=np.float16)
+        if top_n == 0:
+            return cls(documents, neighbors, scores)
+
+        for start in range(0, count, cls.BLOCK_SIZE):
+            end = min(start + cls.BLOCK_SIZE, count)
+            block = vectors[start:end] @ vectors.T
+            block[np.arange(end - start), np.arange(start, end)] = -np.inf
+            top = np.argpartition(-block, top_n - 1, axis=1)[:, :top_n]
+            top_scores = np.take_along_axis(block, top, axis=1)
+            order = np.argsort(-top_scores, axis=1, kind="stable")
+            neighbors[start:end] = np.take_along_axis(top, order, axis=1)
+            scores[start:end] = np.take_along_axis(top_scores, order, axis=1)
+
+        logging.info(f"Built neighbor table for {count} titles with top_n={top_n}.")
+        return cls(documents, neighbors, scores)
+
+    def more_like_this(self, row: int, n: int = 4) -> list[tuple[Document, float]]:
+        """
+        Returns the titles most similar to the title at ``row``.
+
+        Args:
+            row (int): Row of the anchor title.
+            n (int, optional): Number of neighbors. Defaults to 4.
+
+        Returns:
+            list[tuple[Document, float]]: Neighbor documents and similarities, best first.
+        """
+        return [
+            (self.documents[neighbor], float(score))
+            for neighbor, score in zip(self.neighbors[row, :n], self.scores[row, :n])
+        ]
+
+    def row_of(self, mal_id: int) -> Optional[int]:
+        """
+        Returns the row of a MAL_ID, or None if it is not in the table.
+
+        Args:
+            mal_id (int): Anime ID.
+
+        Returns:
+            Optional[int]: Row index.
+        """
+        return self._rows.get(mal_id)
+
+    def save(self, directory: str) -> None:
+        """
+        Persists the table next to the vector store.
+
+        Args:
+            directory (str): Target directory.
+        """
+        os.makedirs(directory, exist_ok=True)
+        table_path = os.path.join(directory, self.TABLE_FILE)
+        documents_path = os.path.join(directory, self.DOCUMENTS_FILE)
+        with open(table_path + ".tmp", "wb") as f:
+            np.savez(f, neighbors=self.neighbors, scores=self.scores)
+        with open(documents_path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump([{"page_content": d.page_content, "metadata": d.metadata} for d in self.documents], f)
+        os.replace(table_path + ".tmp", table_path)
+        os.replace(documents_path + ".tmp", documents_path)
+        logging.info(f"Saved neighbor table to: {directory}")
+
+    @classmethod
+    def load(cls, directory: str) -> Optional["NeighborTable"]:
+        """
+        Loads a persisted table.
+
+        Args:
+            directory (str): Directory written by ``save``.
+
+        Returns:
+            Optional[NeighborTable]: The table, or None if the directory has none.
+
+        Raises:
+            CustomException: If the table files are corrupted.
+        """
+        table_path = os.path.join(directory, cls.TABLE_FILE)
+        if not os.path.exists(table_path):
+            return None
+        try:
+            with open(os.path.join(directory, cls.DOCUMENTS_FILE), encoding="utf-8") as f:
+                documents = [Document(**record) for record in json.load(f)]
+            with np.load(table_path) as data:
+                return cls(documents, data["neighbors"], data["scores"])
+        except Exception as e:
+            logging.exception("Failed to load neighbor table.")
+            raise CustomException(f"Failed to load neighbor table from {directory}", e)
@@ -0,0 +1,425 @@
+import json
+import os
+import uuid
+from typing import Any, Iterable, Optional, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from src.metadata_index import MetadataIndex, SearchFilter
+from utils.logger import logging
+from utils.custom_exception import CustomException
+
+
+class NumpyVectorStore(VectorStore):
+    """
+    Brute-force vector store over a memory-mapped matrix of L2-normalized embeddings.
+
+    For catalogues of up to a few tens of thousands of titles one vectorized
+    matrix-vector product is exact and fast enough, and avoids the startup time,
+    memory and dependency weight of an HNSW index. Vectors are persisted as
+    ``embeddings.npy`` (float32, or float16 to halve the footprint) and documents
+    as a parallel ``documents.json`` array. A MetadataIndex over genres and scores
+    is saved alongside, so filtered searches only score the candidate rows.
+
+    Attributes:
+        embedding (Embeddings): Model used to embed queries and new texts.
+        vectors (np.ndarray): Normalized embeddings, one row per document.
+        ids (list[str]): Document IDs, parallel to ``vectors``.
+        documents (list[Document]): Documents, parallel to ``vectors``.
+        metadata_index (Optional[MetadataIndex]): Genre and score index over the rows.
+    """
+
+    VECTORS_FILE = "embeddings.npy"
+    DOCUMENTS_FILE = "documents.json"
+
+    # Rows scored per block, bounding the float32 working set for float16 stores
+    BLOCK_SIZE = 16_384
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        vectors: Optional[np.ndarray] = None,
+        ids: Optional[list[str]] = None,
+        documents: Optional[list[Document]] = None,
+        dtype: str = "float32",
+        metadata_index: Optional[MetadataIndex] = None
+    ) -> None:
+        """
+        Args:
+            embedding (Embeddings): Model used to embed queries and new texts.
+            vectors (np.ndarray, optional): Normalized embeddings, possibly memory-mapped.
+            ids (list[str], optional): Document IDs parallel to ``vectors``.
+            documents (list[Document], optional): Documents parallel to ``vectors``.
+            dtype (str, optional): Storage dtype, "float32" or "float16". Defaults to "float32".
+            metadata_index (MetadataIndex, optional): Index over the rows; built lazily when omitted.
+        """
+        if dtype not in ("float32", "float16"):
+            raise ValueError("dtype must be 'float32' or 'float16'.")
+
+        self.embedding = embedding
+        self.dtype = np.dtype(dtype)
+        self.vectors = vectors if vectors is not None else np.zeros((0, 0), dtype=self.dtype)
+        self.ids = ids or []
+        self.documents = documents or []
+        self.metadata_index = metadata_index
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    @staticmethod
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        """
+        L2-normalizes rows so that dot products are cosine similarities.
+
+        Args:
+            vectors (np.ndarray): Matrix of shape (n, dim) or a single vector.
+
+        Returns:
+            np.ndarray: float32 array of the same shape with unit-length rows.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.where(norms == 0, 1.0, norms)
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: Optional[list[dict]] = None,
+        *,
+        ids: Optional[list[str]] = None,
+        **kwargs: Any
+    ) -> list[str]:
+        """
+        Embeds and appends texts; existing IDs are replaced.
+
+        Args:
+            texts (Iterable[str]): Texts to add.
+            metadatas (list[dict], optional): Metadata per text.
+            ids (list[str], optional): IDs per text. Random IDs are generated when omitted.
+
+        Returns:
+            list[str]: IDs of the added texts.
+        """
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [uuid.uuid4().hex for _ in texts]
+        vectors = np.asarray(self.embedding.embed_documents(texts), dtype=np.float32)
+        documents = [
+            Document(id=doc_id, page_content=text, metadata=metadata)
+            for doc_id, text, metadata in zip(ids, texts, metadatas)
+        ]
+        self.add_vectors(ids, documents, vectors)
+        return ids
+
+    def add_vectors(self, ids: list[str], documents: list[Document], vectors: np.ndarray) -> None:
+        """
+        Appends precomputed embeddings; existing IDs are replaced.
+
+        Args:
+            ids (list[str]): Document IDs.
+            documents (list[Document]): Documents parallel to ``ids``.
+            vectors (np.ndarray): Raw embeddings parallel to ``ids``.
+        """
+        self.delete(ids)
+        self.metadata_index = None
+        new_vectors = self.normalize(vectors).astype(self.dtype)
+        if len(self.ids):
+            self.vectors = np.vstack([np.asarray(self.vectors), new_vectors])
+        else:
+            self.vectors = new_vectors
+        self.ids = self.ids + list(ids)
+        self.documents = self.documents + [
+            Document(id=doc_id, page_content=document.page_content, metadata=document.metadata)
+            for doc_id, document in zip(ids, documents)
+        ]
+
+    def delete(self, ids: Optional[list[str]] = None, **kwargs: Any) -> Optional[bool]:
+        """
+        Removes documents by ID.
+
+        Args:
+            ids (list[str], optional): IDs to remove.
+
+        Returns:
+            Optional[bool]: True once the IDs are gone.
+        """
+        if not ids or not self.ids:
+            return True
+        drop = set(ids)
+        keep = [row for row, doc_id in enumerate(self.ids) if doc_id not in drop]
+        if len(keep) != len(self.ids):
+            self.vectors = np.asarray(self.vectors)[keep]
+            self.ids = [self.ids[row] for row in keep]
+            self.documents = [self.documents[row] for row in keep]
+            self.metadata_index = None
+        return True
+
+    def get_by_ids(self, ids: Sequence[str], /) -> list[Document]:
+        """
+        Returns the documents with the given IDs, skipping unknown IDs.
+
+        Args:
+            ids (Sequence[str]): Document IDs.
+
+        Returns:
+            list[Document]: Matching documents in the order of ``ids``.
+        """
+        rows = {doc_id: row for row, doc_id in enumerate(self.ids)}
+        return [self.documents[rows[doc_id]] for doc_id in ids if doc_id in rows]
+
+    def search_vectors(self, embedding: list[float], k: int = 4, rows: Optional[np.ndarray] = None) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Scores documents against a query vector and returns the top-k.
+
+        Args:
+            embedding (list[float]): Query embedding.
+            k (int, optional): Number of results. Defaults to 4.
+            rows (np.ndarray, optional): Restrict scoring to these row indices.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Row indices and cosine similarities, best first.
+        """
+        if not self.ids or k < 1:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        query = self.normalize(embedding)
+        if rows is None:
+            scores = np.concatenate([
+                np.asarray(self.vectors[start:start + self.BLOCK_SIZE], dtype=np.float32) @ query
+                for start in range(0, len(self.ids), self.BLOCK_SIZE)
+            ])
+            candidates = np.arange(len(self.ids))
+        else:
+            candidates = np.asarray(rows, dtype=np.int64)
+            if candidates.size == 0:
+                return candidates, np.empty(0, dtype=np.float32)
+            scores = np.asarray(self.vectors[candidates], dtype=np.float32) @ query
+
+        k = min(k, scores.shape[0])
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return candidates[top], scores[top]
+
+    def search_vectors_batch(self, embeddings: np.ndarray, k: int = 4) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Scores documents against many query vectors at once with one matrix
+        product per block of rows, and returns the top-k per query.
+
+        Args:
+            embeddings (np.ndarray): Query embeddings of shape (queries, dim).
+            k (int, optional): Number of results per query. Defaults to 4.
+
+        Returns:
+            tuple[np.ndarray, np.ndarray]: Row indices and cosine similarities of
+                shape (queries, k), best first.
+        """
+        queries = self.normalize(np.atleast_2d(embeddings))
+        k = min(k, len(self.ids))
+        if k < 1:
+            return np.empty((len(queries), 0), dtype=np.int64), np.empty((len(queries), 0), dtype=np.float32)
+
+        scores = np.concatenate([
+            queries @ np.asarray(self.vectors[start:start + self.BLOCK_SIZE], dtype=np.float32).T
+            for start in range(0, len(self.ids), self.BLOCK_SIZE)
+        ], axis=1)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1), axis=1)
+        return top, np.take_along_axis(scores, top, axis=1)
+
+    def similarity_search_by_vectors(self, embeddings: list[list[float]], k: int = 4) -> list[list[Document]]:
+        """
+        Returns the k most similar documents for each of several query vectors.
+
+        Args:
+            embeddings (list[list[float]]): Query embeddings.
+            k (int, optional): Number of results per query. Defaults to 4.
+
+        Returns:
+            list[list[Document]]: Documents per query, best first.
+        """
+        if not len(embeddings):
+            return []
+        rows, _ = self.search_vectors_batch(np.asarray(embeddings, dtype=np.float32), k)
+        return [[self.documents[row] for row in query_rows] for query_rows in rows]
+
+    def get_metadata_index(self) -> MetadataIndex:
+        """
+        Returns the metadata index, building it from the documents if needed.
+
+        Returns:
+            MetadataIndex: Genre and score index aligned with the rows.
+        """
+        if self.metadata_index is None or self.metadata_index.num_rows != len(self.ids):
+            self.metadata_index = MetadataIndex.build(self.documents)
+        return self.metadata_index
+
+    def similarity_search_with_score_by_vector(
+        self, embedding: list[float], k: int = 4, filter: Optional[SearchFilter] = None, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        """
+        Returns the k most similar documents to a query vector with cosine similarities.
+
+        Args:
+            embedding (list[float]): Query embedding.
+            k (int, optional): Number of results. Defaults to 4.
+            filter (SearchFilter, optional): Genre and score constraints applied
+                before ranking; only matching rows are scored.
+
+        Returns:
+            list[tuple[Document, float]]: Documents and scores, best first.
+        """
+        rows = self.get_metadata_index().candidates(filter) if filter is not None else None
+        rows, scores = self.search_vectors(embedding, k, rows=rows)
+        return [(self.documents[row], float(score)) for row, score in zip(rows, scores)]
+
+    def similarity_search_by_vector(self, embedding: list[float], k: int = 4, **kwargs: Any) -> list[Document]:
+        """
+        Returns the k most similar documents to a query vector.
+
+        Args:
+            embedding (list[float]): Query embedding.
+            k (int, optional): Number of results. Defaults to 4.
+
+        Returns:
+            list[Document]: Documents, best first.
+        """
+        return [document for document, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, **kwargs: Any) -> list[tuple[Document, float]]:
+        """
+        Returns the k most similar documents to a text query with cosine similarities.
+
+        Args:
+            query (str): Query text.
+            k (int, optional): Number of results. Defaults to 4.
+
+        Returns:
+            list[tuple[Document, float]]: Documents and scores, best first.
+        """
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, **kwargs)
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> list[Document]:
+        """
+        Returns the k most similar documents to a text query.
+
+        Args:
+            query (str): Query text.
+            k (int, optional): Number of results. Defaults to 4.
+
+        Returns:
+            list[Document]: Documents, best first.
+        """
+        return self.similarity_search_by_vector(self.embedding.embed_query(query), k, **kwargs)
+
+    def _select_relevance_score_fn(self):
+        # Cosine similarity in [-1, 1] mapped onto [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: Optional[list[dict]] = None,
+        *,
+        ids: Optional[list[str]] = None,
+        dtype: str = "float32",
+        persist_directory: Optional[str] = None,
+        **kwargs: Any
+    ) -> "NumpyVectorStore":
+        """
+        Builds a store from texts, persisting it when ``persist_directory`` is given.
+
+        Args:
+            texts (list[str]): Texts to embed.
+            embedding (Embeddings): Embedding model.
+            metadatas (list[dict], optional): Metadata per text.
+            ids (list[str], optional): IDs per text.
+            dtype (str, optional): Storage dtype. Defaults to "float32".
+            persist_directory (str, optional): Directory to save the store to.
+
+        Returns:
+            NumpyVectorStore: The populated store.
+        """
+        store = cls(embedding=embedding, dtype=dtype)
+        store.add_texts(texts, metadatas, ids=ids)
+        if persist_directory:
+            store.save(persist_directory)
+        return store
+
+    def save(self, directory: str) -> None:
+        """
+        Persists the vectors and the parallel document array. Files are replaced atomically.
+
+        Args:
+            directory (str): Target directory.
+
+        Raises:
+            CustomException: If writing fails.
+        """
+        try:
+            os.makedirs(directory, exist_ok=True)
+            vectors_path = os.path.join(directory, self.VECTORS_FILE)
+            documents_path = os.path.join(directory, self.DOCUMENTS_FILE)
+
+            with open(vectors_path + ".tmp", "wb") as f:
+                np.save(f, np.asarray(self.vectors, dtype=self.dtype))
+            with open(documents_path + ".tmp", "w", encoding="utf-8") as f:
+                json.dump([
+                    {"id": doc_id, "page_content": document.page_content, "metadata": document.metadata}
+                    for doc_id, document in zip(self.ids, self.documents)
+                ], f)
+
+            os.replace(vectors_path + ".tmp", vectors_path)
+            os.replace(documents_path + ".tmp", documents_path)
+            self.get_metadata_index().save(directory)
+            logging.info(f"Saved NumPy vector store with {len(self.ids)} vectors to: {directory}")
+        except Exception as e:
+            logging.exception("Failed to save NumPy vector store.")
+            raise CustomException("Failed to save NumPy vector store", e)
+
+    @classmethod
+    def load(cls, directory: str, embedding: Embeddings) -> "NumpyVectorStore":
+        """
+        Loads a persisted store, memory-mapping the vector matrix read-only.
+
+        Args:
+            directory (str): Directory written by ``save``.
+            embedding (Embeddings): Model used to embed queries.
+
+        Returns:
+            NumpyVectorStore: The loaded store.
+
+        Raises:
+            CustomException: If the files are missing or inconsistent.
+        """
+        try:
+            vectors = np.load(os.path.join(directory, cls.VECTORS_FILE), mmap_mode="r")
+            with open(os.path.join(directory, cls.DOCUMENTS_FILE), encoding="utf-8") as f:
+                records = json.load(f)
+            if len(records) != vectors.shape[0]:
+                raise ValueError(f"{len(records)} documents for {vectors.shape[0]} vectors.")
+
+            ids = [record["id"] for record in records]
+            documents = [
+                Document(id=record["id"], page_content=record["page_content"], metadata=record["metadata"])
+                for record in records
+            ]
+            logging.info(f"Loaded NumPy vector store with {len(ids)} vectors from: {directory}")
+            return cls(
+                embedding=embedding,
+                vectors=vectors,
+                ids=ids,
+                documents=documents,
+                dtype=str(vectors.dtype),
+                metadata_index=MetadataIndex.load(directory)
+            )
+        except Exception as e:
+            logging.exception("Failed to load NumPy vector store.")
+            raise CustomException(f"Failed to load NumPy vector store from {directory}", e)
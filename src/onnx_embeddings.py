@@ -0,0 +1,158 @@
+import os
+from typing import Optional
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+from utils.logger import logging
+from utils.custom_exception import CustomException
+from utils.startup import lazy_import
+
+
+def onnx_model_name(model_dir: str, quantized: bool) -> str:
+    """
+    Returns the name of an ONNX export used in embedding cache keys, e.g.
+    "all-MiniLM-L6-v2-onnx-int8", so its vectors are never mixed with the
+    reference model's.
+
+    Args:
+        model_dir (str): Exported model directory.
+        quantized (bool): Whether the int8 model is used.
+
+    Returns:
+        str: Model name.
+    """
+    return f"{os.path.basename(os.path.normpath(model_dir))}-onnx{'-int8' if quantized else ''}"
+
+
+class OnnxEmbeddings(Embeddings):
+    """
+    Sentence embeddings from an ONNX export of a sentence-transformer, run on
+    the CPU with onnxruntime.
+
+    Reproduces the sentence-transformers pipeline of all-MiniLM-L6-v2: fast
+    tokenizer, transformer forward pass, attention-masked mean pooling and L2
+    normalization. The int8 dynamically quantized export trades a little
+    fidelity (check with ``fidelity_check``) for a smaller, faster model.
+
+    Attributes:
+        model_dir (str): Directory holding the ONNX files and ``tokenizer.json``.
+        quantized (bool): Whether the int8 model is used.
+        batch_size (int): Texts per forward pass.
+        model_name (str): Name used in embedding cache keys.
+    """
+
+    MODEL_FILE = "model.onnx"
+    QUANTIZED_MODEL_FILE = "model_int8.onnx"
+    TOKENIZER_FILE = "tokenizer.json"
+
+    def __init__(
+        self,
+        model_dir: str,
+        quantized: bool = True,
+        batch_size: int = 32,
+        max_length: int = 256,
+        num_threads: Optional[int] = None
+    ) -> None:
+        """
+        Args:
+            model_dir (str): Directory written by ``pipeline/export_onnx.py``.
+            quantized (bool, optional): Use the int8 model. Defaults to True.
+            batch_size (int, optional): Texts per forward pass. Defaults to 32.
+            max_length (int, optional): Token limit per text, as in the reference model. Defaults to 256.
+            num_threads (int, optional): onnxruntime intra-op threads. Defaults to the runtime's choice.
+
+        Raises:
+            CustomException: If the model or tokenizer cannot be loaded.
+        """
+        self.model_dir = model_dir
+        self.quantized = quantized
+        self.batch_size = batch_size
+        self.model_name = onnx_model_name(model_dir, quantized)
+
+        try:
+            ort = lazy_import("onnxruntime")
+            options = ort.SessionOptions()
+            if num_threads:
+                options.intra_op_num_threads = num_threads
+            path = os.path.join(model_dir, self.QUANTIZED_MODEL_FILE if quantized else self.MODEL_FILE)
+            self._session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+            self._input_names = {model_input.name for model_input in self._session.get_inputs()}
+
+            self._tokenizer = lazy_import("tokenizers").Tokenizer.from_file(
+                os.path.join(model_dir, self.TOKENIZER_FILE)
+            )
+            self._tokenizer.enable_truncation(max_length=max_length)
+            pad_id = self._tokenizer.token_to_id("[PAD]")
+            self._tokenizer.enable_padding(pad_id=pad_id or 0, pad_token="[PAD]")
+            logging.info(f"Loaded ONNX embedding model from: {path}")
+        except Exception as e:
+            logging.exception("Failed to load ONNX embedding model.")
+            raise CustomException(f"Failed to load ONNX embedding model from {model_dir}", e)
+
+    def _embed_batch(self, texts: list[str]) -> np.ndarray:
+        encodings = self._tokenizer.encode_batch(texts)
+        input_ids = np.array([encoding.ids for encoding in encodings], dtype=np.int64)
+        attention_mask = np.array([encoding.attention_mask for encoding in encodings], dtype=np.int64)
+        feeds = {"input_ids": input_ids, "attention_mask": attention_mask}
+        if "token_type_ids" in self._input_names:
+            feeds["token_type_ids"] = np.array([encoding.type_ids for encoding in encodings], dtype=np.int64)
+
+        hidden = self._session.run(None, feeds)[0]
+        mask = attention_mask[:, :, None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        norms = np.linalg.norm(pooled, axis=1, keepdims=True)
+        return pooled / np.clip(norms, 1e-12, None)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embeds texts in batches.
+
+        Args:
+            texts (list[str]): Texts to embed.
+
+        Returns:
+            list[list[float]]: Unit-length embeddings in input order.
+        """
+        vectors = [
+            self._embed_batch(texts[start:start + self.batch_size])
+            for start in range(0, len(texts), self.batch_size)
+        ]
+        return np.concatenate(vectors).tolist() if vectors else []
+
+    def embed_query(self, text: str) -> list[float]:
+        """
+        Embeds a single query.
+
+        Args:
+            text (str): Query text.
+
+        Returns:
+            list[float]: Unit-length embedding.
+        """
+        return self._embed_batch([text])[0].tolist()
+
+
+def fidelity_check(candidate: Embeddings, reference: Embeddings, texts: list[str]) -> dict:
+    """
+    Compares two embedding models text by text with cosine similarity.
+
+    Args:
+        candidate (Embeddings): Model under test, e.g. the int8 ONNX export.
+        reference (Embeddings): Reference model, e.g. the PyTorch sentence-transformer.
+        texts (list[str]): Sample texts, ideally drawn from the catalogue.
+
+    Returns:
+        dict: Number of texts and the mean, minimum and 1st-percentile cosine similarity.
+    """
+    a = np.asarray(candidate.embed_documents(texts), dtype=np.float32)
+    b = np.asarray(reference.embed_documents(texts), dtype=np.float32)
+    a /= np.clip(np.linalg.norm(a, axis=1, keepdims=True), 1e-12, None)
+    b /= np.clip(np.linalg.norm(b, axis=1, keepdims=True), 1e-12, None)
+    cosines = (a * b).sum(axis=1)
+    return {
+        "count": len(texts),
+        "mean_cosine": float(cosines.mean()),
+        "min_cosine": float(cosines.min()),
+        "p01_cosine": float(np.percentile(cosines, 1)),
+    }
@@ -0,0 +1,321 @@
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from pydantic import ConfigDict
+
+from src.metadata_index import SearchFilter, parse_query_filter
+from utils.logger import logging
+from utils.metrics import record_cache, stage
+
+
+def normalize_query(query: str) -> str:
+    """
+    Normalizes a user query so that near-identical strings share a cache key.
+
+    Lowercases the text, replaces punctuation with spaces and collapses whitespace,
+    e.g. "Light-hearted  School anime!" -> "light hearted school anime".
+
+    Args:
+        query (str): Raw user query.
+
+    Returns:
+        str: Normalized query text.
+    """
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded LRU cache whose entries expire after a fixed TTL.
+
+    Attributes:
+        max_size (int): Maximum number of entries kept.
+        ttl_seconds (float): Lifetime of an entry in seconds.
+        hits (int): Number of successful lookups.
+        misses (int): Number of lookups that found nothing or an expired entry.
+    """
+
+    max_size: int
+    ttl_seconds: float
+    hits: int
+    misses: int
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 3600.0) -> None:
+        """
+        Args:
+            max_size (int, optional): Maximum number of entries. Defaults to 1024.
+            ttl_seconds (float, optional): Entry lifetime in seconds. Defaults to 3600.
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1.")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the cached value for ``key`` and marks it as recently used.
+
+        Args:
+            key (Hashable): Cache key.
+
+        Returns:
+            Optional[Any]: The cached value, or None on a miss or expired entry.
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                if item is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """
+        Returns the cached value for ``key`` without counting a hit or miss or
+        changing its recency, e.g. to check what a batch still has to compute.
+
+        Args:
+            key (Hashable): Cache key.
+
+        Returns:
+            Optional[Any]: The cached value, or None if absent or expired.
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] < time.monotonic():
+                return None
+            return item[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """
+        Stores ``value`` under ``key``, evicting the least recently used entry if full.
+
+        Args:
+            key (Hashable): Cache key.
+            value (Any): Value to cache.
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drops all entries; hit and miss counters are kept."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        """
+        Returns cache counters.
+
+        Returns:
+            dict: Size, hits, misses and hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._data),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class CachingRetriever(BaseRetriever):
+    """
+    Vector store retriever that caches query embeddings and the top-k documents
+    retrieved for them, keyed on the normalized query text.
+
+    A retrieval cache hit skips both the encoder and the similarity search; an
+    embedding cache hit skips only the encoder.
+
+    Searches can be pre-filtered by genre and score, either with a fixed
+    ``search_filter`` or with filters inferred from the query text against
+    ``known_genres``. If a filter leaves fewer than k matches, the results are
+    topped up with unfiltered neighbours.
+
+    Attributes:
+        vectorstore (VectorStore): Store to search on a cache miss.
+        k (int): Number of documents to retrieve.
+        embedding_cache (TTLCache): Cache of query embeddings.
+        retrieval_cache (TTLCache): Cache of retrieved documents.
+        search_filter (Optional[SearchFilter]): Filter applied to every query.
+        known_genres (list[str]): Genre vocabulary for inferring filters; empty disables inference.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    vectorstore: VectorStore
+    k: int = 4
+    embedding_cache: TTLCache
+    retrieval_cache: TTLCache
+    search_filter: Optional[SearchFilter] = None
+    known_genres: list[str] = []
+
+    def embed_query(self, query: str) -> list[float]:
+        """
+        Embeds a query, serving repeated queries from the embedding cache.
+
+        The cache is keyed on the normalized query, but the model sees the text
+        as written, since casing and punctuation such as "K-On!" carry meaning.
+
+        Args:
+            query (str): User query.
+
+        Returns:
+            list[float]: The query embedding.
+        """
+        key = normalize_query(query)
+        vector = self.embedding_cache.get(key)
+        record_cache("embedding", vector is not None)
+        if vector is None:
+            assert self.vectorstore.embeddings is not None, "Vector store has no embedding function."
+            with stage("embed"):
+                vector = self.vectorstore.embeddings.embed_query(query.strip())
+            self.embedding_cache.set(key, vector)
+        return vector
+
+    def close(self) -> None:
+        """
+        Releases the vector store's client, if it holds one.
+
+        Chroma keeps one cached system per persist directory until every client
+        on it is closed; the NumPy store holds no client.
+        """
+        client = getattr(self.vectorstore, "_client", None)
+        if client is not None and hasattr(client, "close"):
+            client.close()
+            logging.info("Closed the vector store client.")
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        key = (normalize_query(query), self.k)
+        documents = self.retrieval_cache.get(key)
+        record_cache("retrieval", documents is not None)
+        if documents is not None:
+            logging.info(f"Retrieval cache hit for query: {key[0]}")
+            return list(documents)
+
+        vector = self.embed_query(query)
+        search_filter = self.resolve_filter(query)
+        with stage("vector_search"):
+            if search_filter is None:
+                documents = self.vectorstore.similarity_search_by_vector(vector, k=self.k)
+            else:
+                documents = self._filtered_search(vector, search_filter)
+
+        self.retrieval_cache.set(key, tuple(documents))
+        return documents
+
+    def prefetch(self, queries: list[str]) -> int:
+        """
+        Fills the caches for many queries at once, so that invoking the retriever
+        on them afterwards is served from the caches.
+
+        Queries missing from the retrieval cache are embedded in one batch and the
+        unfiltered ones are searched together: one matrix product for the NumPy
+        store, one multi-vector query for Chroma. Queries with a genre or score
+        filter are searched one by one.
+
+        Args:
+            queries (list[str]): User queries.
+
+        Returns:
+            int: Number of distinct queries that were retrieved.
+        """
+        # The first spelling of each normalized query is the one embedded
+        originals: dict[str, str] = {}
+        for query in queries:
+            originals.setdefault(normalize_query(query), query.strip())
+        # Probing does not count as a lookup; invoking the retriever afterwards does
+        keys = [key for key in originals if self.retrieval_cache.peek((key, self.k)) is None]
+        if not keys:
+            return 0
+
+        vectors = {key: self.embedding_cache.get(key) for key in keys}
+        missing = [key for key, vector in vectors.items() if vector is None]
+        if missing:
+            assert self.vectorstore.embeddings is not None, "Vector store has no embedding function."
+            with stage("embed"):
+                computed = self.vectorstore.embeddings.embed_documents([originals[key] for key in missing])
+            for key, vector in zip(missing, computed):
+                self.embedding_cache.set(key, vector)
+                vectors[key] = vector
+
+        filters = {key: self.resolve_filter(originals[key]) for key in keys}
+        unfiltered = [key for key in keys if filters[key] is None]
+        with stage("vector_search"):
+            results = dict(zip(unfiltered, self._search_many([vectors[key] for key in unfiltered])))
+            for key in keys:
+                if filters[key] is not None:
+                    results[key] = self._filtered_search(vectors[key], filters[key])
+
+        for key, documents in results.items():
+            self.retrieval_cache.set((key, self.k), tuple(documents))
+        logging.info(f"Prefetched {len(keys)} queries: {len(missing)} embedded, {len(unfiltered)} searched in one batch.")
+        return len(keys)
+
+    def _search_many(self, vectors: list[list[float]]) -> list[list[Document]]:
+        if not vectors:
+            return []
+        if hasattr(self.vectorstore, "similarity_search_by_vectors"):
+            return self.vectorstore.similarity_search_by_vectors(vectors, k=self.k)
+        collection = getattr(self.vectorstore, "_collection", None)
+        if collection is not None:
+            # Chroma answers several query vectors in one call
+            results = collection.query(query_embeddings=vectors, n_results=self.k, include=["documents", "metadatas"])
+            return [
+                [Document(page_content=text, metadata=metadata or {}) for text, metadata in zip(texts, metadatas)]
+                for texts, metadatas in zip(results["documents"], results["metadatas"])
+            ]
+        return [self.vectorstore.similarity_search_by_vector(vector, k=self.k) for vector in vectors]
+
+    def resolve_filter(self, query: str) -> Optional[SearchFilter]:
+        """
+        Returns the filter for a query: the fixed filter if set, else one inferred from the text.
+
+        Args:
+            query (str): User query.
+
+        Returns:
+            Optional[SearchFilter]: The filter, or None for an unfiltered search.
+        """
+        if self.search_filter is not None:
+            return self.search_filter
+        if self.known_genres:
+            return parse_query_filter(query, self.known_genres)
+        return None
+
+    def _filtered_search(self, vector: list[float], search_filter: SearchFilter) -> list[Document]:
+        # The NumPy store takes the filter directly; Chroma takes a where clause
+        native_filter = search_filter if hasattr(self.vectorstore, "get_metadata_index") \
+            else search_filter.to_chroma_where()
+        documents = self.vectorstore.similarity_search_by_vector(vector, k=self.k, filter=native_filter)
+        logging.info(f"Filtered search with {search_filter} returned {len(documents)} documents.")
+
+        if len(documents) < self.k:
+            seen = {document.page_content for document in documents}
+            for document in self.vectorstore.similarity_search_by_vector(vector, k=self.k * 2):
+                if len(documents) >= self.k:
+                    break
+                if document.page_content not in seen:
+                    documents.append(document)
+                    seen.add(document.page_content)
+        return documents
@@ -1,25 +1,57 @@
+import asyncio
 import logging
+from typing import TYPE_CHECKING, Callable, Iterator, Optional
 from utils.custom_exception import CustomException
-from langchain.chains import RetrievalQA
-from langchain_groq import ChatGroq
+from utils.metrics import MetricsCallbackHandler, record_cache, stage
+from utils.startup import STARTUP_REPORT, lazy_import
 from langchain.prompts import PromptTemplate
+from langchain_core.documents import Document
+from src.context_builder import ContextBudgetRetriever, ContextBuilder
 from src.prompt_template import get_anime_prompt
+from src.response_cache import ResponseCache
+from src.semantic_cache import SemanticCache
+from src.streaming import TimedTokenStream
 from pydantic import SecretStr
 
+if TYPE_CHECKING:
+    from langchain.chains import RetrievalQA
+    from langchain_core.language_models import BaseChatModel
+    from langchain_groq import ChatGroq
+
 class AnimeRecommender:
     """
     A class to handle anime recommendation generation using a retrieval-augmented generation pipeline.
     
     Attributes:
-        llm (ChatGroq): The large language model interface.
+        llm (BaseChatModel): The large language model interface, ChatGroq unless another model is given.
         prompt (PromptTemplate): Custom prompt template for the recommender.
         qa_chain (RetrievalQA): The question-answering chain using retriever and LLM.
+        retriever: The retriever feeding context to the chain, wrapped in a
+            ContextBudgetRetriever when a context builder is set.
+        context_builder (Optional[ContextBuilder]): Deduplicates and budgets the context, if enabled.
+        response_cache (Optional[ResponseCache]): Cache of full answers, if enabled.
+        semantic_cache (Optional[SemanticCache]): Similarity-matched answer cache, if enabled.
+        index_version (str): Version of the vector store behind the retriever.
     """
-    llm: ChatGroq
+    llm: "BaseChatModel"
     prompt: PromptTemplate
-    qa_chain = RetrievalQA
+    qa_chain: "RetrievalQA"
+    response_cache: Optional[ResponseCache]
+    semantic_cache: Optional[SemanticCache]
+    index_version: str
 
-    def __init__(self, retriever, api_key: str, model_name: str) -> None:
+    def __init__(
+        self,
+        retriever,
+        api_key: str,
+        model_name: str,
+        response_cache: Optional[ResponseCache] = None,
+        index_version: str = "unversioned",
+        semantic_cache: Optional[SemanticCache] = None,
+        embed_query: Optional[Callable[[str], list[float]]] = None,
+        context_builder: Optional[ContextBuilder] = None,
+        llm: Optional["BaseChatModel"] = None
+    ) -> None:
         """
         Initializes the AnimeRecommender with the given retriever, API key, and model name.
 
@@ -27,10 +59,40 @@ class AnimeRecommender:
             retriever: A retriever object for document retrieval.
             api_key (str): The API key to authenticate with ChatGroq.
             model_name (str): The name of the model to be used.
+            response_cache (ResponseCache, optional): Cache of full answers, keyed
+                by ``index_version`` among others.
+            index_version (str, optional): Version of the vector store behind the retriever.
+            semantic_cache (SemanticCache, optional): Similarity-matched answer cache;
+                requires ``embed_query``. Only answers of ``index_version`` match.
+            embed_query (Callable, optional): Query encoder shared with the retriever,
+                so a semantic cache lookup does not embed the query twice.
+            context_builder (ContextBuilder, optional): Deduplicates chunks per title
+                and fits the context to a token budget before it reaches the prompt.
+            llm (BaseChatModel, optional): Chat model to use instead of ChatGroq, e.g. a
+                local stand-in for offline benchmarks. ``api_key`` is ignored when set.
         """
         try:
             logging.info("Initializing AnimeRecommender...")
-            self.llm = ChatGroq(api_key=SecretStr(api_key), model=model_name, temperature=0)
+            self.model_name = model_name
+            self.context_builder = context_builder
+            if context_builder is not None:
+                retriever = ContextBudgetRetriever(retriever=retriever, builder=context_builder)
+            self.retriever = retriever
+            self.index_version = index_version
+            self.response_cache = response_cache
+            if semantic_cache is not None and embed_query is None:
+                raise ValueError("semantic_cache requires an embed_query function.")
+            self.semantic_cache = semantic_cache
+            self.embed_query = embed_query
+
+            # The Groq client and chain classes are imported here, not at module import
+            RetrievalQA = lazy_import("langchain.chains").RetrievalQA
+            if llm is not None:
+                self.llm = llm
+            else:
+                ChatGroq = lazy_import("langchain_groq").ChatGroq
+                with STARTUP_REPORT.timed("create LLM client"):
+                    self.llm = ChatGroq(api_key=SecretStr(api_key), model=model_name, temperature=0)
             logging.info("LLM initialized successfully.")
 
             self.prompt = get_anime_prompt()
@@ -64,9 +126,194 @@ class AnimeRecommender:
         """
         try:
             logging.info(f"Generating recommendation for query: {query}")
-            result = self.qa_chain.invoke({"query": query})
+
+            answer, cache_key, query_vector = self._lookup_caches(query)
+            if answer is not None:
+                return answer
+
+            result = self.qa_chain.invoke({"query": query}, config={"callbacks": [MetricsCallbackHandler()]})
             logging.info("Recommendation generated successfully.")
+
+            self._store_answer(result["result"], cache_key, query_vector)
             return result["result"]
         except Exception as e:
             logging.exception("Failed to generate recommendation.")
             raise CustomException("Error generating recommendation", e)
+
+    def get_recommendation_from_documents(self, query: str, documents: list[Document]) -> str:
+        """
+        Generates a recommendation from already selected context documents.
+
+        Used for "more like this" queries whose candidates come from the neighbor
+        table: retrieval is skipped, and so is the semantic cache, since it would
+        have to embed the query.
+
+        Args:
+            query (str): The user's input question.
+            documents (list[Document]): Context documents for the prompt.
+
+        Returns:
+            str: The recommended anime response generated by the LLM.
+
+        Raises:
+            CustomException: If generation fails.
+        """
+        try:
+            logging.info(f"Generating recommendation from {len(documents)} given documents for query: {query}")
+
+            answer, cache_key, _ = self._lookup_caches(query, semantic=False)
+            if answer is not None:
+                return answer
+
+            if self.context_builder is not None:
+                documents = self.context_builder.build(documents)
+            result = self.qa_chain.combine_documents_chain.invoke(
+                {"input_documents": documents, "question": query},
+                config={"callbacks": [MetricsCallbackHandler()]}
+            )
+            logging.info("Recommendation generated successfully.")
+
+            self._store_answer(result["output_text"], cache_key, None)
+            return result["output_text"]
+        except Exception as e:
+            logging.exception("Failed to generate recommendation.")
+            raise CustomException("Error generating recommendation", e)
+
+    async def aget_recommendation(self, query: str) -> str:
+        """
+        Asynchronously generates an anime recommendation based on the given query.
+
+        Cache lookups, which may embed the query, run in a worker thread; the LLM
+        call uses the chain's native async invocation.
+
+        Args:
+            query (str): The user's input question.
+
+        Returns:
+            str: The recommended anime response generated by the QA chain.
+
+        Raises:
+            CustomException: If generation fails.
+        """
+        try:
+            logging.info(f"Generating recommendation asynchronously for query: {query}")
+
+            answer, cache_key, query_vector = await asyncio.to_thread(self._lookup_caches, query)
+            if answer is not None:
+                return answer
+
+            result = await self.qa_chain.ainvoke({"query": query}, config={"callbacks": [MetricsCallbackHandler()]})
+            logging.info("Recommendation generated successfully.")
+
+            self._store_answer(result["result"], cache_key, query_vector)
+            return result["result"]
+        except Exception as e:
+            logging.exception("Failed to generate recommendation.")
+            raise CustomException("Error generating recommendation", e)
+
+    def stream_recommendation(self, query: str, documents: Optional[list[Document]] = None) -> TimedTokenStream:
+        """
+        Generates an anime recommendation and yields its tokens as the LLM produces them.
+
+        Retrieval and prompt formatting match the QA chain; only the LLM call is
+        streamed. Cached answers are yielded as a single chunk. The returned stream
+        reports time-to-first-token and total latency once consumed, and a freshly
+        generated answer is cached when the stream is exhausted.
+
+        Args:
+            query (str): The user's input question.
+            documents (list[Document], optional): Context documents to use instead
+                of retrieving; the semantic cache is then skipped as well.
+
+        Returns:
+            TimedTokenStream: Lazily evaluated stream of answer tokens.
+
+        Raises:
+            CustomException: If generation fails while the stream is consumed.
+        """
+        cache_key: Optional[str] = None
+        query_vector: Optional[list[float]] = None
+        from_cache = False
+
+        def tokens() -> Iterator[str]:
+            nonlocal cache_key, query_vector, from_cache
+            try:
+                logging.info(f"Streaming recommendation for query: {query}")
+
+                answer, cache_key, query_vector = self._lookup_caches(query, semantic=documents is None)
+                if answer is not None:
+                    from_cache = True
+                    yield answer
+                    return
+
+                if documents is None:
+                    context_documents = self.retriever.invoke(query)
+                elif self.context_builder is not None:
+                    context_documents = self.context_builder.build(documents)
+                else:
+                    context_documents = documents
+                context = "\n\n".join(document.page_content for document in context_documents)
+                prompt = self.prompt.format(context=context, question=query)
+                for chunk in self.llm.stream(prompt, config={"callbacks": [MetricsCallbackHandler()]}):
+                    yield str(chunk.content)
+            except Exception as e:
+                logging.exception("Failed to stream recommendation.")
+                raise CustomException("Error streaming recommendation", e)
+
+        def store(text: str) -> None:
+            # Answers served from a cache are already stored
+            if not from_cache:
+                self._store_answer(text, cache_key, query_vector)
+
+        return TimedTokenStream(tokens(), on_complete=store)
+
+    def _lookup_caches(
+        self, query: str, semantic: bool = True
+    ) -> tuple[Optional[str], Optional[str], Optional[list[float]]]:
+        """
+        Checks the exact and semantic answer caches.
+
+        Args:
+            query (str): The user's input question.
+            semantic (bool, optional): Also check the semantic cache, which embeds
+                the query. Defaults to True.
+
+        Returns:
+            tuple: The cached answer (or None), the response cache key and the query
+                embedding, the latter two for storing a freshly generated answer.
+        """
+        cache_key = None
+        if self.response_cache is not None:
+            cache_key = ResponseCache.make_key(query, self.model_name, self.prompt.template, self.index_version)
+            cached = self.response_cache.get(cache_key)
+            record_cache("response", cached is not None)
+            if cached is not None:
+                logging.info("Recommendation served from response cache.")
+                return cached, cache_key, None
+
+        query_vector = None
+        if semantic and self.semantic_cache is not None and self.embed_query is not None:
+            query_vector = self.embed_query(query)
+            with stage("semantic_cache"):
+                match = self.semantic_cache.lookup(query_vector, self.index_version)
+            record_cache("semantic", match is not None)
+            if match is not None:
+                answer, similarity = match
+                logging.info(f"Recommendation served from semantic cache (similarity={similarity:.3f}).")
+                return answer, cache_key, query_vector
+
+        return None, cache_key, query_vector
+
+    def _store_answer(self, answer: str, cache_key: Optional[str], query_vector: Optional[list[float]]) -> None:
+        """
+        Stores a freshly generated answer in the enabled caches.
+
+        Args:
+            answer (str): The generated recommendation.
+            cache_key (Optional[str]): Response cache key from ``_lookup_caches``.
+            query_vector (Optional[list[float]]): Query embedding from ``_lookup_caches``.
+        """
+        if self.response_cache is not None and cache_key is not None:
+            self.response_cache.set(cache_key, answer, self.index_version)
+        if self.semantic_cache is not None and query_vector is not None:
+            self.semantic_cache.add(query_vector, answer, self.index_version)
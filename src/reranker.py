@@ -0,0 +1,189 @@
+import threading
+import time
+from typing import Callable, Optional
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import ConfigDict
+
+from utils.logger import logging
+from utils.custom_exception import CustomException
+from utils.metrics import stage
+
+Scorer = Callable[[list[tuple[str, str]]], list[float]]
+
+
+class CrossEncoderReranker:
+    """
+    Re-scores (query, document) pairs with a small cross-encoder on CPU.
+
+    Candidates are scored in batches in their retrieval order. Once a cost per
+    pair has been measured, every batch of a query, its first one included, is
+    sized so that it fits the remaining latency budget at that cost. Only the
+    very first batch the reranker ever scores runs at full ``batch_size``, since
+    there is no measurement yet; it provides the first one.
+
+    Once the budget is spent, the remaining candidates keep their retrieval
+    order behind the re-scored ones, so a slow machine degrades to plain
+    retrieval ranking instead of a slow answer. If not even one pair fits at
+    the start of a query, nothing is scored and the cost estimate is relaxed,
+    so one slow measurement does not disable re-ranking for good.
+
+    Attributes:
+        model_name (str): Cross-encoder checkpoint.
+        batch_size (int): Maximum pairs scored per forward pass.
+        max_latency_seconds (float): Time budget for scoring one query.
+        seconds_per_pair (Optional[float]): Moving average of the measured scoring
+            cost per pair, None until the first batch.
+    """
+
+    # Weight of the latest batch in the per-pair cost average
+    COST_SMOOTHING = 0.5
+
+    def __init__(
+        self,
+        model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2",
+        batch_size: int = 16,
+        max_latency_seconds: float = 0.25,
+        scorer: Optional[Scorer] = None
+    ) -> None:
+        """
+        Args:
+            model_name (str, optional): Cross-encoder checkpoint. Defaults to MS MARCO MiniLM-L-6.
+            batch_size (int, optional): Pairs per forward pass. Defaults to 16.
+            max_latency_seconds (float, optional): Scoring budget per query. Defaults to 0.25.
+            scorer (Callable, optional): Function scoring a batch of pairs. The
+                cross-encoder is loaded on first use when omitted.
+        """
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.max_latency_seconds = max_latency_seconds
+        self.seconds_per_pair: Optional[float] = None
+        self._scorer = scorer
+        self._lock = threading.Lock()
+
+    def _create_scorer(self) -> Scorer:
+        try:
+            from sentence_transformers import CrossEncoder
+            model = CrossEncoder(self.model_name, device="cpu")
+        except Exception as e:
+            logging.exception("Failed to load cross-encoder.")
+            raise CustomException(f"Failed to load cross-encoder {self.model_name}", e)
+        logging.info(f"Loaded cross-encoder: {self.model_name}")
+        return lambda batch: model.predict(batch, batch_size=self.batch_size).tolist()
+
+    def _get_scorer(self) -> Scorer:
+        # Concurrent first requests wait for one load instead of each loading the model
+        if self._scorer is None:
+            with self._lock:
+                if self._scorer is None:
+                    self._scorer = self._create_scorer()
+        return self._scorer
+
+    def _batch_size_within(self, remaining_seconds: float) -> int:
+        # Pairs that fit the remaining budget at the measured cost; a full batch until measured
+        if self.seconds_per_pair is None:
+            return self.batch_size
+        return min(self.batch_size, int(remaining_seconds / max(self.seconds_per_pair, 1e-9)))
+
+    def _record_cost(self, seconds: float, pairs: int) -> None:
+        cost = seconds / pairs
+        with self._lock:
+            previous = self.seconds_per_pair
+            self.seconds_per_pair = cost if previous is None else \
+                self.COST_SMOOTHING * cost + (1 - self.COST_SMOOTHING) * previous
+
+    def rerank(self, query: str, documents: list[Document], k: int) -> list[Document]:
+        """
+        Returns the k best documents by cross-encoder score.
+
+        Args:
+            query (str): User query.
+            documents (list[Document]): Candidates, best first by retrieval score.
+            k (int): Number of documents to keep.
+
+        Returns:
+            list[Document]: Re-ranked documents, at most k.
+        """
+        # Loading the model is not part of the per-query budget
+        scorer = self._get_scorer()
+        start = time.perf_counter()
+        scores: list[float] = []
+        while len(scores) < len(documents):
+            size = self._batch_size_within(self.max_latency_seconds - (time.perf_counter() - start))
+            if size < 1:
+                if not scores:
+                    # Relax the estimate so one slow measurement does not disable re-ranking for good
+                    with self._lock:
+                        self.seconds_per_pair = (self.seconds_per_pair or 0.0) * (1 - self.COST_SMOOTHING)
+                logging.warning(
+                    f"Re-ranking budget of {self.max_latency_seconds * 1000:.0f} ms spent after "
+                    f"{len(scores)} of {len(documents)} candidates."
+                )
+                break
+            batch = documents[len(scores):len(scores) + size]
+            batch_start = time.perf_counter()
+            scores.extend(scorer([(query, document.page_content) for document in batch]))
+            self._record_cost(time.perf_counter() - batch_start, len(batch))
+
+        order = sorted(range(len(scores)), key=lambda index: scores[index], reverse=True)
+        ranked = [documents[index] for index in order] + documents[len(scores):]
+        logging.info(
+            f"Re-ranked {len(scores)} candidates in {(time.perf_counter() - start) * 1000:.1f} ms, keeping {k}."
+        )
+        return ranked[:k]
+
+
+class RerankingRetriever(BaseRetriever):
+    """
+    Retriever wrapper that over-fetches candidates and keeps the k best after
+    cross-encoder re-scoring.
+
+    Attributes:
+        retriever (BaseRetriever): Underlying retriever, configured to return the candidate depth.
+        reranker (CrossEncoderReranker): Re-scoring model.
+        k (int): Number of documents returned.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    retriever: BaseRetriever
+    reranker: CrossEncoderReranker
+    k: int = 4
+
+    def embed_query(self, query: str) -> list[float]:
+        """
+        Embeds a query through the underlying retriever.
+
+        Args:
+            query (str): User query.
+
+        Returns:
+            list[float]: The query embedding.
+        """
+        return self.retriever.embed_query(query)
+
+    def prefetch(self, queries: list[str]) -> int:
+        """
+        Fills the underlying retriever's caches for many queries in one batch.
+
+        Args:
+            queries (list[str]): User queries.
+
+        Returns:
+            int: Number of distinct queries that were retrieved.
+        """
+        return self.retriever.prefetch(queries)
+
+    def close(self) -> None:
+        """Releases the underlying retriever's vector store client, if it holds one."""
+        if hasattr(self.retriever, "close"):
+            self.retriever.close()
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        candidates = self.retriever.invoke(query)
+        with stage("rerank"):
+            return self.reranker.rerank(query, candidates, self.k)
@@ -0,0 +1,193 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from src.query_cache import TTLCache, normalize_query
+from utils.logger import logging
+from utils.custom_exception import CustomException
+
+
+class ResponseCache:
+    """
+    Two-tier cache of full LLM answers: an in-memory LRU tier in front of an
+    optional SQLite tier with least-recently-accessed eviction.
+
+    Keys combine the normalized query, the LLM model name, a hash of the prompt
+    template and the vector store version, so a new index or prompt never serves
+    stale answers. Rows written for other index versions are purged on demand.
+
+    Attributes:
+        db_path (Optional[str]): SQLite file of the disk tier, or None for memory only.
+        max_entries (int): Maximum number of rows kept in the disk tier.
+        memory (TTLCache): The in-memory tier.
+        hits (int): Lookups answered by either tier.
+        misses (int): Lookups answered by neither tier.
+    """
+
+    db_path: Optional[str]
+    max_entries: int
+    memory: TTLCache
+    hits: int
+    misses: int
+
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        memory_size: int = 256,
+        max_entries: int = 10_000,
+        ttl_seconds: float = 7 * 24 * 3600
+    ) -> None:
+        """
+        Args:
+            db_path (str, optional): SQLite file for the disk tier. Memory only when None.
+            memory_size (int, optional): Entries in the in-memory tier. Defaults to 256.
+            max_entries (int, optional): Rows kept in the disk tier. Defaults to 10000.
+            ttl_seconds (float, optional): Lifetime of in-memory entries. Defaults to one week.
+
+        Raises:
+            CustomException: If the SQLite database cannot be opened.
+        """
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.memory = TTLCache(max_size=memory_size, ttl_seconds=ttl_seconds)
+        self.hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+        if db_path:
+            try:
+                os.makedirs(os.path.dirname(db_path) or ".", exist_ok=True)
+                self._conn = sqlite3.connect(db_path, check_same_thread=False)
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses ("
+                    "key TEXT PRIMARY KEY, index_version TEXT NOT NULL, "
+                    "response TEXT NOT NULL, last_access REAL NOT NULL)"
+                )
+                self._conn.execute(
+                    "CREATE INDEX IF NOT EXISTS responses_last_access ON responses(last_access)"
+                )
+                self._conn.commit()
+                logging.info(f"Response cache opened at: {db_path}")
+            except Exception as e:
+                logging.exception("Failed to open response cache.")
+                raise CustomException(f"Failed to open response cache at {db_path}", e)
+
+    @staticmethod
+    def make_key(query: str, model_name: str, prompt_template: str, index_version: str) -> str:
+        """
+        Builds the cache key for an answer.
+
+        Args:
+            query (str): Raw user query.
+            model_name (str): LLM model name.
+            prompt_template (str): Prompt template text.
+            index_version (str): Version of the vector store the answer was grounded on.
+
+        Returns:
+            str: Hex digest identifying the answer.
+        """
+        prompt_hash = hashlib.sha256(prompt_template.encode("utf-8")).hexdigest()
+        raw = "\x1f".join([normalize_query(query), model_name, prompt_hash, index_version])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Looks up an answer, promoting disk hits into the memory tier.
+
+        Args:
+            key (str): Key from ``make_key``.
+
+        Returns:
+            Optional[str]: The cached answer, or None on a miss.
+        """
+        response = self.memory.get(key)
+        if response is None and self._conn is not None:
+            with self._lock:
+                row = self._conn.execute("SELECT response FROM responses WHERE key = ?", (key,)).fetchone()
+                if row is not None:
+                    self._conn.execute("UPDATE responses SET last_access = ? WHERE key = ?", (time.time(), key))
+                    self._conn.commit()
+            if row is not None:
+                response = row[0]
+                self.memory.set(key, response)
+
+        if response is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return response
+
+    def set(self, key: str, response: str, index_version: str) -> None:
+        """
+        Stores an answer in both tiers and evicts the oldest disk rows if needed.
+
+        Args:
+            key (str): Key from ``make_key``.
+            response (str): LLM answer.
+            index_version (str): Vector store version the answer belongs to.
+        """
+        self.memory.set(key, response)
+        if self._conn is None:
+            return
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, index_version, response, last_access) "
+                "VALUES (?, ?, ?, ?)",
+                (key, index_version, response, time.time())
+            )
+            overflow = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM responses WHERE key IN "
+                    "(SELECT key FROM responses ORDER BY last_access LIMIT ?)",
+                    (overflow,)
+                )
+            self._conn.commit()
+
+    def invalidate_other_versions(self, index_version: str) -> int:
+        """
+        Drops every cached answer that was not produced against ``index_version``.
+
+        Args:
+            index_version (str): The current vector store version.
+
+        Returns:
+            int: Number of disk rows removed.
+        """
+        self.memory.clear()
+        if self._conn is None:
+            return 0
+
+        with self._lock:
+            removed = self._conn.execute(
+                "DELETE FROM responses WHERE index_version != ?", (index_version,)
+            ).rowcount
+            self._conn.commit()
+
+        if removed:
+            logging.info(f"Invalidated {removed} cached responses from older index versions.")
+        return removed
+
+    def stats(self) -> dict:
+        """
+        Returns hit and miss counters and the size of both tiers.
+
+        Returns:
+            dict: Cache statistics.
+        """
+        lookups = self.hits + self.misses
+        stats = {
+            "memory_size": self.memory.stats()["size"],
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+        if self._conn is not None:
+            with self._lock:
+                stats["disk_size"] = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return stats
@@ -0,0 +1,75 @@
+from typing import Hashable, Sequence
+
+import numpy as np
+
+
+def exact_neighbors(query_vectors: np.ndarray, item_vectors: np.ndarray, k: int, block_size: int = 1024) -> np.ndarray:
+    """
+    Returns the exact top-k items per query by cosine similarity, computed by
+    brute force in blocks of queries. Used as ground truth for approximate indexes.
+
+    Args:
+        query_vectors (np.ndarray): Query embeddings of shape (queries, dim).
+        item_vectors (np.ndarray): Item embeddings of shape (items, dim).
+        k (int): Neighbors per query; capped at the number of items.
+        block_size (int, optional): Queries scored per matmul. Defaults to 1024.
+
+    Returns:
+        np.ndarray: Item rows of shape (queries, k), most similar first.
+    """
+    def normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
+
+    items = normalize(item_vectors)
+    queries = normalize(query_vectors)
+    k = min(k, len(items))
+    neighbors = np.empty((len(queries), k), dtype=np.int64)
+    for start in range(0, len(queries), block_size):
+        scores = queries[start:start + block_size] @ items.T
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+        neighbors[start:start + block_size] = np.take_along_axis(top, order, axis=1)
+    return neighbors
+
+
+def recall_at_k(retrieved: Sequence[Hashable], relevant: Sequence[Hashable], k: int) -> float:
+    """
+    Returns the fraction of the top-k relevant items found in the top-k retrieved ones.
+
+    Args:
+        retrieved (Sequence[Hashable]): Retrieved item IDs, best first.
+        relevant (Sequence[Hashable]): Ground-truth item IDs, best first.
+        k (int): Cutoff.
+
+    Returns:
+        float: Recall between 0 and 1; 1 when there is nothing relevant.
+    """
+    expected = set(relevant[:k])
+    if not expected:
+        return 1.0
+    return len(expected & set(retrieved[:k])) / len(expected)
+
+
+def pareto_front(rows: list[dict], maximize: Sequence[str] = (), minimize: Sequence[str] = ()) -> list[bool]:
+    """
+    Flags the rows that no other row dominates, i.e. no other row is at least as
+    good on every objective and strictly better on one.
+
+    Args:
+        rows (list[dict]): Measured configurations.
+        maximize (Sequence[str], optional): Keys where higher is better, e.g. recall.
+        minimize (Sequence[str], optional): Keys where lower is better, e.g. latency.
+
+    Returns:
+        list[bool]: True for each Pareto-optimal row, in input order.
+    """
+    def objectives(row: dict) -> np.ndarray:
+        return np.array([row[key] for key in maximize] + [-row[key] for key in minimize], dtype=float)
+
+    points = [objectives(row) for row in rows]
+    return [
+        not any(np.all(other >= point) and np.any(other > point) for other in points)
+        for point in points
+    ]
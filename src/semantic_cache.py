@@ -0,0 +1,187 @@
+import threading
+from typing import Optional
+
+import numpy as np
+
+from utils.logger import logging
+
+
+class SemanticCache:
+    """
+    Answer cache that matches queries by embedding similarity instead of exact text,
+    so paraphrases such as "school comedy anime" and "comedic anime set in high
+    school" can share one LLM answer.
+
+    Entries are held in a small in-memory matrix of L2-normalized query embeddings
+    searched with a single matrix-vector product; at a few thousand entries this
+    exact search is cheaper than maintaining an approximate index. When full, the
+    oldest entry is overwritten.
+
+    Entries are tagged with the index version they were generated against, and
+    a lookup only matches entries of its own version, so an answer stored late
+    by a request on an older index is never served for the current one.
+
+    Attributes:
+        threshold (float): Minimum cosine similarity for a hit.
+        max_entries (int): Maximum number of cached answers.
+        hits (int): Lookups that returned a cached answer.
+        misses (int): Lookups that did not.
+    """
+
+    threshold: float
+    max_entries: int
+    hits: int
+    misses: int
+
+    # Upper edges of the similarity histogram buckets
+    BUCKETS = (0.5, 0.6, 0.7, 0.8, 0.85, 0.9, 0.92, 0.95, 0.98, 1.0)
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 1000) -> None:
+        """
+        Args:
+            threshold (float, optional): Minimum cosine similarity for a hit. Defaults to 0.92.
+            max_entries (int, optional): Maximum number of cached answers. Defaults to 1000.
+        """
+        if not 0.0 < threshold <= 1.0:
+            raise ValueError("threshold must be in (0, 1].")
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._vectors: Optional[np.ndarray] = None
+        self._answers: list[str] = []
+        self._versions: list[Optional[str]] = []
+        self._next_slot = 0
+        self._histogram = [0] * len(self.BUCKETS)
+        self._similarity_sum = 0.0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._answers)
+
+    def lookup(self, vector: list[float], index_version: Optional[str] = None) -> Optional[tuple[str, float]]:
+        """
+        Finds the most similar cached query and returns its answer if it clears the threshold.
+
+        Args:
+            vector (list[float]): Embedding of the incoming query.
+            index_version (str, optional): Only entries added with this version match.
+
+        Returns:
+            Optional[tuple[str, float]]: The cached answer and its similarity, or None.
+        """
+        query = self._normalize(vector)
+        with self._lock:
+            current = [version == index_version for version in self._versions]
+            if not any(current) or self._vectors is None:
+                self.misses += 1
+                return None
+
+            similarities = np.where(current, self._vectors[:len(self._answers)] @ query, -np.inf)
+            best = int(np.argmax(similarities))
+            similarity = float(similarities[best])
+            self._record(similarity)
+
+            if similarity >= self.threshold:
+                self.hits += 1
+                return self._answers[best], similarity
+            self.misses += 1
+            return None
+
+    def add(self, vector: list[float], answer: str, index_version: Optional[str] = None) -> None:
+        """
+        Caches an answer under its query embedding, overwriting the oldest entry if full.
+
+        Args:
+            vector (list[float]): Embedding of the answered query.
+            answer (str): The LLM answer.
+            index_version (str, optional): Index version the answer was generated against.
+        """
+        query = self._normalize(vector)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, query.shape[0]), dtype=np.float32)
+
+            slot = self._next_slot
+            self._vectors[slot] = query
+            if slot < len(self._answers):
+                self._answers[slot] = answer
+                self._versions[slot] = index_version
+            else:
+                self._answers.append(answer)
+                self._versions.append(index_version)
+            self._next_slot = (slot + 1) % self.max_entries
+
+    def clear(self) -> None:
+        """Drops all cached answers; metrics are kept."""
+        with self._lock:
+            self._vectors = None
+            self._answers = []
+            self._versions = []
+            self._next_slot = 0
+
+    def invalidate_other_versions(self, index_version: Optional[str]) -> int:
+        """
+        Drops every cached answer that was not generated against ``index_version``.
+
+        Args:
+            index_version (str, optional): The current index version.
+
+        Returns:
+            int: Number of answers removed.
+        """
+        with self._lock:
+            keep = [slot for slot, version in enumerate(self._versions) if version == index_version]
+            removed = len(self._answers) - len(keep)
+            if not removed:
+                return 0
+            if self._vectors is not None:
+                self._vectors[:len(keep)] = self._vectors[keep]
+            self._answers = [self._answers[slot] for slot in keep]
+            self._versions = [self._versions[slot] for slot in keep]
+            self._next_slot = len(keep) % self.max_entries
+
+        logging.info(f"Invalidated {removed} semantically cached answers from older index versions.")
+        return removed
+
+    def stats(self) -> dict:
+        """
+        Returns hit rate and the distribution of best-match similarities seen by lookups.
+
+        Returns:
+            dict: Size, hits, misses, hit rate, mean similarity and a histogram keyed
+                by bucket upper edge.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            compared = sum(self._histogram)
+            return {
+                "size": len(self._answers),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "mean_similarity": self._similarity_sum / compared if compared else 0.0,
+                "similarity_histogram": {
+                    f"le_{edge}": count for edge, count in zip(self.BUCKETS, self._histogram)
+                },
+            }
+
+    def _record(self, similarity: float) -> None:
+        self._similarity_sum += similarity
+        for index, edge in enumerate(self.BUCKETS):
+            if similarity <= edge:
+                self._histogram[index] += 1
+                return
+        self._histogram[-1] += 1
+
+    @staticmethod
+    def _normalize(vector: list[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(array)
+        if norm == 0:
+            logging.warning("Received a zero query embedding in the semantic cache.")
+            return array
+        return array / norm
@@ -0,0 +1,85 @@
+import contextvars
+import time
+from typing import Callable, Iterable, Iterator, Optional
+
+from utils.logger import logging
+
+
+class TimedTokenStream:
+    """
+    Iterable over generated tokens that measures time-to-first-token separately
+    from total latency. Timing starts when iteration starts.
+
+    Attributes:
+        time_to_first_token (Optional[float]): Seconds until the first token, once known.
+        total_latency (Optional[float]): Seconds until the last token, once exhausted.
+        text (str): Concatenation of the tokens yielded so far.
+    """
+
+    time_to_first_token: Optional[float]
+    total_latency: Optional[float]
+    text: str
+
+    def __init__(self, tokens: Iterable[str], on_complete: Optional[Callable[[str], None]] = None) -> None:
+        """
+        Args:
+            tokens (Iterable[str]): Source of tokens, typically a lazy generator.
+            on_complete (Callable, optional): Called with the full text once the
+                stream is exhausted, e.g. to cache the answer.
+        """
+        self._tokens = tokens
+        self._on_complete = on_complete
+        self.time_to_first_token = None
+        self.total_latency = None
+        self.text = ""
+
+    def __iter__(self) -> Iterator[str]:
+        start = time.perf_counter()
+        parts: list[str] = []
+
+        for token in self._tokens:
+            if not token:
+                continue
+            if self.time_to_first_token is None:
+                self.time_to_first_token = time.perf_counter() - start
+            parts.append(token)
+            yield token
+
+        self.total_latency = time.perf_counter() - start
+        self.text = "".join(parts)
+        logging.info(
+            f"Streamed recommendation: time to first token {self.time_to_first_token or 0.0:.3f}s, "
+            f"total {self.total_latency:.3f}s."
+        )
+        if self._on_complete is not None:
+            self._on_complete(self.text)
+
+
+def run_in_context(tokens: Iterable[str]) -> Iterator[str]:
+    """
+    Advances a token generator inside its own copy of the current context.
+
+    Context variables set by the generator, such as the request ID and metrics
+    record of ``request_context``, then stay with it across yields instead of
+    leaking into whatever code consumes the stream in between.
+
+    Args:
+        tokens (Iterable[str]): Source of tokens, typically a generator.
+
+    Yields:
+        str: The tokens of ``tokens``.
+    """
+    context = contextvars.copy_context()
+    iterator = iter(tokens)
+    try:
+        while True:
+            try:
+                token = context.run(next, iterator)
+            except StopIteration:
+                return
+            yield token
+    finally:
+        close = getattr(iterator, "close", None)
+        if close is not None:
+            # An abandoned stream unwinds in the context it started in
+            context.run(close)
@@ -0,0 +1,109 @@
+import re
+from typing import Optional
+
+import numpy as np
+
+from src.metadata_index import genre_key
+
+_ANCHOR = re.compile(
+    r"^\s*(?:i\s+(?:really\s+)?(?:liked|loved|enjoyed|like|love)"
+    r"|(?:(?:recommend\s+(?:me\s+)?)?(?:more|anime|shows?|series|something|titles?|others?)\s+(?:like|similar\s+to))"
+    r"|similar\s+to|more\s+like\s+this:?)\s+(?P<title>.+?)[\s.!?]*$",
+    re.IGNORECASE
+)
+
+
+def extract_title_anchor(query: str) -> Optional[str]:
+    """
+    Extracts the title from "more like this" phrasings, e.g. "I liked Cowboy Bebop"
+    or "anime similar to Trigun".
+
+    Args:
+        query (str): User query.
+
+    Returns:
+        Optional[str]: The title part of the query, or None if the query is not
+            anchored on a title.
+    """
+    match = _ANCHOR.match(query)
+    return match.group("title") if match else None
+
+
+def trigrams(text: str) -> set[str]:
+    """
+    Returns the character trigrams of a normalized, space-padded string.
+
+    Args:
+        text (str): Title or query fragment.
+
+    Returns:
+        set[str]: Distinct trigrams, e.g. "bebop" -> {"  b", " be", "beb", ...}.
+    """
+    padded = f"  {genre_key(text)} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TitleResolver:
+    """
+    Fuzzy title lookup backed by a trigram inverted index.
+
+    Exact matches on the normalized title are a dictionary lookup; otherwise
+    candidate titles sharing trigrams with the query are scored by the Dice
+    coefficient of their trigram sets, so typos and partial punctuation
+    ("cowboy bebop", "Cowboy Beebop") still resolve.
+
+    Attributes:
+        titles (list[str]): Indexed titles; resolved rows index into this list.
+        threshold (float): Minimum Dice similarity for a fuzzy match.
+    """
+
+    def __init__(self, titles: list[str], threshold: float = 0.6) -> None:
+        """
+        Args:
+            titles (list[str]): Titles in row order.
+            threshold (float, optional): Minimum Dice similarity. Defaults to 0.6.
+        """
+        self.titles = titles
+        self.threshold = threshold
+        self._exact: dict[str, int] = {}
+        postings: dict[str, list[int]] = {}
+        self._sizes = np.zeros(len(titles), dtype=np.float32)
+
+        for row, title in enumerate(titles):
+            self._exact.setdefault(genre_key(title), row)
+            grams = trigrams(title)
+            self._sizes[row] = len(grams)
+            for gram in grams:
+                postings.setdefault(gram, []).append(row)
+
+        self._postings = {gram: np.asarray(rows, dtype=np.int32) for gram, rows in postings.items()}
+
+    def resolve(self, text: str) -> Optional[tuple[int, float]]:
+        """
+        Finds the title best matching ``text``.
+
+        Args:
+            text (str): Title as typed by the user.
+
+        Returns:
+            Optional[tuple[int, float]]: Row of the title and its similarity, or
+                None if no title reaches the threshold.
+        """
+        row = self._exact.get(genre_key(text))
+        if row is not None:
+            return row, 1.0
+
+        grams = trigrams(text)
+        if not grams or not self.titles:
+            return None
+        overlap = np.zeros(len(self.titles), dtype=np.float32)
+        for gram in grams:
+            rows = self._postings.get(gram)
+            if rows is not None:
+                overlap[rows] += 1
+
+        dice = 2 * overlap / (self._sizes + len(grams))
+        row = int(np.argmax(dice))
+        if dice[row] < self.threshold:
+            return None
+        return row, float(dice[row])
@@ -1,86 +1,524 @@
-from langchain.text_splitter import CharacterTextSplitter
-from langchain_community.vectorstores import Chroma
-from langchain_community.document_loaders.csv_loader import CSVLoader
-from langchain_huggingface import HuggingFaceEmbeddings
+import csv
+import hashlib
+import json
+import math
+import os
+import time
+import uuid
+from itertools import islice
+from typing import Callable, Iterable, Iterator, Optional
 
+import numpy as np
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from src.data_loader import processed_format, split_genres
+from src.embedding_cache import CachedEmbeddings, EmbeddingCache
+from src.embedding_engine import LazyEmbeddings
+from src.lexical_index import HybridRetriever, LexicalIndex
+from src.neighbor_table import NeighborTable
+from src.numpy_store import NumpyVectorStore
+from src.metadata_index import MetadataIndex, chroma_genre_flag
+from src.query_cache import CachingRetriever, TTLCache
 from utils.logger import logging
 from utils.custom_exception import CustomException
+from utils.startup import lazy_import
 
 from dotenv import load_dotenv
 load_dotenv()
 
 
+def _chroma() -> type:
+    # chromadb and the community integrations are imported on first use
+    lazy_import("chromadb")
+    return lazy_import("langchain_community.vectorstores.chroma").Chroma
+
+
+def content_hash(text: str) -> str:
+    """
+    Returns a short, stable hash of a document's text.
+
+    Args:
+        text (str): Document content, e.g. a row's combined_info.
+
+    Returns:
+        str: First 16 hex characters of the SHA-256 digest.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+UNVERSIONED = "unversioned"
+
+# CSV columns kept as typed document metadata
+METADATA_COLUMNS = ["MAL_ID", "Name", "Score", "Genres"]
+
+
+def typed_metadata(metadata: dict) -> dict:
+    """
+    Converts CSV string metadata into typed values: MAL_ID as int, Score as float
+    (dropped when missing) and Genres as a list of genre names.
+
+    Args:
+        metadata (dict): Metadata as read by CSVLoader.
+
+    Returns:
+        dict: Metadata with typed values.
+    """
+    typed = dict(metadata)
+    if str(typed.get("MAL_ID", "")).isdigit():
+        typed["MAL_ID"] = int(typed["MAL_ID"])
+    if "Score" in typed:
+        try:
+            score = float(typed["Score"])
+        except (TypeError, ValueError):
+            score = math.nan
+        if math.isnan(score):
+            del typed["Score"]
+        else:
+            typed["Score"] = score
+    if isinstance(typed.get("Genres"), str):
+        typed["Genres"] = split_genres(typed["Genres"])
+    return typed
+
+
+def chroma_metadata(metadata: dict) -> dict:
+    """
+    Flattens typed metadata for Chroma: Genres becomes a comma-separated string
+    plus one boolean flag per genre, so genre filters can be expressed as ``where`` clauses.
+
+    Args:
+        metadata (dict): Typed metadata.
+
+    Returns:
+        dict: Chroma-compatible metadata.
+    """
+    flat = dict(metadata)
+    genres = flat.get("Genres")
+    if isinstance(genres, list):
+        flat["Genres"] = ", ".join(genres)
+        flat.update({chroma_genre_flag(genre): True for genre in genres})
+    return flat
+
+
+def hnsw_metadata(
+    m: Optional[int] = None,
+    construction_ef: Optional[int] = None,
+    search_ef: Optional[int] = None
+) -> dict:
+    """
+    Returns Chroma collection metadata setting the HNSW graph parameters.
+
+    Parameters left as None keep Chroma's defaults. They are fixed when the
+    collection is created; an existing collection keeps its own.
+
+    Args:
+        m (int, optional): Neighbors per graph node; more improves recall at the cost of size.
+        construction_ef (int, optional): Candidate list size while inserting.
+        search_ef (int, optional): Candidate list size while querying; more improves
+            recall at the cost of latency.
+
+    Returns:
+        dict: ``hnsw:*`` collection metadata.
+    """
+    params = {"hnsw:M": m, "hnsw:construction_ef": construction_ef, "hnsw:search_ef": search_ef}
+    return {key: value for key, value in params.items() if value is not None}
+
+
 class VectorStoreBuilder:
     """
-    Builds and manages a Chroma vector store from a CSV file using HuggingFace embeddings.
+    Builds and manages a vector store from a CSV file using HuggingFace embeddings.
+
+    Two storage backends are supported: "chroma" (Chroma DB) and "numpy", a
+    brute-force store over a memory-mapped embedding matrix for small catalogues.
+
+    Documents come from the processed dataset (CSV, Arrow IPC or Parquet) or,
+    in streaming mode, from a ``document_source`` such as
+    ``AnimeDataloader.iter_documents`` that reads the raw CSV directly.
+
+    Only the vector store step is bounded by the batch size: documents are
+    read, chunked, embedded and inserted one batch at a time. The artifacts
+    built after it hold the whole catalogue in memory, since they are
+    whole-catalogue structures that are loaded entirely at query time. The
+    lexical index keeps every chunk, and the neighbor table keeps one document
+    and one embedding per title. Deduplicating chunk IDs also keeps a set of
+    every ID, as do the Chroma metadata index and incremental diff.
 
     Attributes:
-        csv_path (str): Path to the input CSV file.
-        persist_dir (str): Directory where Chroma DB will be saved.
-        embedding (HuggingFaceEmbeddings): Embedding model used for vectorization.
+        csv_path (str): Path to the processed dataset.
+        persist_dir (str): Directory where the vector store will be saved.
+        embedding (Embeddings): Embedding model used for vectorization.
+        backend (str): Storage backend, "chroma" or "numpy".
+        dtype (str): Storage dtype of the numpy backend, "float32" or "float16".
+        document_source (Callable, optional): Returns a fresh iterable of documents
+            to index instead of reading ``csv_path``.
+        stream_batch_size (int): Documents processed per build batch.
+        chunk_size (int): Maximum characters per chunk.
+        chunk_overlap (int): Characters shared by consecutive chunks.
+        chunk_separator (str): Separator the splitter cuts documents at.
+        collection_metadata (dict): Chroma collection metadata, e.g. from ``hnsw_metadata``.
     """
     
     csv_path: str
     persist_dir: str
-    embedding: HuggingFaceEmbeddings
+    embedding: Embeddings
+    backend: str
+    dtype: str
+
+    VERSION_FILE = "INDEX_VERSION"
+    BACKENDS = ("chroma", "numpy")
 
-    def __init__(self, csv_path: str, persist_dir: str = "chroma_db") -> None:
+    def __init__(
+        self,
+        csv_path: str,
+        persist_dir: str = "chroma_db",
+        embedding: Optional[Embeddings] = None,
+        cache_dir: Optional[str] = None,
+        cache_max_entries: int = 200_000,
+        backend: str = "chroma",
+        dtype: str = "float32",
+        document_source: Optional[Callable[[], Iterable[Document]]] = None,
+        stream_batch_size: int = 1000,
+        chunk_size: int = 1000,
+        chunk_overlap: int = 40,
+        chunk_separator: str = "\n\n",
+        collection_metadata: Optional[dict] = None
+    ) -> None:
         """
         Initializes the vector store builder.
 
         Args:
-            csv_path (str): Path to the CSV file containing documents.
-            persist_dir (str, optional): Directory to persist Chroma DB. Defaults to "chroma_db".
+            csv_path (str): Path to the processed dataset: .csv, .arrow, .feather or .parquet.
+            persist_dir (str, optional): Directory to persist the store. Defaults to "chroma_db".
+            embedding (Embeddings, optional): Embedding model to use. Defaults to
+                HuggingFace "all-MiniLM-L6-v2".
+            cache_dir (str, optional): Directory of a persistent embedding cache that is
+                checked before calling the model. Disabled when None.
+            cache_max_entries (int, optional): Size bound of the embedding cache.
+            backend (str, optional): "chroma" or "numpy". Defaults to "chroma".
+            dtype (str, optional): Storage dtype of the numpy backend. Defaults to "float32".
+            document_source (Callable, optional): Returns a fresh iterable of documents,
+                e.g. ``AnimeDataloader.iter_documents``. Read instead of ``csv_path`` when set.
+            stream_batch_size (int, optional): Documents chunked, embedded and inserted
+                per batch. Defaults to 1000.
+            chunk_size (int, optional): Maximum characters per chunk. Defaults to 1000.
+            chunk_overlap (int, optional): Characters shared by consecutive chunks. Defaults to 40.
+            chunk_separator (str, optional): Separator the splitter cuts documents at.
+                Defaults to blank lines, which keeps each catalogue row whole.
+            collection_metadata (dict, optional): Chroma collection metadata used when
+                the collection is created, e.g. HNSW parameters from ``hnsw_metadata``.
         """
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown vector store backend '{backend}', expected one of {self.BACKENDS}.")
+
         self.csv_path = csv_path
         self.persist_dir = persist_dir
-        self.embedding = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+        self.backend = backend
+        self.dtype = dtype
+        self.document_source = document_source
+        self.stream_batch_size = stream_batch_size
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.chunk_separator = chunk_separator
+        self.collection_metadata = collection_metadata or None
+        self.embedding = embedding or LazyEmbeddings(model_name="all-MiniLM-L6-v2")
+        if cache_dir:
+            self.embedding = CachedEmbeddings(self.embedding, EmbeddingCache(cache_dir, cache_max_entries))
         logging.info(f"VectorStoreBuilder initialized with CSV: {csv_path} and persist_dir: {persist_dir}")
 
-    def build_and_save_vectorstore(self) -> None:
+    def build_and_save_vectorstore(self, incremental: bool = False) -> None:
         """
-        Loads documents from CSV, splits them into chunks, builds a vector store, and persists it.
-        
+        Loads documents, splits them into chunks, builds a vector store, and persists it.
+
+        Every chunk is stored under a deterministic ID made of the row's MAL_ID,
+        a hash of its combined_info and the chunk index. A full build replaces the
+        whole collection; an incremental build embeds only chunks whose ID is not
+        stored yet and deletes IDs that no longer appear in the CSV. A new index
+        version is recorded whenever the stored content changes.
+
+        Documents are processed in batches of ``stream_batch_size``: each batch is
+        chunked, embedded and inserted before the next one is read.
+
+        Args:
+            incremental (bool, optional): Only apply the diff against the persisted
+                store instead of rebuilding it. Defaults to False.
+
         Raises:
             CustomException: If any step fails.
         """
         try:
-            logging.info("Loading documents from CSV...")
-            loader = CSVLoader(
-                file_path=self.csv_path,
-                encoding='utf-8',
-                metadata_columns=[]
-            )
-            documents = loader.load()
-            logging.info(f"Loaded {len(documents)} documents from CSV.")
+            if self.backend == "numpy":
+                changed = self._build_numpy_store(self._chunk_batches(), incremental)
+            else:
+                changed = self._build_chroma_store(self._chunk_batches(), incremental)
 
-            logging.info("Splitting documents into chunks...")
-            splitter = CharacterTextSplitter(chunk_size=1000, chunk_overlap=40)
-            texts = splitter.split_documents(documents)
-            logging.info(f"Split into {len(texts)} chunks.")
-
-            logging.info("Creating and saving Chroma vector store...")
-            db = Chroma.from_documents(texts, self.embedding, persist_directory=self.persist_dir)
-            db.persist()
+            if changed or self.index_version() == UNVERSIONED:
+                self._write_index_version()
             logging.info(f"Vector store saved to directory: {self.persist_dir}")
 
         except Exception as e:
             logging.exception("Failed to build and save vector store.")
             raise CustomException("Vector store creation failed", e)
 
-    def load_vector_store(self) -> Chroma:
+    def build_lexical_index(self) -> LexicalIndex:
+        """
+        Builds the BM25 index over the same chunks as the vector store and persists it.
+
+        The chunks are read batch by batch, but the index keeps all of them, so
+        memory grows with the catalogue.
+
+        Returns:
+            LexicalIndex: The built index.
+
+        Raises:
+            CustomException: If any step fails.
+        """
+        try:
+            texts = [text for _, batch in self._chunk_batches() for text in batch]
+            index = LexicalIndex.build(texts)
+            index.save(self.persist_dir)
+            return index
+        except Exception as e:
+            logging.exception("Failed to build lexical index.")
+            raise CustomException("Lexical index creation failed", e)
+
+    def build_neighbor_table(self, top_n: int = 20) -> NeighborTable:
+        """
+        Precomputes the top-N most similar titles per MAL_ID and persists the table.
+
+        Titles are embedded whole, one batch of ``stream_batch_size`` documents at
+        a time, and each batch is stored as float32 right away. With an embedding
+        cache configured these are cache hits after a vector store build. The
+        table needs every title and its embedding, so memory grows with the
+        catalogue.
+
+        Args:
+            top_n (int, optional): Neighbors kept per title. Defaults to 20.
+
+        Returns:
+            NeighborTable: The built table.
+
+        Raises:
+            CustomException: If any step fails.
+        """
+        try:
+            titles: dict = {}
+            blocks: list[np.ndarray] = []
+            documents = iter(self.iter_documents())
+            while batch := list(islice(documents, self.stream_batch_size)):
+                new = []
+                for document in batch:
+                    if document.metadata["MAL_ID"] not in titles:
+                        titles[document.metadata["MAL_ID"]] = document
+                        new.append(document)
+                if new:
+                    blocks.append(np.asarray(
+                        self.embedding.embed_documents([d.page_content for d in new]), dtype=np.float32
+                    ))
+            vectors = np.concatenate(blocks) if blocks else np.empty((0, 0), dtype=np.float32)
+            table = NeighborTable.build(list(titles.values()), vectors, top_n=top_n)
+            table.save(self.persist_dir)
+            return table
+        except Exception as e:
+            logging.exception("Failed to build neighbor table.")
+            raise CustomException("Neighbor table creation failed", e)
+
+    def _keyed_chunks(self, documents: list[Document]) -> tuple[list[str], list[Document]]:
+        """
+        Splits documents into chunks and assigns each a content-addressed ID.
+
+        The hash covers the text and the typed metadata fields, so a changed score
+        or genre list also yields a new ID.
+
+        Args:
+            documents (list[Document]): Documents loaded from the processed CSV.
+
+        Returns:
+            tuple[list[str], list[Document]]: Unique chunk IDs and the matching chunks.
+        """
+        splitter = lazy_import("langchain.text_splitter").CharacterTextSplitter(
+            separator=self.chunk_separator,
+            chunk_size=self.chunk_size,
+            chunk_overlap=self.chunk_overlap
+        )
+        keyed: dict[str, Document] = {}
+
+        for document in documents:
+            mal_id = document.metadata["MAL_ID"]
+            fields = {column: document.metadata.get(column) for column in METADATA_COLUMNS[1:]}
+            doc_hash = content_hash(document.page_content + json.dumps(fields, sort_keys=True))
+            for index, chunk in enumerate(splitter.split_documents([document])):
+                chunk.metadata["content_hash"] = doc_hash
+                keyed[f"{mal_id}:{doc_hash}:{index}"] = chunk
+
+        return list(keyed.keys()), list(keyed.values())
+
+    def _chunk_batches(self) -> Iterator[tuple[list[str], list[Document]]]:
         """
-        Loads the persisted Chroma vector store.
+        Yields keyed chunks batch by batch, skipping IDs already yielded. The set
+        of yielded IDs grows with the catalogue.
+
+        Yields:
+            tuple[list[str], list[Document]]: Chunk IDs and the matching chunks of one batch.
+        """
+        documents = iter(self.iter_documents())
+        seen: set[str] = set()
+        total_documents = total_chunks = 0
+        while batch := list(islice(documents, self.stream_batch_size)):
+            ids, texts = self._keyed_chunks(batch)
+            pairs = [(doc_id, text) for doc_id, text in zip(ids, texts) if doc_id not in seen]
+            seen.update(doc_id for doc_id, _ in pairs)
+            total_documents += len(batch)
+            total_chunks += len(pairs)
+            yield [doc_id for doc_id, _ in pairs], [text for _, text in pairs]
+        logging.info(f"Split {total_documents} documents into {total_chunks} chunks.")
+
+    def _build_chroma_store(self, batches: Iterable[tuple[list[str], list[Document]]], incremental: bool) -> bool:
+        """
+        Writes the Chroma store batch by batch. A full build replaces the collection;
+        an incremental build adds chunks whose ID is not stored yet and deletes
+        stored IDs that no longer appear.
+
+        Args:
+            batches (Iterable): Chunk IDs and chunks per batch, as yielded by ``_chunk_batches``.
+            incremental (bool): Apply the diff against the persisted collection.
 
         Returns:
-            Chroma: Loaded vector store.
+            bool: True if any chunk was added or removed.
+        """
+        Chroma = _chroma()
+        if not incremental:
+            logging.info("Creating and saving Chroma vector store...")
+            Chroma(persist_directory=self.persist_dir, embedding_function=self.embedding).delete_collection()
+        db = Chroma(
+            persist_directory=self.persist_dir,
+            embedding_function=self.embedding,
+            collection_metadata=self.collection_metadata
+        )
+        existing_ids = set(db.get(include=[])["ids"]) if incremental else set()
+
+        wanted_ids: set[str] = set()
+        metadata: list[Document] = []
+        added = 0
+        for ids, texts in batches:
+            wanted_ids.update(ids)
+            # Chroma filters with where clauses; the index provides the genre vocabulary.
+            # Only the fields it reads are kept, one small dict per chunk
+            metadata.extend(
+                Document(page_content="", metadata={"Genres": text.metadata.get("Genres"),
+                                                    "Score": text.metadata.get("Score")})
+                for text in texts
+            )
+            new_pairs = [(doc_id, text) for doc_id, text in zip(ids, texts) if doc_id not in existing_ids]
+            if new_pairs:
+                db.add_documents(
+                    [Document(page_content=text.page_content, metadata=chroma_metadata(text.metadata))
+                     for _, text in new_pairs],
+                    ids=[doc_id for doc_id, _ in new_pairs]
+                )
+                added += len(new_pairs)
+
+        stale_ids = list(existing_ids - wanted_ids)
+        if stale_ids:
+            db.delete(ids=stale_ids)
+        db.persist()
+        MetadataIndex.build(metadata).save(self.persist_dir)
+
+        logging.info(
+            f"Chroma vector store in {self.persist_dir}: {added} added, "
+            f"{len(stale_ids)} removed, {len(wanted_ids) - added} unchanged."
+        )
+        return not incremental or bool(stale_ids or added)
+
+    def _build_numpy_store(self, batches: Iterable[tuple[list[str], list[Document]]], incremental: bool) -> bool:
+        """
+        Writes the numpy backend store. In incremental mode vectors of unchanged
+        chunks are reused from the persisted store and only new chunks are embedded.
+
+        Args:
+            batches (Iterable): Chunk IDs and chunks per batch, as yielded by ``_chunk_batches``.
+            incremental (bool): Reuse vectors from the persisted store.
+
+        Returns:
+            bool: True if the stored content changed.
+        """
+        previous: dict[str, np.ndarray] = {}
+        if incremental and os.path.exists(os.path.join(self.persist_dir, NumpyVectorStore.VECTORS_FILE)):
+            existing = NumpyVectorStore.load(self.persist_dir, self.embedding)
+            previous = {doc_id: existing.vectors[row] for row, doc_id in enumerate(existing.ids)}
+
+        all_ids: list[str] = []
+        all_texts: list[Document] = []
+        blocks: list[np.ndarray] = []
+        embedded = 0
+        for ids, texts in batches:
+            missing = [(doc_id, text) for doc_id, text in zip(ids, texts) if doc_id not in previous]
+            computed = self.embedding.embed_documents([text.page_content for _, text in missing]) if missing else []
+            vectors = dict(zip((doc_id for doc_id, _ in missing), computed))
+            blocks.append(np.asarray(
+                [vectors[doc_id] if doc_id in vectors else previous[doc_id] for doc_id in ids], dtype=np.float32
+            ))
+            all_ids.extend(ids)
+            all_texts.extend(texts)
+            embedded += len(missing)
+
+        if incremental and not embedded and set(previous) == set(all_ids):
+            logging.info(f"NumPy vector store in {self.persist_dir} is up to date.")
+            return False
+
+        store = NumpyVectorStore(embedding=self.embedding, dtype=self.dtype)
+        if blocks:
+            store.add_vectors(all_ids, all_texts, np.concatenate(blocks))
+        store.save(self.persist_dir)
+        logging.info(
+            f"NumPy vector store: {embedded} chunks embedded, {len(all_ids) - embedded} reused, "
+            f"{len(set(previous) - set(all_ids))} removed."
+        )
+        return True
+
+    def index_version(self) -> str:
+        """
+        Returns the version of the persisted vector store.
+
+        The version changes every time a build alters the stored content, so it can
+        be used to invalidate anything derived from the index, such as cached answers.
+
+        Returns:
+            str: The recorded version, or "unversioned" if none was recorded.
+        """
+        try:
+            with open(os.path.join(self.persist_dir, self.VERSION_FILE), encoding="utf-8") as f:
+                return f.read().strip() or UNVERSIONED
+        except FileNotFoundError:
+            return UNVERSIONED
+
+    def _write_index_version(self) -> str:
+        """Atomically records a fresh version identifier for the persisted store."""
+        version = f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        path = os.path.join(self.persist_dir, self.VERSION_FILE)
+        os.makedirs(self.persist_dir, exist_ok=True)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(path + ".tmp", path)
+        logging.info(f"Recorded vector store version: {version}")
+        return version
+
+    def load_vector_store(self) -> VectorStore:
+        """
+        Loads the persisted vector store of the configured backend.
+
+        Returns:
+            VectorStore: Loaded Chroma or NumpyVectorStore.
 
         Raises:
             CustomException: If loading fails.
         """
         try:
-            logging.info(f"Attempting to load vector store from: {self.persist_dir}")
-            return Chroma(
+            logging.info(f"Attempting to load {self.backend} vector store from: {self.persist_dir}")
+            if self.backend == "numpy":
+                return NumpyVectorStore.load(self.persist_dir, self.embedding)
+            return _chroma()(
                 persist_directory=self.persist_dir,
                 embedding_function=self.embedding
             )
@@ -88,24 +526,138 @@ class VectorStoreBuilder:
             logging.exception("Failed to load vector store.")
             raise CustomException("Failed to load vector store", e)
 
+    def load_retriever(
+        self,
+        k: int = 4,
+        embedding_cache: Optional[TTLCache] = None,
+        retrieval_cache: Optional[TTLCache] = None,
+        infer_filters: bool = True,
+        hybrid: bool = False,
+        fetch_k: int = 20,
+        rrf_k: int = 60
+    ) -> CachingRetriever | HybridRetriever:
+        """
+        Loads the persisted vector store behind a retriever that caches query
+        embeddings and retrieval results and pre-filters by genre and score.
+
+        With ``hybrid`` set and a lexical index persisted next to the store, the
+        dense results are fused with BM25 results by reciprocal rank.
+
+        Args:
+            k (int, optional): Number of documents to retrieve. Defaults to 4.
+            embedding_cache (TTLCache, optional): Query embedding cache. A private
+                cache is created when omitted.
+            retrieval_cache (TTLCache, optional): Retrieval result cache. A private
+                cache is created when omitted.
+            infer_filters (bool, optional): Infer genre and score filters from query
+                text, e.g. "highly rated sci-fi". Defaults to True.
+            hybrid (bool, optional): Fuse dense and lexical rankings. Defaults to False.
+            fetch_k (int, optional): Candidates per ranking before fusion. Defaults to 20.
+            rrf_k (int, optional): Reciprocal-rank fusion constant. Defaults to 60.
+
+        Returns:
+            CachingRetriever | HybridRetriever: Retriever over the loaded vector store.
+
+        Raises:
+            CustomException: If loading fails.
+        """
+        metadata_index = MetadataIndex.load(self.persist_dir) if infer_filters else None
+        lexical_index = LexicalIndex.load(self.persist_dir) if hybrid else None
+        if hybrid and lexical_index is None:
+            logging.warning(f"No lexical index in {self.persist_dir}; falling back to dense retrieval.")
+
+        dense = CachingRetriever(
+            vectorstore=self.load_vector_store(),
+            k=max(k, fetch_k) if lexical_index is not None else k,
+            embedding_cache=embedding_cache or TTLCache(),
+            retrieval_cache=retrieval_cache or TTLCache(),
+            known_genres=metadata_index.genres if metadata_index is not None else []
+        )
+        if lexical_index is None:
+            return dense
+        return HybridRetriever(dense=dense, lexical_index=lexical_index, k=k, fetch_k=fetch_k, rrf_k=rrf_k)
+
     def documents(self) -> list:
         """
-        Loads raw documents from the CSV file.
+        Loads all raw documents, with MAL_ID, Name, Score and Genres as typed
+        metadata and combined_info as content.
 
         Returns:
             list: List of documents.
 
+        Raises:
+            CustomException: If document loading fails.
+        """
+        return list(self.iter_documents())
+
+    def iter_documents(self) -> Iterator[Document]:
+        """
+        Lazily reads raw documents from the document source or, by default, the
+        processed dataset, with MAL_ID, Name, Score and Genres as typed metadata
+        and combined_info as content.
+
+        Yields:
+            Document: One document per row.
+
         Raises:
             CustomException: If document loading fails.
         """
         try:
-            logging.info(f"Loading documents directly from: {self.csv_path}")
-            loader = CSVLoader(file_path=self.csv_path, encoding='utf-8', metadata_columns=[])
-            return loader.load()
+            if self.document_source is not None:
+                logging.info("Streaming documents from the document source")
+                documents = self.document_source()
+            elif processed_format(self.csv_path) != "csv":
+                documents = self._columnar_documents()
+            else:
+                logging.info(f"Loading documents directly from: {self.csv_path}")
+                with open(self.csv_path, encoding='utf-8', newline='') as f:
+                    header = next(csv.reader(f), [])
+                documents = lazy_import("langchain_community.document_loaders.csv_loader").CSVLoader(
+                    file_path=self.csv_path,
+                    encoding='utf-8',
+                    metadata_columns=[column for column in METADATA_COLUMNS if column in header],
+                    content_columns=["combined_info"]
+                ).lazy_load()
+            for document in documents:
+                document.metadata = typed_metadata(document.metadata)
+                yield document
+        except CustomException:
+            raise
         except Exception as e:
-            logging.exception("Failed to load documents from CSV.")
+            logging.exception("Failed to load documents.")
             raise CustomException("Document loading failed", e)
 
+    def _columnar_documents(self) -> Iterator[Document]:
+        """
+        Reads documents from an Arrow IPC or Parquet dataset.
+
+        The file is memory-mapped and only combined_info and the metadata columns
+        are read. Rows are converted to documents ``stream_batch_size`` at a time,
+        in the same format CSVLoader produces from the processed CSV.
+
+        Yields:
+            Document: One document per row.
+        """
+        logging.info(f"Loading documents from memory-mapped dataset: {self.csv_path}")
+        pa = lazy_import("pyarrow")
+        with pa.memory_map(self.csv_path, "r") as source:
+            if processed_format(self.csv_path) == "arrow":
+                reader = lazy_import("pyarrow.ipc").open_file(source)
+                columns = [column for column in METADATA_COLUMNS if column in reader.schema.names] + ["combined_info"]
+                batches = (reader.get_batch(index).select(columns) for index in range(reader.num_record_batches))
+            else:
+                parquet = lazy_import("pyarrow.parquet").ParquetFile(source)
+                columns = [column for column in METADATA_COLUMNS if column in parquet.schema_arrow.names]
+                batches = parquet.iter_batches(batch_size=self.stream_batch_size, columns=columns + ["combined_info"])
+
+            row = 0
+            for batch in batches:
+                for offset in range(0, batch.num_rows, self.stream_batch_size):
+                    for record in batch.slice(offset, self.stream_batch_size).to_pylist():
+                        content = record.pop("combined_info")
+                        record.update(source=self.csv_path, row=row)
+                        row += 1
+                        yield Document(page_content=f"combined_info: {content.strip()}", metadata=record)
 
 
 if __name__ == "__main__":
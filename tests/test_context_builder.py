@@ -0,0 +1,72 @@
+from unittest.mock import MagicMock
+
+from langchain_core.documents import Document
+from src.context_builder import ContextBudgetRetriever, ContextBuilder
+
+SYNOPSIS = "Spike hunts bounties. Jet cooks bell peppers. Faye gambles away their money. Ed hacks everything."
+
+
+def chunk(mal_id, text):
+    return Document(page_content=text, metadata={"MAL_ID": mal_id})
+
+
+def count_words(text):
+    return len(text.split())
+
+
+def test_chunks_of_one_title_are_merged_once():
+    documents = [
+        chunk(1, "the rest of the synopsis."),
+        chunk(2, "Title: Trigun .. Overview: A gunman. Genres: Action"),
+        chunk(1, "Title: Cowboy Bebop .. Overview: Space bounty hunters"),
+        chunk(1, "the rest of the synopsis."),
+    ]
+    context = ContextBuilder(max_tokens=1000).build(documents)
+    assert [d.metadata["MAL_ID"] for d in context] == [1, 2]
+    assert context[0].page_content == "Title: Cowboy Bebop .. Overview: Space bounty hunters the rest of the synopsis."
+
+
+def test_truncation_keeps_title_and_genres_and_whole_sentences():
+    builder = ContextBuilder(count_tokens=count_words)
+    text = f"Title: Cowboy Bebop .. Overview: {SYNOPSIS} Genres: Action, Sci-Fi"
+    assert builder.truncate(text, 15) == (
+        "Title: Cowboy Bebop .. Overview: Spike hunts bounties. Jet cooks bell peppers. Genres: Action, Sci-Fi"
+    )
+    assert builder.truncate(text, 10).endswith("Spike ... Genres: Action, Sci-Fi")
+
+
+def test_budget_drops_titles_that_no_longer_fit():
+    builder = ContextBuilder(max_tokens=60, max_tokens_per_title=30, count_tokens=count_words)
+    builder.MIN_TITLE_TOKENS = 10
+    documents = [chunk(i, f"Title: Show {i} .. Overview: {SYNOPSIS} {SYNOPSIS} Genres: Comedy") for i in range(5)]
+    context = builder.build(documents)
+    assert len(context) == 2
+    assert sum(count_words(d.page_content) for d in context) <= 60
+
+
+def test_budget_retriever_wraps_results():
+    inner = MagicMock()
+    inner.invoke.return_value = [chunk(1, "a"), chunk(1, "a")]
+    retriever = ContextBudgetRetriever.model_construct(retriever=inner, builder=ContextBuilder())
+    assert [d.page_content for d in retriever.invoke("q")] == ["a"]
+
+
+def test_loader_documents_keep_title_and_genres_when_truncated(tmp_path):
+    import pandas as pd
+    from src.data_loader import AnimeDataloader
+
+    raw_csv = tmp_path / "raw.csv"
+    pd.DataFrame([{
+        "MAL_ID": 1, "Name": "Cowboy Bebop", "Score": 8.78, "Genres": "Action, Sci-Fi", "sypnopsis": SYNOPSIS,
+    }]).to_csv(raw_csv, index=False)
+    document = next(AnimeDataloader(str(raw_csv), str(tmp_path / "processed.csv")).iter_documents())
+
+    context = ContextBuilder(max_tokens_per_title=17, count_tokens=count_words).build([document])
+
+    assert context[0].page_content == (
+        "combined_info: Title: Cowboy Bebop .. Overview: Spike hunts bounties. Jet cooks bell peppers. "
+        "Genres: Action, Sci-Fi"
+    )
+    tail = Document(page_content="the rest of the synopsis.", metadata=document.metadata)
+    merged = ContextBuilder(max_tokens=1000).build([tail, document])[0].page_content
+    assert merged.startswith("combined_info: Title: Cowboy Bebop")
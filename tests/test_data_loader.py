@@ -0,0 +1,90 @@
+from functools import partial
+from unittest.mock import MagicMock
+
+import pandas as pd
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from src.data_loader import AnimeDataloader, processed_format, read_processed
+from src.vector_store import VectorStoreBuilder
+from utils.custom_exception import CustomException
+
+RAW_ROWS = [
+    (1, "Cowboy Bebop", "8.78", "Action, Space", "bounty hunters in space"),
+    (5, "Trigun", "Unknown", "Action, Sci-Fi", "a gunman with a huge bounty"),
+    (6, "Monster", "8.76", "Drama, Mystery", None),
+    (19, "Monster", "8.76", "Drama, Mystery", "a surgeon hunts a killer"),
+    (20, "Naruto", "7.91", "Action, Comedy", "a ninja wants recognition"),
+]
+
+
+@pytest.fixture
+def loader(tmp_path):
+    raw_csv = tmp_path / "raw.csv"
+    pd.DataFrame(RAW_ROWS, columns=["MAL_ID", "Name", "Score", "Genres", "sypnopsis"]).to_csv(raw_csv, index=False)
+    return AnimeDataloader(original_csv=str(raw_csv), processed_csv=str(tmp_path / "processed.csv"))
+
+
+def test_streamed_documents_match_processed_csv(loader, tmp_path):
+    batch = VectorStoreBuilder(csv_path=loader.load_and_process(), persist_dir=str(tmp_path / "a")).documents()
+    streamed = VectorStoreBuilder(
+        csv_path=loader.original_csv,
+        persist_dir=str(tmp_path / "b"),
+        document_source=partial(loader.iter_documents, chunksize=2)
+    ).documents()
+
+    assert [doc.page_content for doc in streamed] == [doc.page_content for doc in batch]
+    assert [doc.metadata["MAL_ID"] for doc in streamed] == [1, 5, 19, 20]
+    assert "Score" not in streamed[1].metadata
+    assert streamed[0].metadata["Genres"] == ["Action", "Space"]
+    for streamed_doc, batch_doc in zip(streamed, batch):
+        assert {k: v for k, v in streamed_doc.metadata.items() if k != "source"} == \
+            {k: v for k, v in batch_doc.metadata.items() if k != "source"}
+
+
+def test_streaming_build_embeds_batch_by_batch(loader, tmp_path):
+    embedding = MagicMock(wraps=DeterministicFakeEmbedding(size=16))
+    builder = VectorStoreBuilder(
+        csv_path=loader.original_csv,
+        persist_dir=str(tmp_path / "store"),
+        embedding=embedding,
+        backend="numpy",
+        document_source=partial(loader.iter_documents, chunksize=3),
+        stream_batch_size=3
+    )
+    builder.build_and_save_vectorstore()
+
+    assert [len(call.args[0]) for call in embedding.embed_documents.call_args_list] == [3, 1]
+    assert not (tmp_path / "processed.csv").exists()
+    assert sorted(doc.metadata["MAL_ID"] for doc in builder.load_vector_store().documents) == [1, 5, 19, 20]
+
+
+def test_streaming_reports_missing_columns(tmp_path):
+    raw_csv = tmp_path / "raw.csv"
+    pd.DataFrame([(1, "Cowboy Bebop")], columns=["MAL_ID", "Name"]).to_csv(raw_csv, index=False)
+    loader = AnimeDataloader(original_csv=str(raw_csv), processed_csv=str(tmp_path / "processed.csv"))
+
+    with pytest.raises(CustomException):
+        list(loader.iter_documents())
+
+
+@pytest.mark.parametrize("extension", [".arrow", ".parquet"])
+def test_columnar_dataset_keeps_types_and_matches_csv(loader, tmp_path, extension):
+    csv_builder = VectorStoreBuilder(csv_path=loader.load_and_process(), persist_dir=str(tmp_path / "a"))
+    columnar = AnimeDataloader(original_csv=loader.original_csv, processed_csv=str(tmp_path / f"processed{extension}"))
+    columnar_builder = VectorStoreBuilder(
+        csv_path=columnar.load_and_process(), persist_dir=str(tmp_path / "b"), stream_batch_size=3
+    )
+
+    frame = read_processed(columnar.processed_csv, ["MAL_ID", "Genres"])
+    assert list(frame.columns) == ["MAL_ID", "Genres"]
+    assert list(frame["Genres"][0]) == ["Action", "Space"]
+
+    documents = columnar_builder.documents()
+    assert documents[0].metadata["Score"] == 8.78
+    assert "Score" not in documents[1].metadata
+    assert columnar_builder._keyed_chunks(documents)[0] == csv_builder._keyed_chunks(csv_builder.documents())[0]
+
+
+def test_unknown_processed_format_is_rejected():
+    with pytest.raises(ValueError):
+        processed_format("data/processed.json")
@@ -0,0 +1,34 @@
+from unittest.mock import MagicMock
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from src.embedding_cache import CachedEmbeddings, EmbeddingCache
+
+
+def test_unchanged_texts_skip_the_model_across_instances(tmp_path):
+    texts = ["Title: Cowboy Bebop", "Title: Trigun", "Title: Monster"]
+    model = MagicMock(wraps=DeterministicFakeEmbedding(size=8))
+
+    first = CachedEmbeddings(model, EmbeddingCache(str(tmp_path)), model_name="fake")
+    expected = first.embed_documents(texts)
+    assert model.embed_documents.call_count == 1
+
+    # A fresh process reopens the cache from disk
+    second = CachedEmbeddings(model, EmbeddingCache(str(tmp_path)), model_name="fake")
+    cached = second.embed_documents(["Title:  Cowboy Bebop"] + texts[1:])
+
+    assert model.embed_documents.call_count == 1
+    assert second.hits == 3 and second.misses == 0
+    assert [[round(x, 5) for x in v] for v in cached] == [[round(x, 5) for x in v] for v in expected]
+
+
+def test_cache_evicts_least_recently_used_entries(tmp_path):
+    cache = EmbeddingCache(str(tmp_path), max_entries=10)
+    for i in range(10):
+        cache.put(f"fake:{i}", [float(i)] * 4)
+    cache.get("fake:0")
+
+    cache.put("fake:new", [1.0] * 4)
+
+    assert len(cache) == 10
+    assert cache.get("fake:0") is not None
+    assert cache.get("fake:1") is None
@@ -0,0 +1,32 @@
+from functools import partial
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from src.embedding_engine import ParallelEmbeddingEngine
+
+
+def test_parallel_embedding_preserves_input_order():
+    factory = partial(DeterministicFakeEmbedding, size=8)
+    texts = [f"anime synopsis number {i}" for i in range(25)]
+
+    engine = ParallelEmbeddingEngine(batch_size=4, num_workers=2, embedding_factory=factory)
+    embeddings = engine.embed_documents(texts)
+
+    assert embeddings == factory().embed_documents(texts)
+    assert engine.last_throughput > 0
+
+
+def test_engine_reuses_one_worker_pool_across_batches():
+    factory = partial(DeterministicFakeEmbedding, size=8)
+    batches = [[f"batch {b} synopsis {i}" for i in range(9)] for b in range(3)]
+
+    with ParallelEmbeddingEngine(batch_size=4, num_workers=2, embedding_factory=factory) as engine:
+        engine.embed_documents(batches[0])
+        pool = engine._pool
+        embeddings = [engine.embed_documents(batch) for batch in batches[1:]]
+
+        assert pool is not None and engine._pool is pool
+        assert embeddings == [factory().embed_documents(batch) for batch in batches[1:]]
+        assert engine.total_documents == 27
+        assert engine.throughput > 0
+
+    assert engine._pool is None
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+from src.index_registry import IndexRegistry
+
+
+def test_publish_switches_current_atomically(tmp_path):
+    registry = IndexRegistry(str(tmp_path))
+    assert registry.current() is None
+    assert registry.current_dir() == str(tmp_path)
+
+    version, path = registry.create_version()
+    (tmp_path / "versions" / version / "INDEX_VERSION").write_text("v1")
+    registry.publish(version)
+
+    assert registry.current() == version
+    assert registry.current_dir() == path
+    assert not os.path.exists(os.path.join(str(tmp_path), "CURRENT.tmp"))
+    with pytest.raises(FileNotFoundError):
+        registry.publish("missing")
+
+
+def test_seeded_version_copies_current_index(tmp_path):
+    registry = IndexRegistry(str(tmp_path))
+    first, first_dir = registry.create_version()
+    with open(os.path.join(first_dir, "vectors.npy"), "w") as f:
+        f.write("old")
+    registry.publish(first)
+
+    second, second_dir = registry.create_version(seed_from_current=True)
+    with open(os.path.join(second_dir, "vectors.npy"), "w") as f:
+        f.write("new")
+
+    with open(os.path.join(first_dir, "vectors.npy")) as f:
+        assert f.read() == "old"
+    assert registry.current() == first
+    with pytest.raises(ValueError):
+        registry.discard(first)
+    registry.discard(second)
+    assert registry.versions() == [first]
+
+
+def test_prune_keeps_current_and_newest(tmp_path):
+    registry = IndexRegistry(str(tmp_path))
+    for name in ["a", "b", "c", "d"]:
+        os.makedirs(registry.version_dir(name))
+    registry.publish("a")
+
+    assert registry.prune(keep=2) == ["b"]
+    assert registry.versions() == ["a", "c", "d"]
@@ -0,0 +1,48 @@
+from unittest.mock import MagicMock
+
+from langchain_core.documents import Document
+from src.lexical_index import HybridRetriever, LexicalIndex, reciprocal_rank_fusion, tokenize
+from src.metadata_index import SearchFilter
+
+DOCUMENTS = [
+    Document(page_content="Title: Cowboy Bebop .. Overview: Spike Spiegel hunts bounties in space.",
+             metadata={"Name": "Cowboy Bebop", "Score": 8.8, "Genres": ["Action", "Sci-Fi"]}),
+    Document(page_content="Title: Trigun .. Overview: A gunman wanders a desert planet.",
+             metadata={"Name": "Trigun", "Score": 8.0, "Genres": ["Action", "Sci-Fi"]}),
+    Document(page_content="Title: K-On! .. Overview: Girls start a light music club in high school.",
+             metadata={"Name": "K-On!", "Score": 7.9, "Genres": ["Music", "Slice of Life"]}),
+]
+
+
+def test_tokenize_drops_stopwords():
+    assert tokenize("Something like Cowboy Bebop!") == ["cowboy", "bebop"]
+
+
+def test_bm25_ranks_exact_title_and_character_names_first(tmp_path):
+    index = LexicalIndex.build(DOCUMENTS)
+    assert index.search("spike spiegel", k=3)[0][0].metadata["Name"] == "Cowboy Bebop"
+    assert [d.metadata["Name"] for d, _ in index.search("trigun", k=3)] == ["Trigun"]
+    assert index.search("zzz unknown", k=3) == []
+
+    index.save(str(tmp_path))
+    loaded = LexicalIndex.load(str(tmp_path))
+    assert loaded.search("music club", k=1)[0][0].metadata["Name"] == "K-On!"
+    assert loaded.search("space gunman", k=3, search_filter=SearchFilter(min_score=8.5))[0][0].metadata["Name"] == "Cowboy Bebop"
+    assert len(loaded.search("space gunman", k=3, search_filter=SearchFilter(min_score=8.5))) == 1
+
+
+def test_reciprocal_rank_fusion_rewards_documents_in_both_lists():
+    a, b, c = DOCUMENTS
+    assert reciprocal_rank_fusion([[a, b], [c, b]], k=2)[0] is b
+
+
+def test_hybrid_retriever_fuses_dense_and_lexical_rankings():
+    dense = MagicMock()
+    dense.invoke.return_value = [DOCUMENTS[2], DOCUMENTS[0]]
+    dense.resolve_filter.return_value = None
+    retriever = HybridRetriever.model_construct(dense=dense, lexical_index=LexicalIndex.build(DOCUMENTS),
+                                                k=2, fetch_k=5, rrf_k=60)
+
+    documents = retriever.invoke("Cowboy Bebop")
+    assert documents[0].metadata["Name"] == "Cowboy Bebop"
+    assert len(documents) == 2
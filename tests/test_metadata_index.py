@@ -0,0 +1,69 @@
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from src.metadata_index import MetadataIndex, SearchFilter, parse_query_filter
+from src.numpy_store import NumpyVectorStore
+from src.query_cache import CachingRetriever, TTLCache
+
+GENRES = ["Action", "Comedy", "Sci-Fi", "Slice of Life"]
+DOCUMENTS = [
+    Document(page_content="space war", metadata={"MAL_ID": 1, "Score": 8.7, "Genres": ["Action", "Sci-Fi"]}),
+    Document(page_content="robot comedy", metadata={"MAL_ID": 2, "Score": 7.1, "Genres": ["Comedy", "Sci-Fi"]}),
+    Document(page_content="school days", metadata={"MAL_ID": 3, "Score": 8.2, "Genres": ["Slice of Life"]}),
+    Document(page_content="unrated", metadata={"MAL_ID": 4, "Genres": ["Action"]}),
+]
+
+
+def test_parse_query_filter_reads_genres_and_score_phrases():
+    assert parse_query_filter("highly rated sci-fi please", GENRES) == SearchFilter(("Sci-Fi",), 8.0)
+    assert parse_query_filter("slice of life with score above 7.5", GENRES) == SearchFilter(("Slice of Life",), 7.5)
+    assert parse_query_filter("something relaxing", GENRES) is None
+
+
+def test_candidates_intersect_genre_and_score_indexes(tmp_path):
+    index = MetadataIndex.build(DOCUMENTS)
+    assert index.candidates(SearchFilter(("Sci-Fi",))).tolist() == [0, 1]
+    assert index.candidates(SearchFilter(("sci fi",), 8.0)).tolist() == [0]
+    assert index.candidates(SearchFilter(min_score=8.0)).tolist() == [0, 2]
+    assert index.candidates(SearchFilter(("Horror",))).tolist() == []
+
+    index.save(str(tmp_path))
+    assert MetadataIndex.load(str(tmp_path)).candidates(SearchFilter(("Action",))).tolist() == [0, 3]
+
+
+def test_inferred_filter_restricts_results_and_tops_up_when_sparse():
+    embedding = DeterministicFakeEmbedding(size=16)
+    store = NumpyVectorStore(embedding=embedding)
+    store.add_texts([d.page_content for d in DOCUMENTS], [d.metadata for d in DOCUMENTS])
+    retriever = CachingRetriever(vectorstore=store, k=1, embedding_cache=TTLCache(), retrieval_cache=TTLCache(),
+                                 known_genres=GENRES)
+
+    assert [d.metadata["MAL_ID"] for d in retriever.invoke("top rated sci-fi")] == [1]
+
+    retriever.k = 3
+    documents = retriever.invoke("best comedy anime")
+    assert documents[0].metadata["MAL_ID"] == 2
+    assert len(documents) == 3
+
+
+def test_negated_queries_infer_no_filter():
+    assert parse_query_filter("anything but comedy", GENRES) is None
+    assert parse_query_filter("highly rated, not action", GENRES) is None
+    assert parse_query_filter("sci-fi without comedy", GENRES) is None
+
+
+def test_either_or_queries_infer_no_genre_filter():
+    assert parse_query_filter("comedy or action", GENRES) is None
+    assert parse_query_filter("either sci-fi or slice of life, highly rated", GENRES) == SearchFilter((), 8.0)
+
+
+def test_everyday_words_need_genre_context():
+    genres = ["Game", "Music", "School", "Space", "Slice of Life"]
+    assert parse_query_filter("anime with great music", genres) is None
+    assert parse_query_filter("a game of wits between two geniuses", genres) is None
+    assert parse_query_filter("lost in space", genres) is None
+    assert parse_query_filter("characters who love school", genres) is None
+
+    assert parse_query_filter("music anime", genres) == SearchFilter(("Music",))
+    assert parse_query_filter("space and school series", genres) == SearchFilter(("School", "Space"))
+    assert parse_query_filter("genre: game", genres) == SearchFilter(("Game",))
+    assert parse_query_filter("something like slice of life", genres) == SearchFilter(("Slice of Life",))
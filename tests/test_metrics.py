@@ -0,0 +1,109 @@
+import json
+import logging
+import uuid
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pytest
+from utils.logger import JsonFormatter, RequestIdFilter
+from utils.metrics import (
+    Histogram,
+    MetricsCallbackHandler,
+    MetricsRegistry,
+    METRICS,
+    record_cache,
+    request_context,
+    stage,
+)
+
+
+def test_histogram_quantiles_interpolate_within_buckets():
+    histogram = Histogram(buckets=(0.1, 0.2, 0.4))
+    for value in [0.05] * 50 + [0.15] * 45 + [0.3] * 5:
+        histogram.observe(value)
+
+    assert histogram.quantile(0.5) == pytest.approx(0.1)
+    assert 0.1 < histogram.quantile(0.95) <= 0.2
+    assert 0.2 < histogram.quantile(0.99) <= 0.4
+    assert histogram.snapshot()["count"] == 100
+
+
+def test_prometheus_text_has_cumulative_buckets_and_counters():
+    registry = MetricsRegistry()
+    registry.observe("stage_duration_seconds", 0.003, stage="embed")
+    registry.observe("stage_duration_seconds", 0.2, stage="embed")
+    registry.increment("cache_requests_total", cache="response", result="hit")
+
+    text = registry.render_prometheus()
+
+    assert "# TYPE anime_recommender_stage_duration_seconds histogram" in text
+    assert 'anime_recommender_stage_duration_seconds_bucket{stage="embed",le="0.005"} 1' in text
+    assert 'anime_recommender_stage_duration_seconds_bucket{stage="embed",le="+Inf"} 2' in text
+    assert 'anime_recommender_stage_duration_seconds_count{stage="embed"} 2' in text
+    assert 'anime_recommender_stage_duration_seconds_quantile{stage="embed",quantile="0.99"}' in text
+    assert 'anime_recommender_cache_requests_total{cache="response",result="hit"} 1' in text
+
+
+def test_request_context_collects_stages_tokens_and_cache_results():
+    request_id = uuid.uuid4().hex
+    with request_context(request_id) as record:
+        with stage("embed"):
+            pass
+        record_cache("retrieval", False)
+        with request_context("nested") as nested:
+            assert nested is record
+
+        handler = MetricsCallbackHandler()
+        handler.on_chat_model_start({}, [], run_id="llm-run")
+        handler.on_llm_end(
+            SimpleNamespace(llm_output={"token_usage": {"prompt_tokens": 120, "completion_tokens": 30}}),
+            run_id="llm-run"
+        )
+
+    assert record.request_id == request_id
+    assert set(record.stages_ms) == {"embed", "llm"}
+    assert record.tokens == {"prompt": 120, "completion": 30}
+    assert record.cache == {"retrieval": "miss"}
+    assert 'anime_recommender_tokens_total{kind="prompt"}' in METRICS.render_prometheus()
+
+
+def test_json_log_lines_carry_the_request_id():
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, "done %s", ("now",), None)
+    record.fields = {"stages_ms": {"llm": 12.5}}
+    with request_context("abc123"):
+        RequestIdFilter().filter(record)
+
+    entry = json.loads(JsonFormatter().format(record))
+
+    assert entry["request_id"] == "abc123"
+    assert entry["message"] == "done now"
+    assert entry["stages_ms"] == {"llm": 12.5}
+
+
+def test_stream_recommend_is_instrumented_until_the_stream_finishes(mocker):
+    from pipeline.pipeline import AnimeRecommendationPipeline, ServingIndex, ServingSlot
+    from src.query_cache import TTLCache
+    from src.streaming import TimedTokenStream
+    from utils.metrics import current_request
+
+    pipeline = AnimeRecommendationPipeline.__new__(AnimeRecommendationPipeline)  # bypass __init__
+    pipeline._slot = ServingSlot(ServingIndex("index", "v1", MagicMock(), MagicMock(), TTLCache()))
+    requests = []
+
+    def fake_tokens():
+        requests.append(current_request())
+        yield "1. Mushishi"
+
+    pipeline.recommender.stream_recommendation.side_effect = lambda query, documents: TimedTokenStream(fake_tokens())
+    METRICS.reset()
+
+    stream = pipeline.stream_recommend("calm iyashikei anime")
+    assert current_request() is None
+    assert list(stream) == ["1. Mushishi"]
+
+    assert current_request() is None
+    assert requests[0] is not None and "title_match" in requests[0].stages_ms
+    histograms = METRICS.snapshot()["histograms"]
+    assert histograms["stream_time_to_first_token_seconds"]["count"] == 1
+    assert histograms["stream_duration_seconds"]["count"] == 1
+    assert histograms["request_duration_seconds"]["count"] == 1
@@ -0,0 +1,88 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+from langchain_core.documents import Document
+from pipeline.pipeline import AnimeRecommendationPipeline, ServingIndex, ServingSlot
+from src.query_cache import TTLCache
+from src.neighbor_table import NeighborTable
+from src.title_resolver import TitleResolver, extract_title_anchor
+
+DOCUMENTS = [
+    Document(page_content=f"Title: {name}", metadata={"MAL_ID": mal_id, "Name": name})
+    for mal_id, name in [(1, "Cowboy Bebop"), (2, "Trigun"), (3, "K-On!"), (4, "Space Dandy")]
+]
+VECTORS = np.array([[1.0, 0.1, 0.0], [0.9, 0.3, 0.0], [0.0, 0.0, 1.0], [1.0, 0.0, 0.05]])
+
+
+def test_extract_title_anchor():
+    assert extract_title_anchor("I liked Cowboy Bebop.") == "Cowboy Bebop"
+    assert extract_title_anchor("Recommend me anime similar to Trigun!") == "Trigun"
+    assert extract_title_anchor("light-hearted school anime") is None
+
+
+def test_title_resolver_matches_exact_and_misspelled_titles():
+    resolver = TitleResolver([d.metadata["Name"] for d in DOCUMENTS])
+    assert resolver.resolve("k on") == (2, 1.0)
+    assert resolver.resolve("Cowboy Beebop")[0] == 0
+    assert resolver.resolve("Attack on Titan") is None
+
+
+def test_neighbor_table_blocks_match_full_similarity(tmp_path, monkeypatch):
+    monkeypatch.setattr(NeighborTable, "BLOCK_SIZE", 3)
+    table = NeighborTable.build(DOCUMENTS, VECTORS, top_n=2)
+    assert table.neighbors[[0, 1, 3]].tolist() == [[3, 1], [0, 3], [0, 1]]
+    assert table.neighbors[2, 0] == 3
+
+    table.save(str(tmp_path))
+    loaded = NeighborTable.load(str(tmp_path))
+    assert [d.metadata["Name"] for d, _ in loaded.more_like_this(loaded.row_of(1), n=2)] == ["Space Dandy", "Trigun"]
+
+
+def test_title_queries_skip_retrieval():
+    pipeline = AnimeRecommendationPipeline.__new__(AnimeRecommendationPipeline)  # bypass __init__
+    table = NeighborTable.build(DOCUMENTS, VECTORS, top_n=2)
+    pipeline._slot = ServingSlot(ServingIndex(
+        "index", "v1", MagicMock(), MagicMock(), TTLCache(), table, TitleResolver(table.titles)
+    ))
+    pipeline.recommender.get_recommendation_from_documents.return_value = "Watch Space Dandy"
+
+    assert pipeline.recommend("I liked cowboy bebop") == "Watch Space Dandy"
+    query, documents = pipeline.recommender.get_recommendation_from_documents.call_args.args
+    assert [d.metadata["MAL_ID"] for d in documents] == [4, 2]
+    pipeline.recommender.get_recommendation.assert_not_called()
+
+    pipeline.recommend("something dark and gritty")
+    pipeline.recommender.get_recommendation.assert_called_once()
+
+
+def test_request_keeps_its_index_when_a_swap_lands_mid_request():
+    pipeline = AnimeRecommendationPipeline.__new__(AnimeRecommendationPipeline)  # bypass __init__
+    pipeline.response_cache = MagicMock()
+    pipeline.semantic_cache = None
+    old_table = NeighborTable.build(DOCUMENTS, VECTORS, top_n=2)
+    new_table = NeighborTable.build(DOCUMENTS[:2], VECTORS[:2], top_n=1)
+    new_index = ServingIndex(
+        "new", "v2", MagicMock(), MagicMock(), TTLCache(), new_table, TitleResolver(new_table.titles)
+    )
+
+    class SwappingResolver(TitleResolver):
+        def resolve(self, title):
+            # The new index is published between the title lookup and the neighbor lookup
+            pipeline._activate(new_index)
+            # The request still uses the old index, so it stays open
+            old_retriever.close.assert_not_called()
+            return super().resolve(title)
+
+    old_retriever = MagicMock()
+    old_recommender = MagicMock()
+    old_recommender.get_recommendation_from_documents.return_value = "Watch Space Dandy"
+    pipeline._slot = ServingSlot(ServingIndex(
+        "old", "v1", old_retriever, old_recommender, TTLCache(), old_table, SwappingResolver(old_table.titles)
+    ))
+
+    assert pipeline.recommend("I liked cowboy bebop") == "Watch Space Dandy"
+    query, documents = old_recommender.get_recommendation_from_documents.call_args.args
+    assert [d.metadata["MAL_ID"] for d in documents] == [4, 2]
+    new_index.recommender.get_recommendation_from_documents.assert_not_called()
+    assert pipeline.index_dir == "new"
+    old_retriever.close.assert_called_once_with()
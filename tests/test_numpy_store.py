@@ -0,0 +1,74 @@
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from src.numpy_store import NumpyVectorStore
+from src.vector_store import VectorStoreBuilder
+
+ROWS = [
+    (1, "Title: Cowboy Bebop .. Overview: bounty hunters in space"),
+    (5, "Title: Trigun .. Overview: a gunman with a huge bounty"),
+    (6, "Title: Monster .. Overview: a surgeon hunts a killer"),
+]
+
+
+def test_numpy_backend_round_trips_and_finds_exact_match(tmp_path):
+    csv_path = tmp_path / "processed.csv"
+    pd.DataFrame(ROWS, columns=["MAL_ID", "combined_info"]).to_csv(csv_path, index=False)
+    builder = VectorStoreBuilder(
+        csv_path=str(csv_path),
+        persist_dir=str(tmp_path / "store"),
+        embedding=DeterministicFakeEmbedding(size=16),
+        backend="numpy",
+        dtype="float16"
+    )
+    builder.build_and_save_vectorstore()
+
+    store = builder.load_vector_store()
+    assert isinstance(store.vectors, np.memmap)
+    assert store.vectors.dtype == np.float16
+
+    query = builder.documents()[1].page_content
+    assert store.similarity_search(query, k=1)[0].metadata["MAL_ID"] == 5
+    assert builder.load_retriever(k=2).invoke(query)[0].page_content == query
+
+
+def test_numpy_incremental_build_embeds_only_new_rows(tmp_path):
+    csv_path = tmp_path / "processed.csv"
+    embedding = MagicMock(wraps=DeterministicFakeEmbedding(size=16))
+    builder = VectorStoreBuilder(
+        csv_path=str(csv_path), persist_dir=str(tmp_path / "store"), embedding=embedding, backend="numpy"
+    )
+
+    pd.DataFrame(ROWS[:2], columns=["MAL_ID", "combined_info"]).to_csv(csv_path, index=False)
+    builder.build_and_save_vectorstore(incremental=True)
+    pd.DataFrame(ROWS[1:], columns=["MAL_ID", "combined_info"]).to_csv(csv_path, index=False)
+    builder.build_and_save_vectorstore(incremental=True)
+
+    assert [len(call.args[0]) for call in embedding.embed_documents.call_args_list] == [2, 1]
+    assert sorted(doc.metadata["MAL_ID"] for doc in builder.load_vector_store().documents) == [5, 6]
+
+
+def test_top_k_matches_exhaustive_sort():
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((500, 8)).astype(np.float32)
+    store = NumpyVectorStore(embedding=DeterministicFakeEmbedding(size=8))
+    store.add_vectors([str(i) for i in range(500)], [MagicMock(page_content="", metadata={})] * 500, vectors)
+
+    query = rng.standard_normal(8)
+    rows, _ = store.search_vectors(query.tolist(), k=5)
+    expected = np.argsort(-(NumpyVectorStore.normalize(vectors) @ NumpyVectorStore.normalize(query)))[:5]
+    assert rows.tolist() == expected.tolist()
+
+
+def test_batched_search_matches_single_query_search():
+    embedding = DeterministicFakeEmbedding(size=16)
+    store = NumpyVectorStore(embedding=embedding)
+    store.add_texts([text for _, text in ROWS], metadatas=[{"MAL_ID": mal_id} for mal_id, _ in ROWS])
+
+    queries = [embedding.embed_query(text) for _, text in ROWS] + [embedding.embed_query("space western")]
+    batched = store.similarity_search_by_vectors(queries, k=2)
+
+    assert batched == [store.similarity_search_by_vector(query, k=2) for query in queries]
+    assert [documents[0].metadata["MAL_ID"] for documents in batched[:3]] == [1, 5, 6]
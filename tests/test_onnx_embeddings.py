@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from src.embedding_engine import create_embeddings, embedding_factory
+from src.onnx_embeddings import OnnxEmbeddings, fidelity_check
+
+TABLE = np.array([[0, 0, 0], [0, 0, 1], [1, 0, 0], [0, 1, 0]], dtype=np.float32)
+
+
+@pytest.fixture
+def model_dir(tmp_path):
+    """Writes a toy 'transformer' (an embedding lookup) and a word-level tokenizer."""
+    onnx = pytest.importorskip("onnx")
+    from onnx import TensorProto, helper, numpy_helper
+    from tokenizers import Tokenizer, models, pre_tokenizers
+
+    graph = helper.make_graph(
+        [helper.make_node("Gather", ["table", "input_ids"], ["last_hidden_state"])],
+        "toy",
+        [helper.make_tensor_value_info("input_ids", TensorProto.INT64, ["batch", "sequence"]),
+         helper.make_tensor_value_info("attention_mask", TensorProto.INT64, ["batch", "sequence"])],
+        [helper.make_tensor_value_info("last_hidden_state", TensorProto.FLOAT, ["batch", "sequence", 3])],
+        initializer=[numpy_helper.from_array(TABLE, "table")]
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 14)])
+    model.ir_version = 8
+    onnx.save(model, str(tmp_path / OnnxEmbeddings.MODEL_FILE))
+
+    tokenizer = Tokenizer(models.WordLevel({"[PAD]": 0, "[UNK]": 1, "cat": 2, "dog": 3}, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.save(str(tmp_path / OnnxEmbeddings.TOKENIZER_FILE))
+    return str(tmp_path)
+
+
+def test_onnx_embeddings_mean_pool_ignores_padding(model_dir):
+    embedding = OnnxEmbeddings(model_dir, quantized=False, batch_size=2)
+    vectors = np.array(embedding.embed_documents(["cat", "cat dog", "dog"]))
+    np.testing.assert_allclose(vectors[0], [1, 0, 0], atol=1e-6)
+    np.testing.assert_allclose(vectors[1], [2 ** -0.5, 2 ** -0.5, 0], atol=1e-6)
+    np.testing.assert_allclose(embedding.embed_query("dog"), [0, 1, 0], atol=1e-6)
+    assert fidelity_check(embedding, embedding, ["cat", "dog"])["min_cosine"] == pytest.approx(1.0)
+
+
+def test_fidelity_check_of_identical_models_is_one():
+    result = fidelity_check(DeterministicFakeEmbedding(size=16), DeterministicFakeEmbedding(size=16), ["a", "b"])
+    assert result["count"] == 2
+    assert result["mean_cosine"] == pytest.approx(1.0)
+
+
+def test_backend_selection_names_and_validation(model_dir):
+    embedding = create_embeddings("onnx", onnx_model_dir=model_dir, onnx_quantized=False)
+    assert embedding.model_name.endswith("-onnx")
+    assert len(embedding.embed_query("cat")) == 3
+    assert create_embeddings("torch").model_name == "all-MiniLM-L6-v2"
+    with pytest.raises(ValueError):
+        embedding_factory("tensorrt")
+    with pytest.raises(ValueError):
+        embedding_factory("onnx")
@@ -1,21 +1,25 @@
+import asyncio
 import pytest
 from unittest.mock import MagicMock
-from pipeline.pipeline import AnimeRecommendationPipeline
+from pipeline.pipeline import AnimeRecommendationPipeline, ServingIndex, ServingSlot
+from src.concurrency import ConcurrencyLimiter, SingleFlight
+from src.query_cache import TTLCache
 from utils.custom_exception import CustomException
 
 def test_recommend_success(mocker):
-    # Mock VectorStoreBuilder.load_vector_store().as_retriever() chain
+    # Mock VectorStoreBuilder.load_retriever()
     mock_retriever = MagicMock(name="retriever")
 
     mock_vector_builder = mocker.patch("pipeline.pipeline.VectorStoreBuilder")
-    mock_vector_builder.return_value.load_vector_store.return_value.as_retriever.return_value = mock_retriever
+    mock_vector_builder.return_value.load_retriever.return_value = mock_retriever
+    mock_vector_builder.return_value.index_version.return_value = "v1"
 
     # Mock AnimeRecommender to avoid real LLM calls
     mock_recommender_instance = MagicMock()
     mock_recommender_instance.get_recommendation.return_value = "Naruto is recommended"
 
     mocker.patch(
-        "src.pipeline.AnimeRecommender",
+        "pipeline.pipeline.AnimeRecommender",
         return_value=mock_recommender_instance
     )
 
@@ -30,9 +34,214 @@ def test_recommend_success(mocker):
 
 def test_recommend_empty_query():
     pipeline = AnimeRecommendationPipeline.__new__(AnimeRecommendationPipeline)  # bypass __init__
-    pipeline.recommender = MagicMock()
+    pipeline._slot = ServingSlot(ServingIndex("index", "v1", MagicMock(), MagicMock(), TTLCache()))
 
     with pytest.raises(CustomException) as excinfo:
         pipeline.recommend("  ")  # empty string with whitespace
 
     assert "Invalid query provided" in str(excinfo.value)
+
+def test_arecommend_coalesces_identical_inflight_queries():
+    pipeline = AnimeRecommendationPipeline.__new__(AnimeRecommendationPipeline)  # bypass __init__
+    pipeline.single_flight = SingleFlight()
+    pipeline.concurrency_limiter = ConcurrencyLimiter(2)
+    pipeline._slot = ServingSlot(ServingIndex("index", "v1", MagicMock(), MagicMock(), TTLCache()))
+
+    calls = []
+
+    async def fake_llm(query):
+        calls.append(query)
+        await asyncio.sleep(0.01)
+        return f"answer to {query}"
+
+    pipeline.recommender.aget_recommendation.side_effect = fake_llm
+
+    results = asyncio.run(pipeline.recommend_many([
+        "School comedy anime", "school comedy anime!", "space western"
+    ]))
+
+    assert results[0] == results[1] == "answer to School comedy anime"
+    assert results[2] == "answer to space western"
+    assert len(calls) == 2
+    assert pipeline.single_flight.coalesced == 1
+
+
+def test_single_flight_keeps_inflight_work_per_event_loop():
+    import threading
+
+    single_flight = SingleFlight()
+    started = threading.Barrier(2)
+    results = []
+
+    async def work(name):
+        await asyncio.to_thread(started.wait, 5)
+        return name
+
+    async def call(name):
+        results.append(await single_flight.do("same query", lambda: work(name)))
+
+    threads = [threading.Thread(target=asyncio.run, args=(call(name),)) for name in ("first", "second")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=10)
+
+    assert sorted(results) == ["first", "second"]
+    assert single_flight.coalesced == 0
+
+
+def test_new_index_version_is_swapped_in_keeping_caches(mocker, tmp_path):
+    from src.index_registry import IndexRegistry
+
+    registry = IndexRegistry(str(tmp_path))
+    first, _ = registry.create_version()
+    registry.publish(first)
+
+    retrievers = [MagicMock(name="old retriever"), MagicMock(name="new retriever")]
+    mock_vector_builder = mocker.patch("pipeline.pipeline.VectorStoreBuilder")
+    mock_vector_builder.return_value.load_retriever.side_effect = retrievers
+    mock_vector_builder.return_value.index_version.side_effect = ["v1", "v2"]
+    recommenders = [MagicMock(name="old recommender"), MagicMock(name="new recommender")]
+    mocker.patch("pipeline.pipeline.AnimeRecommender", side_effect=recommenders)
+
+    pipeline = AnimeRecommendationPipeline(persist_dir=str(tmp_path), embedding=MagicMock())
+    embedding_cache = pipeline.embedding_cache
+    embedding_cache.set("space western", [0.1])
+    old_retrieval_cache = pipeline.retrieval_cache
+    old_retrieval_cache.set(("warm up", 4), ("stale",))
+    assert pipeline.reload_index() is False
+
+    second, second_dir = registry.create_version()
+    registry.publish(second)
+    assert pipeline.reload_index() is True
+
+    assert pipeline.index_dir == second_dir
+    assert pipeline.recommender is recommenders[1]
+    retrievers[1].invoke.assert_called_once_with("warm up")
+    assert pipeline.embedding_cache.get("space western") == [0.1]
+    # The new index warms up and serves from a retrieval cache of its own
+    assert pipeline.retrieval_cache is not old_retrieval_cache
+    assert pipeline.retrieval_cache.stats()["size"] == 0
+    assert old_retrieval_cache.get(("warm up", 4)) == ("stale",)
+    # No request was using the old index, so its vector store client is released at once
+    retrievers[0].close.assert_called_once_with()
+    retrievers[1].close.assert_not_called()
+
+
+def test_reloads_do_not_accumulate_vector_store_clients(mocker, tmp_path):
+    import pandas as pd
+    from chromadb.api.shared_system_client import SharedSystemClient
+    from langchain_core.embeddings import DeterministicFakeEmbedding
+    from src.index_registry import IndexRegistry
+    from src.vector_store import VectorStoreBuilder
+
+    csv_path = tmp_path / "processed.csv"
+    pd.DataFrame(
+        [(1, "Title: Cowboy Bebop .. Overview: bounty hunters in space .. Genres: Action")],
+        columns=["MAL_ID", "combined_info"]
+    ).to_csv(csv_path, index=False)
+    embedding = DeterministicFakeEmbedding(size=8)
+    registry = IndexRegistry(str(tmp_path / "indexes"))
+    versions = []
+    for _ in range(4):
+        version, version_dir = registry.create_version()
+        VectorStoreBuilder(str(csv_path), version_dir, embedding=embedding).build_and_save_vectorstore()
+        versions.append(version)
+    # Only the pipeline's clients remain open from here on
+    SharedSystemClient.clear_system_cache()
+    mocker.patch("pipeline.pipeline.AnimeRecommender")
+
+    registry.publish(versions[0])
+    pipeline = AnimeRecommendationPipeline(persist_dir=registry.root, embedding=embedding)
+    live_systems = len(SharedSystemClient._identifier_to_system)
+    for version in versions[1:]:
+        registry.publish(version)
+        assert pipeline.reload_index() is True
+        assert len(SharedSystemClient._identifier_to_system) == live_systems
+
+
+def test_recommend_batch_shares_retrieval_and_llm_calls_and_retries(mocker):
+    from langchain_core.documents import Document
+
+    mocker.patch("src.concurrency.time.sleep")
+    pipeline = AnimeRecommendationPipeline.__new__(AnimeRecommendationPipeline)  # bypass __init__
+    pipeline._slot = ServingSlot(ServingIndex("index", "v1", MagicMock(), MagicMock(), TTLCache(max_size=2)))
+    pipeline.retriever.invoke.side_effect = lambda query: [Document(page_content=f"Title: {query.lower()}")]
+
+    attempts = []
+
+    def generate(query, documents):
+        attempts.append(query)
+        if query == "space western" and attempts.count(query) == 1:
+            raise RuntimeError("rate limited")
+        return f"answer to {query}"
+
+    pipeline.recommender.get_recommendation_from_documents.side_effect = generate
+
+    records = list(pipeline.recommend_batch(
+        [("1", "School comedy"), ("2", "school comedy"), ("3", "space western"), ("4", "  ")],
+        batch_size=10, max_workers=2, requests_per_second=0, max_retries=1
+    ))
+
+    by_id = {record["id"]: record for record in records}
+    assert by_id["1"]["recommendation"] == by_id["2"]["recommendation"] == "answer to School comedy"
+    assert by_id["3"]["recommendation"] == "answer to space western"
+    assert "error" in by_id["4"]
+    assert sorted(attempts) == ["School comedy", "space western", "space western"]
+    # Waves are capped at the retrieval cache size so prefetched results stay cached
+    assert [call.args[0] for call in pipeline.retriever.prefetch.call_args_list] == [
+        ["School comedy", "school comedy"], ["space western"]
+    ]
+
+
+def test_recommend_batch_reports_retrieval_failures_per_query():
+    from langchain_core.documents import Document
+
+    pipeline = AnimeRecommendationPipeline.__new__(AnimeRecommendationPipeline)  # bypass __init__
+    pipeline._slot = ServingSlot(ServingIndex("index", "v1", MagicMock(), MagicMock(), TTLCache()))
+    pipeline.retriever.prefetch.side_effect = RuntimeError("vector store unavailable")
+
+    def retrieve(query):
+        if query == "space western":
+            raise RuntimeError("search timed out")
+        return [Document(page_content=f"Title: {query}")]
+
+    pipeline.retriever.invoke.side_effect = retrieve
+    pipeline.recommender.get_recommendation_from_documents.side_effect = lambda query, documents: f"answer to {query}"
+
+    records = list(pipeline.recommend_batch(
+        [("1", "school comedy"), ("2", "space western"), ("3", "mecha")],
+        max_workers=2, requests_per_second=0, max_retries=0
+    ))
+
+    by_id = {record["id"]: record for record in records}
+    assert by_id["1"]["recommendation"] == "answer to school comedy"
+    assert by_id["2"]["error"] == "search timed out"
+    assert by_id["3"]["recommendation"] == "answer to mecha"
+
+
+def test_batch_job_resumes_from_its_output(mocker, tmp_path):
+    import json
+    from pipeline import batch_pipeline
+
+    queries = tmp_path / "queries.jsonl"
+    queries.write_text("\n".join(json.dumps({"id": i, "query": f"query {i}"}) for i in range(1, 4)) + "\n")
+    output = tmp_path / "out.jsonl"
+    output.write_text(
+        json.dumps({"id": "1", "query": "query 1", "recommendation": "done"}) + "\n"
+        + json.dumps({"id": "2", "query": "query 2", "error": "failed"}) + "\n"
+        + '{"id": "3", "que'
+    )
+
+    pipeline = mocker.patch("pipeline.batch_pipeline.AnimeRecommendationPipeline").return_value
+    pipeline.recommend_batch.side_effect = lambda pending, **kwargs: (
+        {"id": query_id, "query": query, "recommendation": "new"} for query_id, query in pending
+    )
+
+    counts = batch_pipeline.main(str(queries), str(output), requests_per_second=0)
+
+    assert counts == {"skipped": 1, "answered": 2, "failed": 0}
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [line["id"] for line in lines] == ["1", "2", "3"]
+    assert all("recommendation" in line for line in lines)
+    assert batch_pipeline.completed_ids(str(output)) == {"1", "2", "3"}
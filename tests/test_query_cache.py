@@ -0,0 +1,86 @@
+from unittest.mock import MagicMock
+
+from langchain_core.documents import Document
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from src.query_cache import CachingRetriever, TTLCache, normalize_query
+
+
+def test_normalize_query_collapses_case_punctuation_and_spaces():
+    assert normalize_query("  Light-hearted  School anime! ") == "light hearted school anime"
+
+
+def test_ttl_cache_expires_and_evicts():
+    cache = TTLCache(max_size=2, ttl_seconds=0)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+    cache = TTLCache(max_size=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["hits"] == 2
+
+
+def test_repeated_queries_skip_encoder_and_search():
+    embeddings = MagicMock(wraps=DeterministicFakeEmbedding(size=8))
+    vectorstore = MagicMock()
+    vectorstore.embeddings = embeddings
+    vectorstore.similarity_search_by_vector.return_value = [Document(page_content="Title: K-On!")]
+
+    retriever = CachingRetriever.model_construct(
+        vectorstore=vectorstore, k=4, embedding_cache=TTLCache(), retrieval_cache=TTLCache()
+    )
+
+    first = retriever.invoke("light-hearted school anime")
+    second = retriever.invoke("Light hearted school anime!")
+
+    assert first == second
+    assert embeddings.embed_query.call_count == 1
+    assert vectorstore.similarity_search_by_vector.call_count == 1
+    assert retriever.retrieval_cache.stats()["hits"] == 1
+
+
+def test_prefetch_embeds_and_searches_queries_in_one_batch():
+    from src.numpy_store import NumpyVectorStore
+
+    embeddings = MagicMock(wraps=DeterministicFakeEmbedding(size=8))
+    store = NumpyVectorStore(embedding=embeddings)
+    store.add_texts(["Title: K-On!", "Title: Trigun", "Title: Monster"])
+    embeddings.reset_mock()
+    store.similarity_search_by_vector = MagicMock(wraps=store.similarity_search_by_vector)
+    retriever = CachingRetriever.model_construct(
+        vectorstore=store, k=2, embedding_cache=TTLCache(), retrieval_cache=TTLCache()
+    )
+
+    assert retriever.prefetch(["school anime", "School anime!", "space western"]) == 2
+    assert retriever.prefetch(["space western"]) == 0
+    assert embeddings.embed_documents.call_count == 1
+
+    documents = retriever.invoke("space western")
+
+    assert len(documents) == 2
+    assert embeddings.embed_query.call_count == 0
+    assert store.similarity_search_by_vector.call_count == 0
+    # Prefetch probes do not count as lookups; only the invoke above does
+    assert retriever.retrieval_cache.stats() == {"size": 2, "hits": 1, "misses": 0, "hit_rate": 1.0}
+
+
+def test_model_embeds_the_query_as_written_and_caches_on_the_normalized_form():
+    embeddings = MagicMock(wraps=DeterministicFakeEmbedding(size=8))
+    vectorstore = MagicMock()
+    vectorstore.embeddings = embeddings
+    retriever = CachingRetriever.model_construct(
+        vectorstore=vectorstore, k=4, embedding_cache=TTLCache(), retrieval_cache=TTLCache()
+    )
+
+    first = retriever.embed_query("  K-On! ")
+    second = retriever.embed_query("k on")
+
+    embeddings.embed_query.assert_called_once_with("K-On!")
+    assert first == second
+
+    retriever.prefetch(["Space Dandy!", "space dandy"])
+    embeddings.embed_documents.assert_called_once_with(["Space Dandy!"])
@@ -0,0 +1,97 @@
+import time
+from unittest.mock import MagicMock
+
+from langchain_core.documents import Document
+from src.reranker import CrossEncoderReranker, RerankingRetriever
+
+DOCUMENTS = [Document(page_content=text) for text in ["mecha war", "school band", "space bounty", "cooking duel"]]
+
+
+def overlap_scorer(pairs):
+    return [float(len(set(query.split()) & set(text.split()))) for query, text in pairs]
+
+
+def test_rerank_scores_in_batches_and_keeps_top_k():
+    scorer = MagicMock(side_effect=overlap_scorer)
+    reranker = CrossEncoderReranker(batch_size=3, scorer=scorer)
+    ranked = reranker.rerank("space bounty hunters", DOCUMENTS, k=2)
+    assert ranked[0].page_content == "space bounty"
+    assert len(ranked) == 2
+    assert [len(call.args[0]) for call in scorer.call_args_list] == [3, 1]
+
+
+def test_rerank_stops_at_latency_cap_and_keeps_retrieval_order_for_the_rest():
+    def slow_scorer(pairs):
+        time.sleep(0.02)
+        return [-float(index) for index in range(len(pairs))]
+
+    reranker = CrossEncoderReranker(batch_size=2, max_latency_seconds=0.01, scorer=slow_scorer)
+    ranked = reranker.rerank("q", list(reversed(DOCUMENTS)), k=4)
+    assert [d.page_content for d in ranked] == ["cooking duel", "space bounty", "school band", "mecha war"]
+
+
+def test_reranking_retriever_over_fetches_and_trims():
+    inner = MagicMock()
+    inner.invoke.return_value = DOCUMENTS
+    retriever = RerankingRetriever.model_construct(
+        retriever=inner, reranker=CrossEncoderReranker(scorer=overlap_scorer), k=1
+    )
+    assert retriever.invoke("school band") == [DOCUMENTS[1]]
+
+
+def test_first_batch_is_sized_to_the_latency_cap_from_the_measured_cost():
+    scorer = MagicMock(side_effect=overlap_scorer)
+    reranker = CrossEncoderReranker(batch_size=4, max_latency_seconds=0.01, scorer=scorer)
+    reranker.seconds_per_pair = 0.004
+
+    reranker.rerank("space bounty", DOCUMENTS, k=2)
+    assert len(scorer.call_args_list[0].args[0]) == 2
+
+    reranker.seconds_per_pair = 1.0
+    scorer.reset_mock()
+    ranked = reranker.rerank("space bounty", DOCUMENTS, k=4)
+    assert ranked == DOCUMENTS
+    assert scorer.call_count == 0
+    assert reranker.seconds_per_pair < 1.0
+
+
+def test_concurrent_first_requests_load_the_model_once(monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    loads = []
+
+    def create_scorer(self):
+        loads.append(1)
+        time.sleep(0.05)
+        return overlap_scorer
+
+    monkeypatch.setattr(CrossEncoderReranker, "_create_scorer", create_scorer)
+    reranker = CrossEncoderReranker()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: reranker.rerank("school band", DOCUMENTS, k=1), range(4)))
+
+    assert len(loads) == 1
+    assert all(result == [DOCUMENTS[1]] for result in results)
+
+
+def test_only_the_unmeasured_first_batch_runs_at_full_size(monkeypatch):
+    from types import SimpleNamespace
+
+    clock = [0.0]
+    batches = []
+
+    def timed_scorer(pairs):
+        batches.append(len(pairs))
+        clock[0] += 0.004 * len(pairs)
+        return overlap_scorer(pairs)
+
+    monkeypatch.setattr("src.reranker.time", SimpleNamespace(perf_counter=lambda: clock[0]))
+    reranker = CrossEncoderReranker(batch_size=4, max_latency_seconds=0.01, scorer=timed_scorer)
+
+    reranker.rerank("space bounty", DOCUMENTS, k=2)
+    assert batches == [4]
+    assert abs(reranker.seconds_per_pair - 0.004) < 1e-9
+
+    reranker.rerank("space bounty", DOCUMENTS, k=2)
+    # 0.01 s of budget at 0.004 s per pair affords two pairs, then nothing more fits
+    assert batches == [4, 2]
@@ -0,0 +1,127 @@
+from unittest.mock import MagicMock
+
+from src.recommender import AnimeRecommender
+from src.response_cache import ResponseCache
+from src.semantic_cache import SemanticCache
+
+
+def test_disk_tier_survives_restart_and_evicts_oldest(tmp_path):
+    db_path = str(tmp_path / "responses.sqlite3")
+    cache = ResponseCache(db_path=db_path, max_entries=2)
+    for i in range(3):
+        cache.set(f"key-{i}", f"answer {i}", index_version="v1")
+
+    reopened = ResponseCache(db_path=db_path, max_entries=2)
+    assert reopened.get("key-0") is None
+    assert reopened.get("key-2") == "answer 2"
+    assert reopened.stats()["disk_size"] == 2
+
+
+def test_new_index_version_invalidates_answers(tmp_path):
+    cache = ResponseCache(db_path=str(tmp_path / "responses.sqlite3"))
+    old_key = ResponseCache.make_key("school comedy", "llama", "template", "v1")
+    cache.set(old_key, "Azumanga Daioh", index_version="v1")
+
+    assert cache.invalidate_other_versions("v2") == 1
+    assert cache.get(old_key) is None
+    assert old_key != ResponseCache.make_key("school comedy", "llama", "template", "v2")
+
+
+def test_recommender_skips_llm_on_repeated_query():
+    recommender = AnimeRecommender.__new__(AnimeRecommender)  # bypass __init__
+    recommender.model_name = "llama"
+    recommender.index_version = "v1"
+    recommender.prompt = MagicMock(template="template")
+    recommender.response_cache = ResponseCache()
+    recommender.semantic_cache = None
+    recommender.qa_chain = MagicMock()
+    recommender.qa_chain.invoke.return_value = {"result": "K-On!"}
+
+    assert recommender.get_recommendation("Light-hearted school anime") == "K-On!"
+    assert recommender.get_recommendation("light hearted school anime!") == "K-On!"
+    recommender.qa_chain.invoke.assert_called_once()
+
+
+def test_semantic_cache_matches_paraphrases_above_threshold():
+    cache = SemanticCache(threshold=0.9)
+    cache.add([1.0, 0.0, 0.0], "Azumanga Daioh")
+
+    assert cache.lookup([0.99, 0.05, 0.0])[0] == "Azumanga Daioh"
+    assert cache.lookup([0.0, 1.0, 0.0]) is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 1
+    assert sum(stats["similarity_histogram"].values()) == 2
+
+
+def test_semantic_cache_only_matches_answers_of_the_same_index_version():
+    cache = SemanticCache(threshold=0.9, max_entries=3)
+    cache.add([1.0, 0.0, 0.0], "Azumanga Daioh", "v1")
+    cache.add([0.0, 1.0, 0.0], "Planetes", "v2")
+
+    assert cache.lookup([1.0, 0.0, 0.0], "v2") is None
+    assert cache.lookup([1.0, 0.0, 0.0], "v1")[0] == "Azumanga Daioh"
+
+    assert cache.invalidate_other_versions("v2") == 1
+    assert len(cache) == 1
+    assert cache.lookup([0.0, 1.0, 0.0], "v2")[0] == "Planetes"
+    cache.add([0.0, 0.0, 1.0], "Mushishi", "v2")
+    assert cache.lookup([0.0, 0.0, 1.0], "v2")[0] == "Mushishi"
+
+
+def test_streamed_answer_reports_timings_and_is_cached():
+    recommender = AnimeRecommender.__new__(AnimeRecommender)  # bypass __init__
+    recommender.model_name = "llama"
+    recommender.index_version = "v1"
+    recommender.prompt = MagicMock(template="template")
+    recommender.response_cache = ResponseCache()
+    recommender.semantic_cache = None
+    recommender.retriever = MagicMock()
+    recommender.llm = MagicMock()
+    recommender.llm.stream.return_value = [MagicMock(content="1. "), MagicMock(content="K-On!")]
+
+    stream = recommender.stream_recommendation("school anime")
+    assert list(stream) == ["1. ", "K-On!"]
+    assert stream.time_to_first_token is not None
+    assert stream.total_latency >= stream.time_to_first_token
+
+    assert list(recommender.stream_recommendation("School anime!")) == ["1. K-On!"]
+    recommender.llm.stream.assert_called_once()
+
+
+def test_streamed_cache_hits_are_not_stored_again():
+    recommender = AnimeRecommender.__new__(AnimeRecommender)  # bypass __init__
+    recommender.model_name = "llama"
+    recommender.index_version = "v1"
+    recommender.prompt = MagicMock(template="template")
+    recommender.response_cache = MagicMock()
+    recommender.response_cache.get.return_value = None
+    recommender.semantic_cache = SemanticCache(threshold=0.9)
+    recommender.embed_query = lambda query: [1.0, 0.0, 0.0]
+    recommender.retriever = MagicMock()
+    recommender.llm = MagicMock()
+    recommender.llm.stream.return_value = [MagicMock(content="K-On!")]
+
+    assert list(recommender.stream_recommendation("school anime")) == ["K-On!"]
+    assert list(recommender.stream_recommendation("anime set in a school")) == ["K-On!"]
+    assert list(recommender.stream_recommendation("school anime please")) == ["K-On!"]
+
+    recommender.llm.stream.assert_called_once()
+    assert len(recommender.semantic_cache) == 1
+    assert recommender.response_cache.set.call_count == 1
+
+
+def test_injected_chat_model_replaces_groq():
+    from langchain_core.documents import Document
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+    from langchain_core.retrievers import BaseRetriever
+
+    class StaticRetriever(BaseRetriever):
+        def _get_relevant_documents(self, query, *, run_manager):
+            return [Document(page_content="Title: Mushishi .. Overview: a wandering healer")]
+
+    llm = FakeListChatModel(responses=["1. Mushishi"])
+    recommender = AnimeRecommender(retriever=StaticRetriever(), api_key="unused", model_name="fake", llm=llm)
+
+    assert recommender.llm is llm
+    assert recommender.get_recommendation("calm anime") == "1. Mushishi"
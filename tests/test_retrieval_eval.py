@@ -0,0 +1,30 @@
+import numpy as np
+
+from src.retrieval_eval import exact_neighbors, pareto_front, recall_at_k
+
+
+def test_exact_neighbors_rank_by_cosine_across_blocks():
+    items = np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]])
+    queries = np.array([[2.0, 0.1], [0.1, 3.0], [1.0, 0.9]])
+
+    neighbors = exact_neighbors(queries, items, k=2, block_size=2)
+
+    assert neighbors.tolist() == [[0, 2], [1, 2], [2, 0]]
+    assert exact_neighbors(queries, items, k=10).shape == (3, 3)
+
+
+def test_recall_at_k_compares_top_k_sets():
+    assert recall_at_k([1, 2, 3, 4], [2, 1, 9, 8], k=2) == 1.0
+    assert recall_at_k([1, 5], [1, 2, 3], k=2) == 0.5
+    assert recall_at_k([1], [], k=4) == 1.0
+
+
+def test_pareto_front_drops_dominated_rows():
+    rows = [
+        {"recall": 1.0, "latency": 5.0},
+        {"recall": 0.9, "latency": 1.0},
+        {"recall": 0.9, "latency": 2.0},
+        {"recall": 0.8, "latency": 1.0},
+    ]
+
+    assert pareto_front(rows, maximize=["recall"], minimize=["latency"]) == [True, True, False, False]
@@ -0,0 +1,132 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from unittest.mock import MagicMock
+
+import pytest
+from app.server import RecommendationServer
+
+
+def _post(port, payload):
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{port}/recommend",
+        data=json.dumps(payload).encode("utf-8"),
+        headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.status, json.loads(response.read())
+
+
+@pytest.fixture
+def served():
+    servers = []
+
+    def start(pipeline, **kwargs):
+        server = RecommendationServer(pipeline, host="127.0.0.1", port=0, **kwargs)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+
+
+def test_recommend_endpoint_returns_pipeline_answer(served):
+    pipeline = MagicMock()
+    pipeline.recommend.return_value = "Watch Cowboy Bebop"
+    server = served(pipeline, workers=2, queue_size=4)
+
+    status, body = _post(server.port, {"query": "space western"})
+
+    assert status == 200
+    assert body == {"query": "space western", "recommendation": "Watch Cowboy Bebop"}
+
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        _post(server.port, {"query": "  "})
+    assert excinfo.value.code == 400
+
+
+def test_full_queue_answers_503(served):
+    release = threading.Event()
+    started = threading.Event()
+    pipeline = MagicMock()
+
+    def slow_recommend(query):
+        started.set()
+        release.wait(5)
+        return "done"
+
+    pipeline.recommend.side_effect = slow_recommend
+    server = served(pipeline, workers=1, queue_size=1, request_timeout=5)
+
+    threading.Thread(target=_post, args=(server.port, {"query": "first"}), daemon=True).start()
+    assert started.wait(5)
+    assert server.submit("second") is not None  # fills the queue
+
+    with pytest.raises(urllib.error.HTTPError) as excinfo:
+        _post(server.port, {"query": "third"})
+    assert excinfo.value.code == 503
+    release.set()
+
+
+def test_metrics_endpoint_exports_prometheus_text(served):
+    pipeline = MagicMock()
+    pipeline.recommend.return_value = "Watch Cowboy Bebop"
+    server = served(pipeline, workers=1, queue_size=2)
+
+    request = urllib.request.Request(
+        f"http://127.0.0.1:{server.port}/recommend",
+        data=json.dumps({"query": "space western"}).encode("utf-8"),
+        headers={"Content-Type": "application/json", "X-Request-ID": "req-42"}
+    )
+    with urllib.request.urlopen(request, timeout=5) as response:
+        assert response.headers["X-Request-ID"] == "req-42"
+
+    with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics", timeout=5) as response:
+        assert response.headers["Content-Type"].startswith("text/plain")
+        text = response.read().decode("utf-8")
+    assert "anime_recommender_request_duration_seconds_count" in text
+
+
+def _raw_post(port, headers, body=b""):
+    import http.client
+
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+    connection.putrequest("POST", "/recommend")
+    for name, value in headers.items():
+        connection.putheader(name, value)
+    connection.endheaders(body)
+    response = connection.getresponse()
+    result = response.status, response.headers["X-Request-ID"], json.loads(response.read())
+    connection.close()
+    return result
+
+
+def test_bad_content_length_is_rejected_with_the_request_id(served):
+    pipeline = MagicMock()
+    server = served(pipeline, workers=1, queue_size=2)
+
+    for length in ("-1", "abc"):
+        status, request_id, body = _raw_post(server.port, {"Content-Length": length, "X-Request-ID": "req-7"})
+        assert (status, request_id) == (400, "req-7")
+    status, request_id, _ = _raw_post(server.port, {})
+    assert status == 400 and request_id
+    status, _, _ = _raw_post(server.port, {"Content-Length": str(10 ** 6)})
+    assert status == 413
+    pipeline.recommend.assert_not_called()
+
+
+def test_internal_errors_hide_details_and_carry_the_request_id(served):
+    pipeline = MagicMock()
+    pipeline.recommend.side_effect = RuntimeError("groq api key sk-secret rejected")
+    server = served(pipeline, workers=1, queue_size=2)
+
+    payload = json.dumps({"query": "space western"}).encode("utf-8")
+    status, request_id, body = _raw_post(
+        server.port, {"Content-Length": str(len(payload)), "X-Request-ID": "req-9"}, payload
+    )
+
+    assert (status, request_id) == (500, "req-9")
+    assert body == {"error": "Internal server error", "request_id": "req-9"}
@@ -0,0 +1,34 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from utils.startup import StartupReport, STARTUP_REPORT, lazy_import
+
+
+def test_lazy_import_records_first_import_only():
+    module = lazy_import("xml.dom.minidom")
+    assert module.__name__ == "xml.dom.minidom"
+    assert lazy_import("xml.dom.minidom") is module
+    assert "import xml.dom.minidom" in STARTUP_REPORT.as_dict()["stages_ms"]
+
+
+def test_timed_stages_accumulate():
+    report = StartupReport()
+    with report.timed("load"):
+        pass
+    with report.timed("load"):
+        pass
+    assert list(report.as_dict()["stages_ms"]) == ["load"]
+
+
+def test_importing_pipeline_defers_heavy_dependencies(tmp_path):
+    code = (
+        "import sys, os; import pipeline.pipeline; "
+        "heavy = ['chromadb', 'langchain_groq', 'langchain_huggingface', 'sentence_transformers', 'torch']; "
+        "print([m for m in heavy if m in sys.modules], os.path.exists('logs'))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=tmp_path, capture_output=True, text=True, check=True,
+        env={"PYTHONPATH": str(Path(__file__).resolve().parents[1])}
+    ).stdout
+    assert output.strip() == "[] False"
@@ -0,0 +1,122 @@
+import pandas as pd
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from src.vector_store import VectorStoreBuilder, hnsw_metadata
+
+
+def _write_catalogue(path, rows):
+    pd.DataFrame(rows, columns=["MAL_ID", "combined_info"]).to_csv(path, index=False)
+
+
+def test_incremental_build_applies_only_the_diff(tmp_path):
+    csv_path = tmp_path / "processed.csv"
+    embedding = DeterministicFakeEmbedding(size=8)
+    builder = VectorStoreBuilder(
+        csv_path=str(csv_path),
+        persist_dir=str(tmp_path / "db"),
+        embedding=embedding
+    )
+
+    _write_catalogue(csv_path, [
+        (1, "Title: Cowboy Bebop .. Overview: bounty hunters in space"),
+        (5, "Title: Trigun .. Overview: a gunman with a huge bounty"),
+        (6, "Title: Monster .. Overview: a surgeon hunts a killer"),
+    ])
+    builder.build_and_save_vectorstore(incremental=True)
+    first_ids = set(builder.load_vector_store().get(include=[])["ids"])
+    assert len(first_ids) == 3
+
+    # Change one row, drop one row, add one row
+    _write_catalogue(csv_path, [
+        (1, "Title: Cowboy Bebop .. Overview: bounty hunters in space"),
+        (5, "Title: Trigun .. Overview: a pacifist gunman with a huge bounty"),
+        (7, "Title: Mushishi .. Overview: a wanderer studies mushi"),
+    ])
+    builder.build_and_save_vectorstore(incremental=True)
+    second_ids = set(builder.load_vector_store().get(include=[])["ids"])
+
+    assert len(second_ids) == 3
+    assert len(first_ids & second_ids) == 1
+    assert {doc_id.split(":")[0] for doc_id in second_ids} == {"1", "5", "7"}
+
+
+def test_full_rebuild_does_not_duplicate_vectors(tmp_path):
+    csv_path = tmp_path / "processed.csv"
+    _write_catalogue(csv_path, [
+        (1, "Title: Cowboy Bebop .. Overview: bounty hunters in space"),
+        (5, "Title: Trigun .. Overview: a gunman with a huge bounty"),
+    ])
+    builder = VectorStoreBuilder(
+        csv_path=str(csv_path),
+        persist_dir=str(tmp_path / "db"),
+        embedding=DeterministicFakeEmbedding(size=8)
+    )
+
+    builder.build_and_save_vectorstore()
+    builder.build_and_save_vectorstore()
+
+    assert len(builder.load_vector_store().get(include=[])["ids"]) == 2
+
+
+def test_chunk_settings_and_hnsw_parameters_apply_to_the_build(tmp_path):
+    csv_path = tmp_path / "processed.csv"
+    _write_catalogue(csv_path, [
+        (1, "Title: Cowboy Bebop .. Overview: " + " ".join(["bounty hunters drift through space"] * 20)),
+    ])
+    builder = VectorStoreBuilder(
+        csv_path=str(csv_path),
+        persist_dir=str(tmp_path / "db"),
+        embedding=DeterministicFakeEmbedding(size=8),
+        chunk_size=200,
+        chunk_overlap=0,
+        chunk_separator=" ",
+        collection_metadata=hnsw_metadata(m=32, search_ef=20)
+    )
+
+    builder.build_and_save_vectorstore()
+    store = builder.load_vector_store()
+
+    assert len(store.get(include=[])["ids"]) > 1
+    assert store._collection.metadata == {"hnsw:M": 32, "hnsw:search_ef": 20}
+
+
+def test_chroma_prefetch_matches_single_query_retrieval(tmp_path):
+    csv_path = tmp_path / "processed.csv"
+    _write_catalogue(csv_path, [
+        (1, "Title: Cowboy Bebop .. Overview: bounty hunters in space"),
+        (5, "Title: Trigun .. Overview: a gunman with a huge bounty"),
+        (6, "Title: Monster .. Overview: a surgeon hunts a killer"),
+    ])
+    builder = VectorStoreBuilder(
+        csv_path=str(csv_path),
+        persist_dir=str(tmp_path / "db"),
+        embedding=DeterministicFakeEmbedding(size=8)
+    )
+    builder.build_and_save_vectorstore()
+    queries = ["space bounty hunters", "a surgeon"]
+
+    batched = builder.load_retriever(k=2, infer_filters=False)
+    assert batched.prefetch(queries) == 2
+    single = builder.load_retriever(k=2, infer_filters=False)
+
+    assert [batched.invoke(query) for query in queries] == [single.invoke(query) for query in queries]
+    assert batched.retrieval_cache.stats()["hits"] == 2
+
+
+def test_neighbor_table_embeds_titles_one_batch_at_a_time(tmp_path):
+    from unittest.mock import MagicMock
+    from langchain_core.documents import Document
+
+    rows = [(1, "Cowboy Bebop"), (2, "Trigun"), (1, "Cowboy Bebop"), (3, "Planetes"), (4, "Mushishi")]
+    documents = [Document(page_content=f"Title: {name}", metadata={"MAL_ID": mal_id, "Name": name})
+                 for mal_id, name in rows]
+    embedding = MagicMock(wraps=DeterministicFakeEmbedding(size=8))
+    builder = VectorStoreBuilder(
+        csv_path="", persist_dir=str(tmp_path), embedding=embedding,
+        document_source=lambda: iter(documents), stream_batch_size=2
+    )
+
+    table = builder.build_neighbor_table(top_n=2)
+
+    assert [len(call.args[0]) for call in embedding.embed_documents.call_args_list] == [2, 1, 1]
+    assert table.titles == ["Cowboy Bebop", "Trigun", "Planetes", "Mushishi"]
+    assert table.neighbors.shape == (4, 2)
@@ -1,14 +1,68 @@
+import json
 import logging
 import os
-from datetime import datetime
+from contextvars import ContextVar
+from datetime import datetime, timezone
 
 LOGS_DIR = "logs"
-os.makedirs(LOGS_DIR,exist_ok=True)
 
 LOG_FILE = os.path.join(LOGS_DIR, f"log_{datetime.now().strftime('%Y-%m-%d')}.log")
 
+
+class LazyFileHandler(logging.FileHandler):
+    """File handler that creates the log directory and file on the first record, not at import."""
+
+    def __init__(self, filename: str) -> None:
+        super().__init__(filename, delay=True)
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.baseFilename), exist_ok=True)
+        return super()._open()
+
+
+# ID of the request being handled; set by utils.metrics.request_context
+REQUEST_ID: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+class RequestIdFilter(logging.Filter):
+    """Adds the current request ID to every record as ``request_id``."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = REQUEST_ID.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formats records as one JSON object per line with time, level, logger,
+    request ID and message. Structured data passed as ``extra={"fields": {...}}``
+    is merged into the object.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", REQUEST_ID.get()),
+            "message": record.getMessage(),
+        }
+        entry.update(getattr(record, "fields", None) or {})
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+# "text" keeps the classic line format; "json" writes structured lines for log shippers
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+
+_handler = LazyFileHandler(LOG_FILE)
+_handler.addFilter(RequestIdFilter())
+if LOG_FORMAT == "json":
+    _handler.setFormatter(JsonFormatter())
+
 logging.basicConfig(
-    filename=LOG_FILE,
+    handlers=[_handler],
     format='%(asctime)s - %(levelname)s - %(message)s',
     level=logging.INFO
 )
@@ -16,4 +70,4 @@ logging.basicConfig(
 def get_logger(name:str):
     logger = logging.getLogger(name)
     logger.setLevel(logging.INFO)
-    return logger
\ No newline at end of file
+    return logger
@@ -0,0 +1,430 @@
+import bisect
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Iterator, Optional
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from utils.logger import REQUEST_ID, get_logger
+
+logger = get_logger(__name__)
+
+PREFIX = "anime_recommender"
+
+# Upper bounds in seconds, from cache hits to slow LLM calls
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+HELP = {
+    "request_duration_seconds": "End-to-end latency of recommendation requests.",
+    "stage_duration_seconds": "Latency of hot-path stages such as embed, vector_search and llm.",
+    "cache_requests_total": "Cache lookups by cache and result.",
+    "tokens_total": "Tokens by kind: context, prompt and completion.",
+    "requests_total": "Recommendation requests by status.",
+    "stream_time_to_first_token_seconds": "Time until the first token of streamed recommendations.",
+    "stream_duration_seconds": "Time until the last token of streamed recommendations.",
+}
+
+
+class Histogram:
+    """
+    Fixed-bucket latency histogram with interpolated quantiles.
+
+    Memory is constant: only bucket counts, the sum and the count are kept.
+
+    Attributes:
+        buckets (tuple[float, ...]): Sorted bucket upper bounds; +Inf is implicit.
+        counts (list[int]): Observations per bucket, the last one being +Inf.
+        sum (float): Sum of all observations.
+        count (int): Number of observations.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """
+        Adds one observation.
+
+        Args:
+            value (float): Observed value, e.g. seconds.
+        """
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float:
+        """
+        Estimates a quantile by linear interpolation inside its bucket, as
+        Prometheus' ``histogram_quantile`` does.
+
+        Args:
+            q (float): Quantile between 0 and 1.
+
+        Returns:
+            float: The estimate, or 0.0 without observations.
+        """
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, bucket_count in enumerate(self.counts):
+            if cumulative + bucket_count >= rank and bucket_count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                return lower + (self.buckets[index] - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: Count, sum and the p50/p95/p99 estimates.
+        """
+        summary = {"count": self.count, "sum": round(self.sum, 6)}
+        summary.update({f"p{round(q * 100)}": round(self.quantile(q), 6) for q in QUANTILES})
+        return summary
+
+
+class MetricsRegistry:
+    """
+    Thread-safe in-process registry of counters and histograms, keyed by name
+    and labels, with Prometheus text exposition.
+    """
+
+    def __init__(self) -> None:
+        self._histograms: dict[tuple[str, tuple], Histogram] = {}
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        """
+        Records a value in the histogram ``name`` with the given labels.
+
+        Args:
+            name (str): Metric name without prefix, e.g. "stage_duration_seconds".
+            value (float): Observed value.
+            **labels (str): Label values, e.g. stage="embed".
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(value)
+
+    def increment(self, name: str, amount: float = 1, **labels: str) -> None:
+        """
+        Adds to the counter ``name`` with the given labels.
+
+        Args:
+            name (str): Metric name without prefix, ending in "_total".
+            amount (float, optional): Increment. Defaults to 1.
+            **labels (str): Label values, e.g. cache="response", result="hit".
+        """
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def snapshot(self) -> dict:
+        """
+        Returns all metrics as plain data, histograms with p50/p95/p99.
+
+        Returns:
+            dict: {"histograms": {...}, "counters": {...}} keyed by "name{labels}".
+        """
+        with self._lock:
+            return {
+                "histograms": {_series(name, labels): h.snapshot() for (name, labels), h in self._histograms.items()},
+                "counters": {_series(name, labels): value for (name, labels), value in self._counters.items()},
+            }
+
+    def render_prometheus(self) -> str:
+        """
+        Renders all metrics in the Prometheus text exposition format (0.0.4).
+
+        Histograms are exported with cumulative buckets, sum and count; their
+        in-process p50/p95/p99 estimates are exported as a companion gauge
+        ``<name>_quantile``.
+
+        Returns:
+            str: The exposition text.
+        """
+        lines: list[str] = []
+        with self._lock:
+            for name in sorted({name for name, _ in self._histograms}):
+                full_name = f"{PREFIX}_{name}"
+                lines += [f"# HELP {full_name} {HELP.get(name, name)}", f"# TYPE {full_name} histogram"]
+                series = sorted(
+                    ((labels, h) for (n, labels), h in self._histograms.items() if n == name), key=lambda item: item[0]
+                )
+                for labels, histogram in series:
+                    cumulative = 0
+                    for bound, bucket_count in zip(histogram.buckets + (float("inf"),), histogram.counts):
+                        cumulative += bucket_count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{_series(full_name + '_bucket', labels + (('le', le),))} {cumulative}")
+                    lines.append(f"{_series(full_name + '_sum', labels)} {histogram.sum}")
+                    lines.append(f"{_series(full_name + '_count', labels)} {histogram.count}")
+                lines += [f"# HELP {full_name}_quantile In-process quantile estimates of {full_name}.",
+                          f"# TYPE {full_name}_quantile gauge"]
+                for labels, histogram in series:
+                    for q in QUANTILES:
+                        lines.append(
+                            f"{_series(full_name + '_quantile', labels + (('quantile', str(q)),))} "
+                            f"{histogram.quantile(q)}"
+                        )
+
+            for name in sorted({name for name, _ in self._counters}):
+                full_name = f"{PREFIX}_{name}"
+                lines += [f"# HELP {full_name} {HELP.get(name, name)}", f"# TYPE {full_name} counter"]
+                for (n, labels), value in sorted(self._counters.items()):
+                    if n == name:
+                        lines.append(f"{_series(full_name, labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        """Drops all recorded metrics."""
+        with self._lock:
+            self._histograms.clear()
+            self._counters.clear()
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _series(name: str, labels: tuple) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in labels) + "}"
+
+
+# Process-wide registry, exported by the server's /metrics endpoint
+METRICS = MetricsRegistry()
+
+
+class RequestRecord:
+    """
+    Per-request instrumentation: stage timings, token counts and cache results.
+
+    Attributes:
+        request_id (str): Request ID, also attached to every log record.
+        stages_ms (dict[str, float]): Milliseconds per stage; repeated stages add up.
+        tokens (dict[str, int]): Tokens per kind.
+        cache (dict[str, str]): "hit" or "miss" per cache.
+    """
+
+    def __init__(self, request_id: str) -> None:
+        self.request_id = request_id
+        self.stages_ms: dict[str, float] = {}
+        self.tokens: dict[str, int] = {}
+        self.cache: dict[str, str] = {}
+
+    def as_dict(self) -> dict:
+        """
+        Returns:
+            dict: The record as plain data for structured logs.
+        """
+        return {
+            "request_id": self.request_id,
+            "stages_ms": {stage: round(ms, 2) for stage, ms in self.stages_ms.items()},
+            "tokens": dict(self.tokens),
+            "cache": dict(self.cache),
+        }
+
+
+_CURRENT_REQUEST: ContextVar[Optional[RequestRecord]] = ContextVar("current_request", default=None)
+
+
+def current_request() -> Optional[RequestRecord]:
+    """
+    Returns:
+        Optional[RequestRecord]: The record of the request being handled, if any.
+    """
+    return _CURRENT_REQUEST.get()
+
+
+@contextmanager
+def request_context(request_id: Optional[str] = None) -> Iterator[RequestRecord]:
+    """
+    Instruments one recommendation request.
+
+    Sets the request ID for log records, collects stage timings, token counts
+    and cache results, records the end-to-end latency and writes one structured
+    summary line when the request ends. Nested calls join the outer request.
+
+    Args:
+        request_id (str, optional): ID to use, e.g. from an X-Request-ID header.
+            A random one is generated when omitted.
+
+    Yields:
+        RequestRecord: The record of the request.
+    """
+    existing = _CURRENT_REQUEST.get()
+    if existing is not None:
+        yield existing
+        return
+
+    record = RequestRecord(request_id or uuid.uuid4().hex[:16])
+    record_token = _CURRENT_REQUEST.set(record)
+    id_token = REQUEST_ID.set(record.request_id)
+    status = "ok"
+    start = time.perf_counter()
+    try:
+        yield record
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        METRICS.observe("request_duration_seconds", elapsed)
+        METRICS.increment("requests_total", status=status)
+        fields = dict(record.as_dict(), status=status, duration_ms=round(elapsed * 1000, 2))
+        logger.info("Request %s finished (%s) in %.1f ms: %s", record.request_id, status, elapsed * 1000,
+                    fields, extra={"fields": fields})
+        REQUEST_ID.reset(id_token)
+        _CURRENT_REQUEST.reset(record_token)
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """
+    Times a hot-path stage into ``stage_duration_seconds`` and the current request.
+
+    Args:
+        name (str): Stage name, e.g. "embed", "vector_search" or "llm".
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def record_stage(name: str, seconds: float) -> None:
+    """
+    Records a stage duration measured elsewhere, e.g. by a callback.
+
+    Args:
+        name (str): Stage name.
+        seconds (float): Duration in seconds.
+    """
+    METRICS.observe("stage_duration_seconds", seconds, stage=name)
+    record = _CURRENT_REQUEST.get()
+    if record is not None:
+        record.stages_ms[name] = record.stages_ms.get(name, 0.0) + seconds * 1000
+
+
+def record_cache(cache: str, hit: bool) -> None:
+    """
+    Counts a cache lookup.
+
+    Args:
+        cache (str): Cache name, e.g. "response", "semantic", "retrieval" or "embedding".
+        hit (bool): Whether the lookup was served from the cache.
+    """
+    result = "hit" if hit else "miss"
+    METRICS.increment("cache_requests_total", cache=cache, result=result)
+    record = _CURRENT_REQUEST.get()
+    if record is not None:
+        record.cache[cache] = result
+
+
+def record_tokens(kind: str, count: int) -> None:
+    """
+    Counts tokens.
+
+    Args:
+        kind (str): "context", "prompt" or "completion".
+        count (int): Number of tokens.
+    """
+    METRICS.increment("tokens_total", count, kind=kind)
+    record = _CURRENT_REQUEST.get()
+    if record is not None:
+        record.tokens[kind] = record.tokens.get(kind, 0) + count
+
+
+def record_stream(time_to_first_token: Optional[float], total_latency: Optional[float]) -> None:
+    """
+    Records the latencies of a finished token stream.
+
+    Args:
+        time_to_first_token (float, optional): Seconds until the first token;
+            None if the stream produced no tokens.
+        total_latency (float, optional): Seconds until the last token.
+    """
+    if time_to_first_token is not None:
+        METRICS.observe("stream_time_to_first_token_seconds", time_to_first_token)
+    if total_latency is not None:
+        METRICS.observe("stream_duration_seconds", total_latency)
+
+
+class MetricsCallbackHandler(BaseCallbackHandler):
+    """
+    LangChain callback recording the "retrieve" and "llm" stages and the
+    prompt and completion token usage reported by the model.
+
+    Pass a fresh handler per chain call. It is bound to the request active when
+    it is created, since LangChain may run callbacks on other threads.
+    """
+
+    def __init__(self) -> None:
+        self._record = _CURRENT_REQUEST.get()
+        self._starts: dict[Any, tuple[str, float]] = {}
+        self._retrievers = 0
+
+    def _start(self, run_id: Any, name: str) -> None:
+        self._starts[run_id] = (name, time.perf_counter())
+
+    def _end(self, run_id: Any) -> None:
+        started = self._starts.pop(run_id, None)
+        if started is None:
+            return
+        name, start = started
+        token = _CURRENT_REQUEST.set(self._record)
+        try:
+            record_stage(name, time.perf_counter() - start)
+        finally:
+            _CURRENT_REQUEST.reset(token)
+
+    def on_retriever_start(self, serialized: Any, query: str, *, run_id: Any, **kwargs: Any) -> None:
+        # Retriever wrappers nest; only the outermost one is the retrieve stage
+        self._retrievers += 1
+        if self._retrievers == 1:
+            self._start(run_id, "retrieve")
+
+    def on_retriever_end(self, documents: Any, *, run_id: Any, **kwargs: Any) -> None:
+        self._retrievers -= 1
+        self._end(run_id)
+
+    def on_retriever_error(self, error: BaseException, *, run_id: Any, **kwargs: Any) -> None:
+        self._retrievers -= 1
+        self._end(run_id)
+
+    def on_llm_start(self, serialized: Any, prompts: list, *, run_id: Any, **kwargs: Any) -> None:
+        self._start(run_id, "llm")
+
+    def on_chat_model_start(self, serialized: Any, messages: list, *, run_id: Any, **kwargs: Any) -> None:
+        self._start(run_id, "llm")
+
+    def on_llm_end(self, response: Any, *, run_id: Any, **kwargs: Any) -> None:
+        self._end(run_id)
+        usage = (getattr(response, "llm_output", None) or {}).get("token_usage") or {}
+        token = _CURRENT_REQUEST.set(self._record)
+        try:
+            for kind in ("prompt", "completion"):
+                if usage.get(f"{kind}_tokens"):
+                    record_tokens(kind, int(usage[f"{kind}_tokens"]))
+        finally:
+            _CURRENT_REQUEST.reset(token)
+
+    def on_llm_error(self, error: BaseException, *, run_id: Any, **kwargs: Any) -> None:
+        self._end(run_id)
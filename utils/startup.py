@@ -0,0 +1,78 @@
+import importlib
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from types import ModuleType
+from typing import Iterator
+
+
+class StartupReport:
+    """
+    Collects durations of startup stages: lazy module imports, model loads and
+    index loads, in the order they happen.
+
+    Attributes:
+        stages (dict[str, float]): Seconds per stage name.
+    """
+
+    def __init__(self) -> None:
+        self.stages: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Adds a duration to a stage.
+
+        Args:
+            stage (str): Stage name, e.g. "import chromadb".
+            seconds (float): Duration in seconds.
+        """
+        with self._lock:
+            self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+
+    @contextmanager
+    def timed(self, stage: str) -> Iterator[None]:
+        """
+        Context manager recording the duration of its body as ``stage``.
+
+        Args:
+            stage (str): Stage name.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def as_dict(self) -> dict:
+        """
+        Returns the stages with their durations in milliseconds. Stages can
+        nest (an import inside "load retriever"), so they are not summed.
+
+        Returns:
+            dict: {"stages_ms": {stage name: milliseconds}}.
+        """
+        with self._lock:
+            return {"stages_ms": {stage: round(seconds * 1000, 1) for stage, seconds in self.stages.items()}}
+
+
+# Process-wide report, shared by lazy imports and the pipeline warm-up
+STARTUP_REPORT = StartupReport()
+
+
+def lazy_import(name: str) -> ModuleType:
+    """
+    Imports a module on first use and records the import time in STARTUP_REPORT.
+
+    Args:
+        name (str): Dotted module name.
+
+    Returns:
+        ModuleType: The imported module.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    with STARTUP_REPORT.timed(f"import {name}"):
+        return importlib.import_module(name)